@@ -187,6 +187,15 @@ STATICFILES_DIRS = (
 APPEND_SLASH = False
 
 
+# Document numbering: numbers reserved per worker for gapped series
+# (invoice / receipt / credit & debit notes / vendor bills stay gapless)
+DOCUMENT_NUMBER_BLOCK_SIZE = 20
+
+# Soft delete backups older than this move to MEDIA_ROOT/archive/deleted_records
+# (python manage.py archive_deleted_records)
+DELETED_RECORD_RETENTION_DAYS = 90
+
+
 
 
 
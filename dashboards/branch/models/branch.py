@@ -3,6 +3,7 @@ from django.conf import settings
 from django.core.validators import MinLengthValidator, RegexValidator
 from django.contrib.contenttypes.fields import GenericRelation
 from dashboards.super_admin.models.base import Location
+from dashboards.super_admin.services.gstin import state_code
 
 
 class Branch(models.Model):
@@ -102,6 +103,11 @@ class Branch(models.Model):
             self.branch_code = self._generate_branch_code()
         super().save(*args, **kwargs)
 
+    @property
+    def gst_state_code(self):
+        # derived, the branch app keeps no migrations to add a column with
+        return state_code(self.branch_gst_no)
+
     def __str__(self):
         return f"{self.branch_name} ({self.branch_code})"
 
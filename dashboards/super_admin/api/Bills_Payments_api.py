@@ -1,10 +1,19 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from dashboards.super_admin.models.base import PartyMaster
+from dashboards.super_admin.models.base import PartyMaster, immediate_atomic
 from dashboards.super_admin.models.finance import BillDetails, BillDetailsItem
 import logging
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from dashboards.super_admin.services.counters import next_vendor_bill_number
+from dashboards.super_admin.services.three_way_match import (
+    ThreeWayMatchError,
+    parse_bill_ids,
+    parse_bill_items,
+    run_bill_matching,
+)
 
 
 class BillsPaymentsAPI(APIView):
@@ -14,6 +23,7 @@ class BillsPaymentsAPI(APIView):
         bills = BillDetails.objects.select_related("party_master").all().values(
             "id",
             "bill_number",
+            "voucher_number",
             "bill_date",
             "party_master__name",
             "total_quantity",
@@ -39,42 +49,76 @@ class BillsPaymentsAPI(APIView):
                 {"status": False, "message": "At least one item is required"},
             )
 
-        with transaction.atomic():
+        try:
+            items = parse_bill_items(items_data)
+        except ThreeWayMatchError as exc:
+            return Response({"status": False, "message": str(exc)}, status=400)
+
+        with immediate_atomic():
             bill = BillDetails.objects.create(
                 party_master=party_master,
+                purchase_order_id=data.get("purchase_order_id"),
                 bill_number=data.get("bill_number"),
+                voucher_number=next_vendor_bill_number(),
                 bill_date=data.get("bill_date"),
                 total_quantity=0,  # will be updated after items creation
                 total_amount=0,    # will be updated after items creation
-                status=data.get("status", "draft"),
+                status="draft",    # matched by the daily three way match run
             )
 
-            total_quantity = 0
-            total_amount = 0
-
-            for item in items_data:
-                bill_item = BillDetailsItem.objects.create(
-                    bill=bill,
-                    description=item.get("description"),
-                    quantity=item.get("quantity", 1),
-                    unit_price=item.get("unit_price", 0),
-                )
-                total_quantity += bill_item.quantity
-                total_amount += bill_item.quantity * bill_item.unit_price
+            for item in items:
+                item.bill = bill
+            BillDetailsItem.objects.bulk_create(items)
 
-            bill.total_quantity = total_quantity
-            bill.total_amount = total_amount
-            bill.save()
+            totals = BillDetailsItem.objects.filter(bill=bill).aggregate(
+                quantity=Sum("quantity"), amount=Sum("amount")
+            )
+            bill.total_quantity = totals["quantity"] or 0
+            bill.total_amount = totals["amount"] or 0
+            BillDetails.objects.filter(pk=bill.pk).update(
+                total_quantity=bill.total_quantity, total_amount=bill.total_amount
+            )
 
         return Response({
             "status": True,
             "message": "Bill created successfully",
             "data": {
                 "id": bill.id,
-                "bill_number": bill.bill_number
+                "bill_number": bill.bill_number,
+                "voucher_number": bill.voucher_number
             }
         })
 
+
+class BillMatchAPI(APIView):
+    """
+    Runs the three way match now for a day's bills (or a list of bills),
+    the same job match_vendor_bills runs every night
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = request.data
+        bill_date = parse_date(str(data.get("bill_date") or ""))
+        try:
+            bill_ids = parse_bill_ids(data.get("bill_ids"))
+        except ThreeWayMatchError as exc:
+            return Response({"status": False, "message": str(exc), "data": []}, status=400)
+
+        if not bill_date and not bill_ids:
+            return Response({
+                "status": False,
+                "message": "bill_date (YYYY-MM-DD) or bill_ids is required",
+                "data": []
+            }, status=400)
+
+        stats = run_bill_matching(bill_date=bill_date, bill_ids=bill_ids)
+        return Response({
+            "status": True,
+            "message": f"{stats['bills_matched']} of {stats['bills']} bill(s) matched",
+            "data": stats
+        })
+
 class PartyMasterDetailAPI(APIView):
     permission_classes = [IsAuthenticated]
 
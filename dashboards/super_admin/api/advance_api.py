@@ -7,9 +7,76 @@ from dashboards.super_admin.models.hr import Employee  # Adjust import path as n
 
 from datetime import datetime
 from rest_framework import status
-import csv
-from io import StringIO
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Prefetch
+from dashboards.super_admin.api.list_query import ListSpec, export_list_response, list_response
+
+
+def advance_installments(ids):
+    schedule = {}
+    installments = AdvanceInstallment.objects.filter(advance_id__in=ids).order_by(
+        "advance_id", "installment_no"
+    ).values("advance_id", "due_date", "amount", "payslip_deduction", "salary_slip_id")
+    for inst in installments:
+        schedule.setdefault(inst.pop("advance_id"), []).append(inst)
+    return schedule
+
+
+def build_installments(advance, installments):
+    return [
+        AdvanceInstallment(
+            advance=advance,
+            installment_no=idx,
+            due_date=inst.get("due_date"),
+            amount=inst.get("amount"),
+            payslip_deduction=inst.get("payslip_deduction", True)
+        )
+        for idx, inst in enumerate(installments, start=1)
+    ]
+
+
+ADVANCE_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "employee": "employee_id",
+        "employee_name": "employee__name",
+        "date": "date",
+        "branch": "branch_id",
+        "branch_name": "branch__branch_name",
+        "amount": "amount",
+        "purpose": "purpose",
+        "repayment_terms": "repayment_terms",
+        "approver": "approver",
+        "status": "status",
+        "scheduled_amount": "scheduled_amount",
+        "deducted_amount": "deducted_amount",
+        "outstanding_amount": "outstanding_amount",
+    },
+    filters={
+        "employee": "employee_id",
+        "branch": "branch_id",
+        "status": "status__in",
+        "date_from": "date__gte",
+        "date_to": "date__lte",
+        "outstanding_min": "outstanding_amount__gte",
+    },
+    ordering=("date", "created_at", "outstanding_amount"),
+    expanders={"installments": advance_installments},
+    labels={
+        "employee": "Employee ID",
+        "employee_name": "Employee Name",
+        "date": "Date",
+        "branch_name": "Branch",
+        "amount": "Amount",
+        "purpose": "Purpose",
+        "repayment_terms": "Repayment Terms",
+        "approver": "Approver",
+        "scheduled_amount": "Scheduled",
+        "deducted_amount": "Deducted",
+        "outstanding_amount": "Outstanding",
+    },
+    export_name="advance_requests",
+)
 
 class AdvanceAPI(APIView):
     permission_classes = [AllowAny]
@@ -19,7 +86,12 @@ class AdvanceAPI(APIView):
         if pk:
             # Retrieve a specific advance request by its ID
             try:
-                adv = AdvanceRequest.objects.select_related("employee").get(pk=pk)
+                adv = AdvanceRequest.objects.select_related("employee").prefetch_related(
+                    Prefetch(
+                        "installments",
+                        queryset=AdvanceInstallment.objects.order_by("installment_no"),
+                    )
+                ).get(pk=pk)
             except AdvanceRequest.DoesNotExist:
                 return Response({
                     "status": False,
@@ -31,6 +103,7 @@ class AdvanceAPI(APIView):
                     "due_date": inst.due_date,
                     "amount": inst.amount,
                     "payslip_deduction": inst.payslip_deduction,
+                    "salary_slip_id": inst.salary_slip_id,
                 }
                 for inst in adv.installments.all()
             ]
@@ -45,6 +118,9 @@ class AdvanceAPI(APIView):
                 "purpose": adv.purpose,
                 "repayment_terms": adv.repayment_terms,
                 "approver": adv.approver,
+                "scheduled_amount": adv.scheduled_amount,
+                "deducted_amount": adv.deducted_amount,
+                "outstanding_amount": adv.outstanding_amount,
                 "installments": repayment_schedule,
             }
 
@@ -53,36 +129,9 @@ class AdvanceAPI(APIView):
                 "data": data
             })
 
-        # Retrieve all advance requests
-        advances = AdvanceRequest.objects.all().select_related("employee", "branch")
-        data = []
-        for adv in advances:
-            # Build repayment schedule array from related installments
-            repayment_schedule = [
-                {
-                    "due_date": inst.due_date,
-                    "amount": inst.amount,
-                    "payslip_deduction": inst.payslip_deduction,
-                }
-                for inst in adv.installments.all()
-            ]
-            # Append advance data with repayment schedule
-            data.append({
-                "id": adv.id,
-                "employee": adv.employee_id,
-                "employee_name": adv.employee.name,
-                "date": adv.date,
-                "branch": adv.branch_id,
-                "amount": adv.amount,
-                "purpose": adv.purpose,
-                "repayment_terms": adv.repayment_terms,
-                "approver": adv.approver,
-                "installments": repayment_schedule,
-            })
-        return Response({
-            "status": True,
-            "data": data
-        })
+        # Retrieve advance requests page with repayment schedules, balances are
+        # stored columns and the schedules come in one query per page
+        return list_response(request, ADVANCE_LIST, AdvanceRequest.objects.all())
 
     # POST: Create a new advance request and its repayment schedule
     def post(self, request):
@@ -115,26 +164,21 @@ class AdvanceAPI(APIView):
             except (Branch.DoesNotExist, ValueError):
                 return Response({"status": False, "message": "Invalid branch."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create the advance request
-        advance = AdvanceRequest.objects.create(
-            employee=employee,
-            date=date_obj,
-            branch=branch,
-            amount=request.data.get("amount"),
-            purpose=request.data.get("purpose"),
-            repayment_terms=request.data.get("repayment_terms"),
-            approver=request.data.get("approver")
-        )
+        with transaction.atomic():
+            # Create the advance request
+            advance = AdvanceRequest.objects.create(
+                employee=employee,
+                date=date_obj,
+                branch=branch,
+                amount=request.data.get("amount"),
+                purpose=request.data.get("purpose"),
+                repayment_terms=request.data.get("repayment_terms"),
+                approver=request.data.get("approver")
+            )
 
-        # Create related installments from the array
-        installments = request.data.get("installments", [])
-        for idx, inst in enumerate(installments, start=1):
-            AdvanceInstallment.objects.create(
-                advance=advance,
-                installment_no=idx,
-                due_date=inst.get("due_date"),
-                amount=inst.get("amount"),
-                payslip_deduction=inst.get("payslip_deduction", True)
+            # Create related installments from the array (balances synced once)
+            AdvanceInstallment.objects.bulk_create(
+                build_installments(advance, request.data.get("installments", []))
             )
         return Response({"status": True})
 
@@ -150,60 +194,37 @@ class AdvanceAPI(APIView):
                 "message": "Advance request not found."
             })
 
-        # Update fields
-        adv.date = request.data.get("date", adv.date)
-        adv.amount = request.data.get("amount", adv.amount)
-        adv.purpose = request.data.get("purpose", adv.purpose)
-        adv.repayment_terms = request.data.get("repayment_terms", adv.repayment_terms)
-        adv.approver = request.data.get("approver", adv.approver)
-        adv.save()
-
-        # Update installments
-        installments = request.data.get("installments", [])
-        adv.installments.all().delete()  # Clear existing installments
-        for idx, inst in enumerate(installments, start=1):
-            AdvanceInstallment.objects.create(
-                advance=adv,
-                installment_no=idx,
-                due_date=inst.get("due_date"),
-                amount=inst.get("amount"),
-                payslip_deduction=inst.get("payslip_deduction", True)
-            )
+        # deducted installments are history, rebuilding the schedule would drop them
+        if adv.installments.filter(salary_slip__isnull=False).exists():
+            return Response({
+                "status": False,
+                "message": "Installments already deducted on a salary slip, the schedule cannot be replaced."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Update fields
+            adv.date = request.data.get("date", adv.date)
+            adv.amount = request.data.get("amount", adv.amount)
+            adv.purpose = request.data.get("purpose", adv.purpose)
+            adv.repayment_terms = request.data.get("repayment_terms", adv.repayment_terms)
+            adv.approver = request.data.get("approver", adv.approver)
+            adv.save()
+
+            # Update installments
+            installments = request.data.get("installments", [])
+            adv.installments.all().delete()  # Clear existing installments
+            AdvanceInstallment.objects.bulk_create(build_installments(adv, installments))
 
         return Response({"status": True, "message": "Advance request updated successfully."})
 
 class AdvanceCSVAPI(APIView):
     permission_classes = [AllowAny]
 
-    # GET: Retrieve all advance requests formatted for CSV export
+    # GET: Advance requests as a streamed CSV (or ?export=xlsx|jsonl), same filters as the list
     def get(self, request):
-        advances = AdvanceRequest.objects.all().select_related("employee", "branch")
-
-        # Create in-memory buffer
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-
-        # Write header
-        writer.writerow([
-            "Employee ID", "Employee Name", "Date", "Branch",
-            "Amount", "Purpose", "Repayment Terms", "Approver"
-        ])
-
-        # Write data rows
-        for adv in advances:
-            writer.writerow([
-                adv.employee_id,
-                adv.employee.name,
-                adv.date,
-                adv.branch.name if adv.branch else "",
-                adv.amount,
-                adv.purpose,
-                adv.repayment_terms,
-                adv.approver,
-            ])
-
-        # Prepare response
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="advance_requests.csv"'
-        return response
\ No newline at end of file
+        return export_list_response(
+            request,
+            ADVANCE_LIST,
+            AdvanceRequest.objects.all(),
+            export_format=request.query_params.get("export", "csv"),
+        )
@@ -5,11 +5,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from dashboards.super_admin.models.hr import Employee
-from dashboards.super_admin.models.inventory import Asset, AssetDisposal, Category
-from django.db.models import F
+from dashboards.super_admin.models.inventory import Asset, AssetDisposal, Category, DepreciationScheduler
+from django.db.models import Exists, OuterRef
 from datetime import datetime
 import logging
 from django.shortcuts import get_object_or_404
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.depreciation import (
+    DepreciationError,
+    book_values_as_of,
+    run_depreciation,
+)
 
 
 
@@ -40,6 +46,54 @@ def parse_date(value):
     return value
 
 
+ASSET_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "code": "code",
+        "name": "name",
+        "description": "description",
+        "category__id": "category__id",
+        "category__name": "category__name",
+        "purchase_date": "purchase_date",
+        "purchase_value": "purchase_value",
+        "book_value": "current_value",
+        "residual_value": "residual_value",
+        "depreciation_method": "depreciation_method",
+        "location": "location",
+        "assigned_to": "assigned_to_id",
+        "status": "status",
+    },
+    default_fields=[
+        "id", "code", "name", "description", "category__id", "category__name",
+        "purchase_value", "book_value", "status",
+    ],
+    filters={
+        "category_id": "category_id",
+        "status": "status__in",
+        "assigned_to": "assigned_to_id",
+        "purchase_date_from": "purchase_date__gte",
+        "purchase_date_to": "purchase_date__lte",
+    },
+    ordering=("purchase_date", "created_at"),
+    export_name="assets",
+)
+
+
+def asset_list_as_of(as_of):
+    """
+    ASSET_LIST with book_value valued on as_of, once per page
+    """
+    return ListSpec(
+        fields={name: path for name, path in ASSET_LIST.fields.items() if name != "book_value"},
+        filters=ASSET_LIST.filters,
+        ordering=ASSET_LIST.ordering,
+        default_fields=ASSET_LIST.default_fields,
+        expanders={"book_value": lambda ids: book_values_as_of(ids, as_of)},
+        export_name=f"assets_{as_of}",
+        export_expanders=("book_value",),
+    )
+
+
 # =====================================================
 # 🔹 CATEGORY APIs
 # =====================================================
@@ -72,7 +126,7 @@ class CategoryAPI(APIView):
             status=request.data.get("status", "active"),
         )
 
-        logging.info(f"Category created by {request.user.username}: {cat.name} (ID: {cat.id})")
+        logging.info(f"Category created by {request.user.get_username()}: {cat.name} (ID: {cat.id})")
 
         return api_response(
             True, "Category created successfully", {"id": cat.id}
@@ -82,7 +136,7 @@ class CategoryAPI(APIView):
         #write code to delete the entire category
         category = get_object_or_404(Category, pk=pk)
         category.delete(user=request.user)
-        logging.info(f"Category deleted by {request.user.username}: {category.name} (ID: {category.id})")
+        logging.info(f"Category deleted by {request.user.get_username()}: {category.name} (ID: {category.id})")
         return api_response(True, "Category deleted successfully")
 
     def put(self, request, pk):
@@ -111,7 +165,7 @@ class CategoryAPI(APIView):
         category.save()
 
         logging.info(
-            f"Category updated by {request.user.username}: {category.name} (ID: {category.id})"
+            f"Category updated by {request.user.get_username()}: {category.name} (ID: {category.id})"
         )
 
         return api_response(
@@ -134,30 +188,28 @@ class AssetAPI(APIView):
 
     # ---------- LIST ----------
     def get(self, request):
-        category_id = request.query_params.get("category_id")
-
-        qs = Asset.objects.select_related("category").filter(
-            status__in=["active", "maintenance"]
-        )
+        """
+        ?as_of=YYYY-MM-DD -> register as it stood on that date: assets bought
+        by then and not yet disposed, book_value from the nearest snapshot
+        """
+        as_of = request.query_params.get("as_of")
+        if as_of:
+            as_of = parse_date(as_of)
+            if not as_of:
+                return api_response(False, "as_of must be YYYY-MM-DD", code=400)
+
+            qs = Asset.objects.filter(purchase_date__lte=as_of).exclude(
+                Exists(AssetDisposal.objects.filter(asset=OuterRef("pk"), disposal_date__lte=as_of))
+            )
+            return list_response(request, asset_list_as_of(as_of), qs, f"Asset list as of {as_of}")
 
-        if category_id:
-            qs = qs.filter(category_id=category_id)
+        qs = Asset.objects.all()
 
-        data = qs.annotate(
-            book_value=F("current_value")        
-        ).values(
-            "id",
-            "code",
-            "name",
-            "description",
-            "category__id",
-            "category__name",
-            "purchase_value",
-            "book_value",
-            "status",
-        )
+        # live assets unless a status is asked for explicitly
+        if not request.query_params.get("status"):
+            qs = qs.filter(status__in=["active", "maintenance"])
 
-        return api_response(True, "Asset list", list(data))
+        return list_response(request, ASSET_LIST, qs, "Asset list")
 
     # ---------- CREATE ----------
     def post(self, request):
@@ -365,15 +417,60 @@ class AssetDisposalAPI(APIView):
 class DepreciationSchedulerAPI(APIView):
     permission_classes = [IsAuthenticated]
 
+    # ---------- RUNS ----------
+    def get(self, request):
+        runs = DepreciationScheduler.objects.order_by("-period_to").values(
+            "id",
+            "period_from",
+            "period_to",
+            "schedule",
+            "posted_by",
+            "asset_count",
+            "total_depreciation",
+            "created_at",
+        )
+        return api_response(True, "Depreciation runs", list(runs))
+
+    # ---------- POST A PERIOD ----------
     def post(self, request):
-        assets = Asset.objects.filter(status__in=["active", "maintenance"])
-        for asset in assets:
-            asset.calculate_depreciation()
-            asset.save()
+        """
+        {
+          "period_from": "2026-01-01",
+          "period_to": "2026-01-31",
+          "schedule": "monthly",
+          "dry_run": false
+        }
+        """
+        period_from = parse_date(request.data.get("period_from"))
+        period_to = parse_date(request.data.get("period_to"))
+        schedule = request.data.get("schedule", "monthly")
 
-        return Response(
-            {
-                "message": "Depreciation calculation completed for all assets",
-                "status": 200
-            }
-        )
\ No newline at end of file
+        if not period_from or not period_to:
+            return api_response(False, "period_from and period_to (YYYY-MM-DD) are required", code=400)
+
+        if schedule not in dict(DepreciationScheduler.DISPOSAL_CHOICES):
+            return api_response(False, "Invalid schedule value", code=400)
+
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
+
+        try:
+            scheduler, stats = run_depreciation(
+                period_from,
+                period_to,
+                schedule=schedule,
+                posted_by=request.user.get_username(),
+                dry_run=dry_run,
+            )
+        except DepreciationError as exc:
+            return api_response(False, str(exc), code=400)
+
+        logging.info(
+            f"Depreciation {period_from} - {period_to} posted by {request.user.get_username()}: "
+            f"{stats['charged']} assets, {stats['total_depreciation']}"
+        )
+
+        return api_response(
+            True,
+            "Depreciation preview" if dry_run else "Depreciation posted successfully",
+            {"scheduler_id": scheduler.pk, **stats},
+        )
@@ -2,7 +2,41 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.db import transaction
-from dashboards.super_admin.models.hr import Attendance, Employee
+from datetime import date as date_cls
+
+from dashboards.super_admin.models.hr import Attendance, AttendanceMonthlySummary, Employee
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.attendance_marking import (
+    BulkAttendanceError,
+    build_rows,
+    bulk_mark_attendance,
+)
+
+
+ATTENDANCE_LIST = ListSpec(
+    fields={
+        "attendance_id": "id",
+        "employee_id": "employee_id",
+        "employee_name": "employee__name",
+        "department_name": "employee__department__name",
+        "date": "date",
+        "status": "status",
+        "check_in": "check_in",
+        "check_out": "check_out",
+        "note": "note",
+    },
+    filters={
+        "date": "date",
+        "date_from": "date__gte",
+        "date_to": "date__lte",
+        "employee_id": "employee_id",
+        "branch_id": "employee__branch_id",
+        "status": "status__in",
+    },
+    ordering=("date",),
+    default_ordering="-date",
+    export_name="attendance",
+)
 
 
 class AttendanceAPI(APIView):
@@ -163,39 +197,18 @@ class AttendanceAPI(APIView):
 
     def get(self, request):
         """
-        Get details for all attendance records
+        Get attendance records, keyset paginated
         Query Parameters (Optional):
-        - date: Filter attendance records by a specific date (YYYY-MM-DD)
+        - date / date_from / date_to: YYYY-MM-DD
+        - employee_id, branch_id, status (comma separated)
+        - fields, ordering (date / id), page_size, cursor
         """
-
-        date = request.GET.get("date")
-
-        # Filter attendance records by date if provided
-        if date:
-            attendances = Attendance.objects.filter(date=date).select_related('employee', 'employee__department')
-        else:
-            attendances = Attendance.objects.all().select_related('employee', 'employee__department')
-
-        # Prepare the response data
-        data = []
-        for attendance in attendances:
-            data.append({
-                "attendance_id": attendance.id,
-                "employee_id": attendance.employee.id,
-                "employee_name": attendance.employee.name,
-                "department_name": attendance.employee.department.name,
-                "date": attendance.date,
-                "status": attendance.status,
-                "check_in": attendance.check_in,
-                "check_out": attendance.check_out,
-                "note": attendance.note
-            })
-
-        return Response({
-            "status": True,
-            "message": "Attendance records retrieved successfully",
-            "data": data
-        })
+        return list_response(
+            request,
+            ATTENDANCE_LIST,
+            Attendance.objects.all(),
+            "Attendance records retrieved successfully",
+        )
 
     def put(self, request, pk):
         """
@@ -240,4 +253,110 @@ class AttendanceAPI(APIView):
             "data": {
                 "attendance_id": attendance.id
             }
-        })
\ No newline at end of file
+        })
+
+
+class AttendanceBulkAPI(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        """
+        Mark many employees for a day or a date range in one request
+        Expected JSON:
+        {
+          "date_from": "2026-01-01",
+          "date_to": "2026-01-07",
+          "skip_weekdays": [6],
+          "defaults": {"status": "present", "check_in": "09:00:00", "check_out": "18:00:00"},
+          "records": [
+            {"employee_id": 10},
+            {"employee_id": 11, "status": "leave", "note": "Sick"}
+          ]
+        }
+        ("date" instead of the range for a single day, "employee_ids": [..] for defaults only)
+        """
+        try:
+            rows = build_rows(request.data)
+        except BulkAttendanceError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
+
+        results = bulk_mark_attendance(rows)
+        saved = sum(1 for row in results if row["saved"])
+
+        return Response({
+            "status": saved == len(results),
+            "message": f"{saved} of {len(results)} attendance rows saved",
+            "data": results
+        })
+
+
+class AttendanceMatrixAPI(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """
+        Employee x day grid for a month, from AttendanceMonthlySummary
+        Query Parameters:
+        - month: YYYY-MM (required)
+        - branch_id (required)
+
+        Columnar: the i-th entry of every list belongs to the same employee,
+        days[i][d - 1] is the code for day d (see "codes").
+        """
+        try:
+            branch_id = int(request.GET.get("branch_id"))
+        except (TypeError, ValueError):
+            branch_id = None
+        try:
+            month = date_cls.fromisoformat(f"{request.GET.get('month')}-01")
+        except ValueError:
+            month = None
+
+        if not month or not branch_id:
+            return Response({
+                "status": False,
+                "message": "month (YYYY-MM) and a numeric branch_id are required",
+                "data": []
+            }, status=400)
+
+        rows = AttendanceMonthlySummary.objects.filter(
+            month=month, branch_id=branch_id, employee__is_deleted=False
+        ).order_by("employee__name", "employee_id").values_list(
+            "employee_id", "employee__employee_id", "employee__name",
+            "days", "present", "absent", "halfday", "leave",
+        )
+
+        columns = list(zip(*rows)) or [()] * 8
+        employee_ids, employee_codes, names, days, present, absent, halfday, leave = map(list, columns)
+
+        codes = {code: status for status, code in AttendanceMonthlySummary.DAY_CODES.items()}
+        codes[AttendanceMonthlySummary.UNMARKED] = "not_marked"
+
+        return Response({
+            "status": True,
+            "message": "",
+            "data": {
+                "month": f"{month:%Y-%m}",
+                "branch_id": branch_id,
+                "codes": codes,
+                "employee_id": employee_ids,
+                "employee_code": employee_codes,
+                "employee_name": names,
+                "days": days,
+                "present": present,
+                "absent": absent,
+                "halfday": halfday,
+                "leave": leave,
+                "totals": {
+                    "employees": len(employee_ids),
+                    "present": sum(present),
+                    "absent": sum(absent),
+                    "halfday": sum(halfday),
+                    "leave": sum(leave),
+                },
+            }
+        })
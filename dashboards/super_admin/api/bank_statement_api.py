@@ -0,0 +1,195 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from dashboards.branch.models.branch import Branch
+from dashboards.super_admin.models.finance import BankStatement, BankStatementLine
+from dashboards.super_admin.models.gst import Receipt
+from dashboards.super_admin.models.inventory import Expense
+from dashboards.super_admin.api.list_query import ListSpec, list_response, model_fields
+from dashboards.super_admin.services.bank_statement import BankStatementError, import_statement
+
+
+BANK_STATEMENT_LIST = ListSpec(
+    fields=model_fields(BankStatement),
+    filters={
+        "branch": "branch_id",
+        "status": "status__in",
+    },
+    ordering=("started_at",),
+)
+
+
+BANK_STATEMENT_LINE_LIST = ListSpec(
+    fields=model_fields(BankStatementLine),
+    filters={
+        "statement": "statement_id",
+        "status": "status__in",
+        "txn_date_from": "txn_date__gte",
+        "txn_date_to": "txn_date__lte",
+    },
+    # txn_date is NULL on unreadable lines, the cursor keeps them last
+    ordering=("line_no", "txn_date"),
+    export_name="bank_statement_lines",
+)
+
+
+def bad_request(message):
+    return Response({
+        "status": False,
+        "message": message,
+        "data": []
+    }, status=400)
+
+
+def parse_id(value):
+    """
+    Payload id -> int, None when not given; ValueError when not a number
+    """
+    if value in (None, ""):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return int(value)
+
+
+class BankStatementAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, BANK_STATEMENT_LIST, BankStatement.objects.all())
+
+    def post(self, request):
+        """
+        Multipart upload: file=<statement.csv|xlsx>, branch_id (optional),
+        date_window (optional, days, default 3).
+        Matched receipts / expenses are stamped reconciled, the other lines
+        are kept for review under bank-statements/lines.
+        Very large statements go through `manage.py import_bank_statement`.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({
+                "status": False,
+                "message": "file is required",
+                "data": []
+            }, status=400)
+
+        try:
+            date_window = int(request.data.get("date_window", 3))
+        except (TypeError, ValueError):
+            date_window = -1
+        if not 0 <= date_window <= 31:
+            return bad_request("date_window must be 0 to 31 days")
+
+        try:
+            branch_id = parse_id(request.data.get("branch_id"))
+        except (TypeError, ValueError):
+            return bad_request("Invalid branch.")
+        if branch_id is not None and not Branch.objects.filter(pk=branch_id).exists():
+            return bad_request("Invalid branch.")
+
+        try:
+            statement = import_statement(
+                getattr(upload, "file", upload),
+                upload.name,
+                branch_id=branch_id,
+                user=request.user,
+                date_window=date_window,
+            )
+        except BankStatementError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
+
+        return Response({
+            "status": True,
+            "message": "Statement imported successfully",
+            "data": {
+                "statement_id": statement.pk,
+                "lines": statement.lines,
+                "matched_receipts": statement.matched_receipts,
+                "matched_expenses": statement.matched_expenses,
+                "unmatched": statement.unmatched,
+                "errors": statement.errors,
+                "metrics": statement.metrics,
+            }
+        })
+
+
+class BankStatementLineAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, BANK_STATEMENT_LINE_LIST, BankStatementLine.objects.all())
+
+    def put(self, request, pk):
+        """
+        Resolve a reviewed line, optionally against the receipt / expense it pays
+        Expected JSON: {"receipt_id": 12} or {"expense_id": 7} or {"note": "bank charges"}
+        """
+        try:
+            line = BankStatementLine.objects.select_related("statement").get(pk=pk)
+        except BankStatementLine.DoesNotExist:
+            return Response({
+                "status": False,
+                "message": "Statement line not found",
+                "data": []
+            }, status=404)
+
+        try:
+            receipt_id = parse_id(request.data.get("receipt_id"))
+            expense_id = parse_id(request.data.get("expense_id"))
+        except (TypeError, ValueError):
+            return bad_request("receipt_id / expense_id must be a number")
+        if receipt_id and expense_id:
+            return bad_request("Give either receipt_id or expense_id, not both")
+
+        # a receipt pays a credit line, an expense a debit line
+        if receipt_id:
+            model, booked_id, amount_field, line_amount = Receipt, receipt_id, "net_amount", line.credit
+        else:
+            model, booked_id, amount_field, line_amount = Expense, expense_id, "amount", line.debit
+
+        if line.status == "resolved":
+            return bad_request("Statement line already resolved")
+
+        if booked_id:
+            booked = model.objects.filter(pk=booked_id).values(amount_field, "reconciled_at").first()
+            if booked is None or booked["reconciled_at"] is not None:
+                return bad_request(f"{model.__name__} not found or already reconciled")
+            if not line_amount or booked[amount_field] != line_amount:
+                return bad_request(
+                    f"{model.__name__} amount {booked[amount_field]} does not match the line "
+                    f"{'credit' if model is Receipt else 'debit'} {line_amount}"
+                )
+
+        note = str(request.data.get("note") or (f"{model.__name__} {booked_id}" if booked_id else ""))[:255]
+
+        with transaction.atomic():
+            # conditional UPDATEs, a concurrent resolve of the same line / row loses here
+            resolved = BankStatementLine.objects.filter(pk=line.pk).exclude(status="resolved").update(
+                status="resolved", note=note
+            )
+            if not resolved:
+                return bad_request("Statement line already resolved")
+
+            if booked_id:
+                stamped = model.objects.filter(
+                    pk=booked_id, reconciled_at__isnull=True, **{amount_field: line_amount}
+                ).update(reconciled_at=timezone.now(), bank_statement=line.statement)
+                if not stamped:
+                    transaction.set_rollback(True)
+                    return bad_request(f"{model.__name__} not found or already reconciled")
+
+        line.status, line.note = "resolved", note
+
+        return Response({
+            "status": True,
+            "message": "Statement line resolved",
+            "data": {"id": line.pk, "status": line.status, "note": line.note}
+        })
@@ -0,0 +1,100 @@
+from datetime import date
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from dashboards.super_admin.models.gst import BillingRun
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.billing_run import BillingError, run_billing
+
+
+BILLING_RUN_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "branch_id": "branch_id",
+        "period_to": "period_to",
+        "cycles": "cycles",
+        "status": "status",
+        "clients": "clients",
+        "invoices_created": "invoices_created",
+        "skipped": "skipped",
+        "total_sub_total": "total_sub_total",
+        "total_tax": "total_tax",
+        "total_grand": "total_grand",
+        "metrics": "metrics",
+        "error": "error",
+        "started_at": "started_at",
+        "finished_at": "finished_at",
+    },
+    filters={
+        "branch_id": "branch_id",
+        "period_to": "period_to",
+        "status": "status__in",
+    },
+    ordering=("started_at",),
+)
+
+
+class BillingRunAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, BILLING_RUN_LIST, BillingRun.objects.all())
+
+    def post(self, request):
+        """
+        Invoice every client billed by the branch (Clients.billing_branch)
+        whose billing cycle closes with the month
+        Expected JSON:
+        {
+          "branch_id": 3,
+          "month": "2026-03",
+          "dry_run": false
+        }
+        Clients already invoiced for the period are skipped, a run can be repeated.
+        Large runs go through `manage.py run_billing --workers N`.
+        """
+        try:
+            branch_id = int(request.data.get("branch_id"))
+        except (TypeError, ValueError):
+            branch_id = None
+        try:
+            month = date.fromisoformat(f"{request.data.get('month')}-01")
+        except ValueError:
+            month = None
+
+        if not branch_id or not month:
+            return Response({
+                "status": False,
+                "message": "branch_id and month (YYYY-MM) are required",
+                "data": []
+            }, status=400)
+
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
+
+        try:
+            run, invoices = run_billing(branch_id, month, user=request.user, dry_run=dry_run)
+        except BillingError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
+
+        return Response({
+            "status": True,
+            "message": "Billing preview" if dry_run else "Invoices generated successfully",
+            "data": {
+                "run_id": run.pk,
+                "cycles": run.cycles,
+                "clients": run.clients,
+                "invoices_created": run.invoices_created,
+                "skipped": run.skipped,
+                "total_sub_total": run.total_sub_total,
+                "total_tax": run.total_tax,
+                "total_grand": run.total_grand,
+                "metrics": run.metrics,
+                "invoices": invoices,
+            }
+        })
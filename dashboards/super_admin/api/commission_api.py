@@ -0,0 +1,85 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from dashboards.super_admin.models.agent import CommissionRun, CommissionStatement
+from dashboards.super_admin.api.list_query import ListSpec, list_response, model_fields
+from dashboards.super_admin.services.commissions import CommissionError, run_commissions
+
+
+COMMISSION_RUN_LIST = ListSpec(
+    fields=model_fields(CommissionRun),
+    filters={"status": "status__in"},
+    ordering=("started_at",),
+)
+
+
+COMMISSION_STATEMENT_LIST = ListSpec(
+    fields={
+        **model_fields(CommissionStatement),
+        "agent_name": "agent__agent_name",
+    },
+    filters={
+        "agent": "agent_id",
+        "run": "run_id",
+        "is_paid": "is_paid",
+        "created_from": "created_at__date__gte",
+        "created_to": "created_at__date__lte",
+    },
+    ordering=("created_at", "total_commission"),
+    export_name="commission_statements",
+)
+
+
+class CommissionRunAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, COMMISSION_RUN_LIST, CommissionRun.objects.all())
+
+    def post(self, request):
+        """
+        Compute the commissions of every deal that reached its agent's trigger
+        status since the last run and issue the payout statements
+        Expected JSON: {"dry_run": false}
+        """
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
+
+        try:
+            run, statements = run_commissions(user=request.user, dry_run=dry_run)
+        except CommissionError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
+
+        return Response({
+            "status": True,
+            "message": "Commission preview" if dry_run else "Commissions computed successfully",
+            "data": {
+                "run_id": run.pk,
+                "events": run.event_count,
+                "deals_commissioned": run.deals_commissioned,
+                "total_commission": run.total_commission,
+                "rejected": run.rejected,
+                "metrics": run.metrics,
+                "statements": [
+                    {
+                        "id": statement.pk,
+                        "agent_id": statement.agent_id,
+                        "deals": statement.deals,
+                        "total_commission": statement.total_commission,
+                        "payout_to": statement.payout_to,
+                    }
+                    for statement in statements
+                ],
+            }
+        })
+
+
+class CommissionStatementAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, COMMISSION_STATEMENT_LIST, CommissionStatement.objects.all())
@@ -1,10 +1,11 @@
 # dashboards/super_admin/api/deals_api.py
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
 from dashboards.super_admin.api.asset_api import api_response
 from dashboards.super_admin.api.serializers.deal_serializer import DealSerializer
 from dashboards.super_admin.models.agent import Deal
+from dashboards.super_admin.services.deal_transitions import DealTransitionError, transition_deals
 
 
 
@@ -92,3 +93,42 @@ class DealDetailAPI(APIView):
             "Deal deleted successfully",
             {}
         )
+
+
+class DealBulkStatusAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Move many deals to one status, commissions fire for the moved deals
+        Expected JSON: {"deal_ids": [1, 2, 3], "deal_status": "invoiced"}
+        """
+        deal_ids = request.data.get("deal_ids")
+        if not isinstance(deal_ids, list) or not deal_ids:
+            return api_response(False, "deal_ids must be a non empty list", [], 400)
+        try:
+            deal_ids = [int(deal_id) for deal_id in deal_ids]
+        except (TypeError, ValueError):
+            return api_response(False, "deal_ids must be integers", [], 400)
+
+        deal_status = request.data.get("deal_status")
+        if not isinstance(deal_status, str):
+            return api_response(False, "deal_status must be a string", [], 400)
+
+        try:
+            result = transition_deals(deal_ids, deal_status, user=request.user)
+        except DealTransitionError as exc:
+            return api_response(False, str(exc), [], 400)
+
+        run = result["commission_run"]
+        return api_response(
+            True,
+            f"{len(result['applied'])} of {result['requested']} deals updated",
+            {
+                "applied": result["applied"],
+                "rejected": result["rejected"],
+                "commission_run_id": run.pk if run else None,
+                "deals_commissioned": run.deals_commissioned if run else 0,
+                "commission_error": result["commission_error"],
+            }
+        )
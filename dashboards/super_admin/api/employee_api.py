@@ -1,3 +1,7 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
@@ -6,6 +10,36 @@ from rest_framework.parsers import MultiPartParser, FormParser ,JSONParser
 
 from dashboards.super_admin.api.serializers.employee_serializer import EmployeeSerializer
 from dashboards.super_admin.models.hr import Employee
+from dashboards.super_admin.api.list_query import ListSpec, list_response, model_fields
+from dashboards.super_admin.services.employee_photos import (
+    PHOTO_FORMATS,
+    PHOTO_SIZES,
+    derivative_name,
+    photo_url,
+)
+
+
+EMPLOYEE_LIST = ListSpec(
+    fields={
+        **model_fields(Employee, exclude=("is_deleted", "deleted_at")),
+        "department_name": "department__name",
+        "designation_name": "designation__designation_name",
+    },
+    filters={
+        "branch": "branch_id",
+        "department": "department_id",
+        "designation": "designation_id",
+        "status": "status__in",
+        "search": "name__icontains",
+    },
+    ordering=("created_at", "joining_date"),
+    computed={
+        "photo_thumb_url": (
+            ("id", "upload_photo", "photo_etag"),
+            lambda row: photo_url(row["id"], row["photo_etag"]) if row["upload_photo"] else None,
+        ),
+    },
+)
 
 
 
@@ -17,16 +51,7 @@ class EmployeeAPI(APIView):
 
     # ✅ LIST
     def get(self, request):
-        qs = Employee.objects.select_related(
-            "department", "designation", "branch"
-        ).order_by("-id")
-
-        serializer = EmployeeSerializer(qs, many=True)
-        return Response({
-            "status": True,
-            "message": "",
-            "data": serializer.data
-        })
+        return list_response(request, EMPLOYEE_LIST, Employee.objects.all())
 
     # ✅ CREATE
     def post(self, request):
@@ -65,10 +90,12 @@ class EmployeeDetailAPI(APIView):
                 "data": []
             }, status=404)
 
+        context = {"inline_photo": request.query_params.get("inline_photo") in ("1", "true")}
+
         return Response({
             "status": True,
             "message": "",
-            "data": EmployeeSerializer(emp).data
+            "data": EmployeeSerializer(emp, context=context).data
         })
 
     # ✅ UPDATE
@@ -116,3 +143,77 @@ class EmployeeDetailAPI(APIView):
             "message": "Employee deleted successfully",
             "data": []
         })
+
+
+# =====================================================
+# PHOTO (resized derivatives, conditional GET)
+# =====================================================
+def _photo_employee(request, pk):
+    # etag, last-modified and the view share one lookup per request
+    emp = getattr(request, "_photo_employee", None)
+    if emp is not None:
+        return emp
+
+    emp = Employee.objects.filter(pk=pk).only(
+        "id", "upload_photo", "photo_etag", "photo_updated_at"
+    ).first()
+    if not emp or not emp.upload_photo:
+        raise Http404("Photo not found")
+
+    # uploaded before derivatives existed, build them once
+    if not emp.photo_etag:
+        emp.refresh_photo_derivatives()
+
+    request._photo_employee = emp
+    return emp
+
+
+def _photo_etag(request, pk):
+    emp = _photo_employee(request, pk)
+    size = request.GET.get("size", "thumb")
+    return f"{emp.photo_etag}-{size}-{_photo_format(request)}"
+
+
+def _photo_last_modified(request, pk):
+    return _photo_employee(request, pk).photo_updated_at
+
+
+def _photo_format(request):
+    return "webp" if "image/webp" in request.META.get("HTTP_ACCEPT", "") else "jpeg"
+
+
+@method_decorator(condition(etag_func=_photo_etag, last_modified_func=_photo_last_modified), name="get")
+class EmployeePhotoAPI(APIView):
+    """
+    ?size=thumb|medium, WebP when the client accepts it, JPEG otherwise.
+    URLs carrying the current ?v=<etag> are cacheable for a year,
+    If-None-Match / If-Modified-Since get a 304 without touching the file.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        size = request.query_params.get("size", "thumb")
+        if size not in PHOTO_SIZES:
+            return Response({
+                "status": False,
+                "message": f"size must be one of {', '.join(PHOTO_SIZES)}",
+                "data": []
+            }, status=400)
+
+        emp = _photo_employee(request._request, pk)
+        fmt = _photo_format(request)
+        name = derivative_name(emp.upload_photo.name, size, fmt)
+        if not default_storage.exists(name):
+            emp.refresh_photo_derivatives()
+
+        response = FileResponse(
+            default_storage.open(name, "rb"),
+            content_type=PHOTO_FORMATS[fmt][2],
+        )
+        # only a versioned URL names one upload for good, a bare URL revalidates (ETag -> 304)
+        if request.query_params.get("v") == emp.photo_etag[:12]:
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = "public, no-cache"
+        response["Vary"] = "Accept"
+        return response
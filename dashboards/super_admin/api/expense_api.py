@@ -2,6 +2,33 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from dashboards.super_admin.models.inventory import Expense, Category
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+
+
+EXPENSE_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "expense_date": "expense_date",
+        "amount": "amount",
+        "category__id": "category__id",
+        "category__name": "category__name",
+        "status": "status",
+        "branch": "branch_id",
+        "payment_mode": "payment_mode",
+        "reference_no": "reference_no",
+    },
+    default_fields=["id", "expense_date", "amount", "category__id", "category__name", "status"],
+    filters={
+        "branch": "branch_id",
+        "category": "category_id",
+        "status": "status__in",
+        "payment_mode": "payment_mode__in",
+        "expense_date_from": "expense_date__gte",
+        "expense_date_to": "expense_date__lte",
+    },
+    ordering=("expense_date", "created_at"),
+    export_name="expenses",
+)
 
 
 class ExpenseAPI(APIView):
@@ -9,20 +36,7 @@ class ExpenseAPI(APIView):
 
     # 🔹 LIST
     def get(self, request):
-        data = Expense.objects.select_related("category").values(
-            "id",
-            "expense_date",
-            "amount",
-            "category__id",
-            "category__name",
-            "status"
-        )
-
-        return Response({
-            "status": True,
-            "message": "",
-            "data": list(data)
-        })
+        return list_response(request, EXPENSE_LIST, Expense.objects.all())
 
     # 🔹 CREATE
     def post(self, request):
@@ -2,50 +2,41 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from dashboards.super_admin.models.finance import PurchaseOrder, GoodsReceiptNote
-from dashboards.super_admin.models.base import PartyMaster
+from dashboards.super_admin.models.base import PartyMaster, immediate_atomic
 import logging
 from django.shortcuts import get_object_or_404
-from django.db import transaction
-from django.db.models import Max
-from django.utils.timezone import now
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.counters import next_grn_number
+from dashboards.super_admin.services.three_way_match import ThreeWayMatchError, receive_grn
+
+
+GRN_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "grn_number": "grn_number",
+        "received_date": "received_date",
+        "received_by": "received_by",
+        "purchase_order__po_number": "purchase_order__po_number",
+        "related_vehicle": "related_vehicle",
+        "status": "status",
+        "grn_status": "grn_status",
+    },
+    filters={
+        "purchase_order": "purchase_order_id",
+        "status": "status__in",
+        "grn_status": "grn_status__in",
+        "received_from": "received_date__gte",
+        "received_to": "received_date__lte",
+    },
+    ordering=("received_date",),
+)
 
 
-def generate_grn_number():
-    year = now().year
-
-    last_grn = (
-        GoodsReceiptNote.objects
-        .filter(grn_number__startswith=f"GRN-{year}-")
-        .aggregate(Max("grn_number"))
-        .get("grn_number__max")
-    )
-
-    if last_grn:
-        last_number = int(last_grn.split("-")[-1])
-        new_number = last_number + 1
-    else:
-        new_number = 1
-
-    return f"GRN-{year}-{new_number:05d}"
-
 class GRNAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        grn = GoodsReceiptNote.objects.select_related("purchase_order").order_by("-id").values(
-            "id",
-            "grn_number",
-            "received_date",
-            "received_by",
-            "purchase_order__po_number",
-            "related_vehicle",
-            "status",
-            "grn_status",
-        )
-        return Response({
-            "status": True,
-            "data": list(grn)
-        })
+        return list_response(request, GRN_LIST, GoodsReceiptNote.objects.all())
 
     def post(self, request):
         data = request.data
@@ -61,18 +52,23 @@ class GRNAPI(APIView):
                 status=400
             )
 
-        with transaction.atomic():
-            grn_number = generate_grn_number()
-            grn = GoodsReceiptNote.objects.create(
-                purchase_order=purchase_order,
-                grn_number=grn_number,   # ✅ backend generated
-                received_date=data.get("received_date"),
-                received_by=data.get("received_by"),
-                related_vehicle=data.get("related_vehicle"),
-                status=data.get("status"),
-            )
-            purchase_order.status = "received"
-            purchase_order.save()
+        try:
+            with immediate_atomic():
+                grn_number = next_grn_number()
+                grn = GoodsReceiptNote.objects.create(
+                    purchase_order=purchase_order,
+                    grn_number=grn_number,   # ✅ backend generated
+                    received_date=data.get("received_date"),
+                    received_by=data.get("received_by"),
+                    related_vehicle=data.get("related_vehicle"),
+                    status=data.get("status"),
+                )
+                # 🔹 received quantities per PO line, for the three way match
+                receive_grn(grn, data.get("items") or [])
+                purchase_order.status = "received"
+                purchase_order.save()
+        except ThreeWayMatchError as exc:
+            return Response({"status": False, "message": str(exc)}, status=400)
 
         return Response(
             {
@@ -0,0 +1,357 @@
+# dashboards/super_admin/api/list_query.py
+import base64
+import itertools
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.response import Response
+
+from dashboards.super_admin.services.tabular_export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    export_response,
+)
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ListQueryError(Exception):
+    pass
+
+
+def model_fields(model, exclude=()):
+    """
+    {name: name} for every concrete field (FK -> id under the field name,
+    same keys a ModelSerializer with fields="__all__" returns)
+    """
+    return {
+        field.name: field.name
+        for field in model._meta.concrete_fields
+        if field.name not in exclude
+    }
+
+
+class ListSpec:
+    """
+    Declarative list endpoint:
+
+    fields     -> {output name: ORM path} projected with .values()
+    filters    -> {query param: ORM lookup}, "__in" lookups take a comma list
+    ordering   -> fields allowed in ?ordering= (keyset, id breaks ties)
+    expanders  -> {output name: callable(ids) -> {id: nested}}, one query per page
+    computed   -> {output name: (ORM paths, callable(row) -> value)}, no extra query
+    labels     -> {output name: column title} for CSV / XLSX exports
+    export_expanders -> expanders with a flat value, kept in exports
+    export_name-> file name of exports
+
+    Query params: ?fields=a,b  ?ordering=-created_at  ?page_size=50  ?cursor=...
+                  ?export=csv|xlsx|jsonl  (every matching row, streamed)
+    """
+
+    def __init__(
+        self,
+        fields,
+        filters=None,
+        ordering=("id",),
+        default_ordering="-id",
+        default_fields=None,
+        expanders=None,
+        computed=None,
+        labels=None,
+        export_name="export",
+        export_expanders=(),
+    ):
+        self.fields = fields
+        self.filters = filters or {}
+        self.ordering = set(ordering) | {"id"}
+        self.default_ordering = default_ordering
+        self.expanders = expanders or {}
+        self.computed = computed or {}
+        self.labels = labels or {}
+        self.export_name = export_name
+        self.export_expanders = set(export_expanders)
+        self.default_fields = default_fields or [*fields, *self.computed, *self.expanders]
+
+    # -------------------------------------------------
+    # PARAMS
+    # -------------------------------------------------
+    def selected_fields(self, params):
+        raw = params.get("fields")
+        if not raw:
+            return list(self.default_fields)
+
+        selected = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [
+            name for name in selected
+            if name not in self.fields
+            and name not in self.computed
+            and name not in self.expanders
+        ]
+        if unknown:
+            raise ListQueryError(f"Unknown fields: {', '.join(unknown)}")
+        return selected
+
+    def apply_filters(self, queryset, params):
+        """
+        filter() runs each value through its field's to_python / get_prep_value,
+        one param at a time so a bad value is a 400 naming the param.
+        Filters follow forward relations only, chained filter() calls match
+        one filter(**lookups).
+        """
+        for param, lookup in self.filters.items():
+            value = params.get(param)
+            if value in (None, ""):
+                continue
+            if lookup.endswith("__in"):
+                value = [item for item in value.split(",") if item]
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValidationError, ValueError, TypeError):
+                raise ListQueryError(f"Invalid value for {param}")
+        return queryset
+
+    def get_ordering(self, params):
+        ordering = params.get("ordering") or self.default_ordering
+        if ordering.lstrip("-") not in self.ordering:
+            raise ListQueryError(f"Ordering not allowed: {ordering}")
+        return ordering
+
+    def get_page_size(self, params):
+        try:
+            page_size = int(params.get("page_size") or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            raise ListQueryError("page_size must be a number")
+        return max(1, min(page_size, MAX_PAGE_SIZE))
+
+    @staticmethod
+    def nullable(model, name):
+        try:
+            return model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return False
+
+    def order_queryset(self, queryset, ordering):
+        """
+        ordering then pk; a nullable field sorts its NULLs last either way,
+        the cursor relies on it
+        """
+        name = ordering.lstrip("-")
+        descending = ordering.startswith("-")
+        order = ordering
+        if self.nullable(queryset.model, name):
+            order = F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+        return queryset.order_by(order, "-pk" if descending else "pk")
+
+    # -------------------------------------------------
+    # CURSOR
+    # -------------------------------------------------
+    @staticmethod
+    def encode_cursor(ordering, value, pk):
+        # full isoformat, DjangoJSONEncoder drops microseconds and would break ties
+        raw = json.dumps(
+            [ordering, value, pk],
+            default=lambda obj: obj.isoformat() if hasattr(obj, "isoformat") else str(obj),
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def apply_cursor(self, queryset, ordering, cursor):
+        try:
+            cursor_ordering, value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ListQueryError("Invalid cursor")
+
+        if cursor_ordering != ordering:
+            raise ListQueryError("Cursor does not match ordering")
+
+        name = ordering.lstrip("-")
+        op = "lt" if ordering.startswith("-") else "gt"
+
+        if name == "id":
+            return queryset.filter(**{f"pk__{op}": pk})
+
+        nullable = self.nullable(queryset.model, name)
+        if value is None:
+            if not nullable:
+                raise ListQueryError("Invalid cursor")
+            # inside the trailing NULLs, only pk moves on
+            return queryset.filter(**{f"{name}__isnull": True, f"pk__{op}": pk})
+
+        try:
+            value = queryset.model._meta.get_field(name).to_python(value)
+        except (FieldDoesNotExist, ValidationError):
+            raise ListQueryError("Invalid cursor")
+
+        after = Q(**{f"{name}__{op}": value}) | Q(**{name: value, f"pk__{op}": pk})
+        if nullable:
+            after |= Q(**{f"{name}__isnull": True})
+        return queryset.filter(after)
+
+    # -------------------------------------------------
+    # PROJECTION
+    # -------------------------------------------------
+    def paths_for(self, selected):
+        paths = {self.fields[name] for name in selected if name in self.fields}
+        for name in selected:
+            if name in self.computed:
+                paths.update(self.computed[name][0])
+        return paths
+
+    def project(self, row, selected):
+        out = {}
+        for name in selected:
+            if name in self.fields:
+                out[name] = row[self.fields[name]]
+            elif name in self.computed:
+                out[name] = self.computed[name][1](row)
+        return out
+
+    # -------------------------------------------------
+    # RUN
+    # -------------------------------------------------
+    def run(self, request, queryset):
+        """
+        Returns (rows, next_cursor)
+        """
+        params = request.query_params
+        selected = self.selected_fields(params)
+        ordering = self.get_ordering(params)
+        page_size = self.get_page_size(params)
+        order_name = ordering.lstrip("-")
+
+        queryset = self.apply_filters(queryset, params)
+        if params.get("cursor"):
+            queryset = self.apply_cursor(queryset, ordering, params["cursor"])
+
+        queryset = self.order_queryset(queryset, ordering)
+
+        paths = self.paths_for(selected)
+        # keyset + expanders always need these
+        paths |= {"id", order_name}
+
+        try:
+            page = list(queryset.values(*paths)[:page_size + 1])
+        except (ValidationError, ValueError):
+            raise ListQueryError("Invalid filter value")
+
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            next_cursor = self.encode_cursor(ordering, last[order_name], last["id"])
+
+        rows = [self.project(row, selected) for row in page]
+
+        expand = [name for name in selected if name in self.expanders]
+        if expand and rows:
+            ids = [row["id"] for row in page]
+            for name in expand:
+                nested = self.expanders[name](ids)
+                for row, pk in zip(rows, ids):
+                    row[name] = nested.get(pk, [])
+
+        return rows, next_cursor
+
+    def export_rows(self, request, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Same filters / fields / ordering as run() without paging, for exports.
+        Returns (header, rows iterator), rows are streamed with .iterator().
+        Nested expanders are left out, they do not fit a flat row; the
+        export_expanders run once per chunk.
+        """
+        params = request.query_params
+        selected = [
+            name for name in self.selected_fields(params)
+            if name not in self.expanders or name in self.export_expanders
+        ]
+        expand = [name for name in selected if name in self.expanders]
+        ordering = self.get_ordering(params)
+
+        queryset = self.order_queryset(self.apply_filters(queryset, params), ordering)
+        values = queryset.values(*self.paths_for(selected) | {"id"}).iterator(chunk_size=chunk_size)
+
+        # run the query now, a bad filter value must fail before the response starts
+        try:
+            first = next(values, None)
+        except (ValidationError, ValueError):
+            raise ListQueryError("Invalid filter value")
+
+        def rows():
+            if first is None:
+                return
+            source = itertools.chain([first], values)
+            while True:
+                chunk = list(itertools.islice(source, chunk_size))
+                if not chunk:
+                    return
+
+                nested = {}
+                if expand:
+                    ids = [row["id"] for row in chunk]
+                    nested = {name: self.expanders[name](ids) for name in expand}
+
+                for row in chunk:
+                    projected = self.project(row, selected)
+                    for name in expand:
+                        projected[name] = nested[name].get(row["id"])
+                    yield [projected[name] for name in selected]
+
+        return selected, rows()
+
+
+def list_response(request, spec, queryset, message=""):
+    """
+    {status, message, data, next_cursor} envelope around ListSpec.run,
+    ?export= hands over to export_list_response
+    """
+    if request.query_params.get("export"):
+        return export_list_response(request, spec, queryset)
+
+    try:
+        rows, next_cursor = spec.run(request, queryset)
+    except ListQueryError as exc:
+        return Response({
+            "status": False,
+            "message": str(exc),
+            "data": []
+        }, status=400)
+
+    return Response({
+        "status": True,
+        "message": message,
+        "data": rows,
+        "next_cursor": next_cursor,
+    })
+
+
+def export_list_response(request, spec, queryset, export_format=None):
+    """
+    ?export=csv|xlsx|jsonl -> streamed file of every matching row (no paging)
+    """
+    export_format = export_format or request.query_params.get("export")
+    if export_format not in EXPORT_FORMATS:
+        return Response({
+            "status": False,
+            "message": f"export must be one of {', '.join(EXPORT_FORMATS)}",
+            "data": []
+        }, status=400)
+
+    try:
+        header, rows = spec.export_rows(request, queryset)
+    except ListQueryError as exc:
+        return Response({
+            "status": False,
+            "message": str(exc),
+            "data": []
+        }, status=400)
+
+    return export_response(
+        export_format,
+        spec.export_name,
+        header,
+        rows,
+        title=spec.export_name,
+        labels=spec.labels,
+    )
@@ -4,24 +4,36 @@ from rest_framework.permissions import IsAuthenticated
 from dashboards.super_admin.models.base import PartyMaster, Location, Category
 import logging
 from django.shortcuts import get_object_or_404
-
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+
+
+PARTY_MASTER_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "vendor_type": "vendor_type",
+        "name": "name",
+        "contact_person": "contact_person",
+        "category__name": "category__name",
+        "status": "status",
+        "phone": "phone",
+        "email": "email",
+        "gst_number": "gst_number",
+    },
+    default_fields=["id", "vendor_type", "name", "contact_person", "category__name", "status"],
+    filters={
+        "vendor_type": "vendor_type__in",
+        "category": "category_id",
+        "status": "status__in",
+        "search": "name__icontains",
+    },
+    ordering=("name", "created_at"),
+)
 
 class PartyMasterAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        party_masters = PartyMaster.objects.select_related("location", "category").all().values(
-            "id",
-            "vendor_type",
-            "name",
-            "contact_person",
-            "category__name",
-            "status",
-        )
-        return Response({
-            "status": True,
-            "data": list(party_masters)
-        })
+        return list_response(request, PARTY_MASTER_LIST, PartyMaster.objects.all())
 
     def post(self, request):
         data = request.data
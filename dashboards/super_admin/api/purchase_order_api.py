@@ -1,53 +1,51 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from dashboards.super_admin.models.finance import PurchaseOrder, PurchaseOrderItem
-from dashboards.super_admin.models.base import PartyMaster
+from dashboards.super_admin.models.finance import PurchaseOrder
+from dashboards.super_admin.models.base import PartyMaster, immediate_atomic
 import logging
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.utils.timezone import now
-from django.db.models import Max
 
 
-logger = logging.getLogger(__name__)
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.counters import next_po_number
+from dashboards.super_admin.services.purchase_orders import (
+    PurchaseOrderError,
+    save_order_total,
+    write_items,
+)
 
-def generate_po_number():
-    year = now().year
 
-    last_po = (
-        PurchaseOrder.objects
-        .filter(po_number__startswith=f"PO-{year}-")
-        .aggregate(Max("po_number"))
-        .get("po_number__max")
-    )
+logger = logging.getLogger(__name__)
 
-    if last_po:
-        last_number = int(last_po.split("-")[-1])
-        new_number = last_number + 1
-    else:
-        new_number = 1
 
-    return f"PO-{year}-{new_number:05d}"
+PURCHASE_ORDER_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "po_number": "po_number",
+        "po_date": "po_date",
+        "party_master__name": "party_master__name",
+        "amount": "amount",
+        "delivery_date": "delivery_date",
+        "status": "status",
+        "payment_terms": "payment_terms",
+    },
+    filters={
+        "party_master": "party_master_id",
+        "status": "status__in",
+        "po_date_from": "po_date__gte",
+        "po_date_to": "po_date__lte",
+    },
+    ordering=("po_date",),
+    export_name="purchase_orders",
+)
 
 class PurchaseOrderAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        order = PurchaseOrder.objects.select_related("party_master").order_by("-id").values(
-            "id",
-            "po_number",
-            "po_date",
-            "party_master__name",
-            "amount",
-            "delivery_date",
-            "status",
-            "payment_terms",
-        )
-        return Response({
-            "status": True,
-            "data": list(order)
-        })
+        return list_response(request, PURCHASE_ORDER_LIST, PurchaseOrder.objects.all())
 
     def post(self, request):
         data = request.data
@@ -63,32 +61,23 @@ class PurchaseOrderAPI(APIView):
                 {"status": False, "message": "At least one item is required"},
             )
 
-        with transaction.atomic():
-            po_number = generate_po_number()
-            purchase_order = PurchaseOrder.objects.create(
-                party_master=party_master,
-                po_number=po_number,
-                po_date=data.get("po_date"),
-                delivery_date=data.get("delivery_date"),
-                payment_terms=data.get("payment_terms"),
-                status=data.get("status", "draft"),
-                amount=0  # will be updated after items creation
-            )
-
-            total_amount = 0
-
-            for item in items_data:
-                po_item = PurchaseOrderItem.objects.create(
-                    purchase_order=purchase_order,
-                    description=item.get("description"),
-                    quantity=item.get("quantity", 1),
-                    rate=item.get("rate"),
-                    tax=item.get("tax", 0)
+        try:
+            with immediate_atomic():
+                po_number = next_po_number()
+                purchase_order = PurchaseOrder.objects.create(
+                    party_master=party_master,
+                    po_number=po_number,
+                    po_date=data.get("po_date"),
+                    delivery_date=data.get("delivery_date"),
+                    payment_terms=data.get("payment_terms"),
+                    status=data.get("status", "draft"),
+                    amount=0  # will be updated after items creation
                 )
-                total_amount += po_item.amount
 
-            purchase_order.amount = total_amount
-            purchase_order.save()
+                total_amount = write_items(purchase_order, items_data)
+                save_order_total(purchase_order, total_amount)
+        except PurchaseOrderError as exc:
+            return Response({"status": False, "message": str(exc)}, status=400)
 
         return Response(
             {
@@ -186,53 +175,20 @@ class PurchaseOrderActionAPI(APIView):
 
         items_data = data.get("items", [])
 
-        with transaction.atomic():
-            # 🔹 Update Purchase Order fields
-            order.po_number = data.get("po_number", order.po_number)
-            order.po_date = data.get("po_date", order.po_date)
-            order.delivery_date = data.get("delivery_date", order.delivery_date)
-            order.payment_terms = data.get("payment_terms", order.payment_terms)
-            order.status = data.get("status", order.status)
-            order.save()
-
-            existing_items = {item.id: item for item in order.items.all()}
-            received_item_ids = []
-
-            total_amount = 0
-
-            for item in items_data:
-                item_id = item.get("id")
-
-                if item_id and item_id in existing_items:
-                    # 🔁 Update existing item
-                    po_item = existing_items[item_id]
-                    po_item.description = item.get("description", po_item.description)
-                    po_item.quantity = item.get("quantity", po_item.quantity)
-                    po_item.rate = item.get("rate", po_item.rate)
-                    po_item.tax = item.get("tax", po_item.tax)
-                    po_item.save()
-
-                else:
-                    # ➕ Create new item
-                    po_item = PurchaseOrderItem.objects.create(
-                        purchase_order=order,
-                        description=item.get("description"),
-                        quantity=item.get("quantity", 1),
-                        rate=item.get("rate"),
-                        tax=item.get("tax", 0)
-                    )
-
-                received_item_ids.append(po_item.id)
-                total_amount += po_item.amount
-
-            # 🗑️ Delete removed items
-            for item_id, item in existing_items.items():
-                if item_id not in received_item_ids:
-                    item.delete()
-
-            # 🔢 Update total amount
-            order.amount = total_amount
-            order.save()
+        try:
+            with transaction.atomic():
+                # 🔹 Update Purchase Order fields
+                order.po_number = data.get("po_number", order.po_number)
+                order.po_date = data.get("po_date", order.po_date)
+                order.delivery_date = data.get("delivery_date", order.delivery_date)
+                order.payment_terms = data.get("payment_terms", order.payment_terms)
+                order.status = data.get("status", order.status)
+
+                # 🔁 Update / ➕ create / 🗑️ delete items in bulk
+                order.amount = write_items(order, items_data)
+                order.save()
+        except PurchaseOrderError as exc:
+            return Response({"status": False, "message": str(exc)}, status=400)
 
         return Response(
             {
@@ -1,13 +1,57 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
 
 from dashboards.super_admin.api.serializers.quotation_serializer import (
     QuotationSerializer,
     QuotationFollowUpSerializer
 )
-from dashboards.super_admin.models.gst import Quotation
+from django.contrib.contenttypes.models import ContentType
+from dashboards.super_admin.models.gst import Quotation, QuotationItem
+from dashboards.super_admin.models.base import FollowUp
+from dashboards.super_admin.api.list_query import ListSpec, list_response, model_fields
+from dashboards.super_admin.services.gst_invoicing import (
+    InvoicingError,
+    invoice_approved_quotations,
+    parse_id,
+    parse_quotation_ids,
+)
+
+
+def quotation_items(ids):
+    items = {}
+    for item in QuotationItem.objects.filter(quotation_id__in=ids).order_by("id").values(
+        "id", "quotation_id", "description", "quantity", "rate", "amount"
+    ):
+        items.setdefault(item.pop("quotation_id"), []).append(item)
+    return items
+
+
+def quotation_followups(ids):
+    followups = {}
+    for followup in FollowUp.objects.filter(
+        content_type=ContentType.objects.get_for_model(Quotation),
+        object_id__in=ids,
+    ).order_by("id").values(
+        "id", "object_id", "followup_type", "remarks", "next_followup_date", "created_at"
+    ):
+        followups.setdefault(followup["object_id"], []).append(followup)
+    return followups
+
+
+QUOTATION_LIST = ListSpec(
+    fields=model_fields(Quotation, exclude=("is_deleted", "deleted_at")),
+    filters={
+        "clients": "clients_id",
+        "branch": "branch_id",
+        "status": "status__in",
+        "created_from": "created_at__date__gte",
+        "created_to": "created_at__date__lte",
+    },
+    ordering=("created_at",),
+    expanders={"items": quotation_items, "followups": quotation_followups},
+)
 
 
 
@@ -15,14 +59,7 @@ class QuotationAPI(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        qs = Quotation.objects.prefetch_related("items", "followups").order_by("-id")
-        serializer = QuotationSerializer(qs, many=True)
-
-        return Response({
-            "status": True,
-            "message": "",
-            "data": serializer.data
-        })
+        return list_response(request, QUOTATION_LIST, Quotation.objects.all())
 
     def post(self, request):
         serializer = QuotationSerializer(data=request.data)
@@ -132,3 +169,45 @@ class QuotationFollowUpAPI(APIView):
             "data": QuotationFollowUpSerializer(followup).data
         })
 
+
+class QuotationInvoiceBatchAPI(APIView):
+    """
+    Invoice all approved quotations without an invoice in one transaction,
+    optionally narrowed by quotation_ids / branch_id / clients_id
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = request.data
+
+        try:
+            invoices, skipped, stats = invoice_approved_quotations(
+                quotation_ids=parse_quotation_ids(data.get("quotation_ids")),
+                branch_id=parse_id(data.get("branch_id"), "branch_id"),
+                clients_id=parse_id(data.get("clients_id"), "clients_id"),
+                dry_run=str(data.get("dry_run", "")).lower() in ("1", "true"),
+            )
+        except InvoicingError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
+
+        return Response({
+            "status": True,
+            "message": f"{stats['invoiced']} invoice(s) created",
+            "data": {
+                "stats": stats,
+                "skipped": skipped,
+                "invoices": [
+                    {
+                        "quotation_id": invoice.quotation_id,
+                        "invoice_no": invoice.invoice_no,
+                        "sub_total": invoice.sub_total,
+                        "grand_total": invoice.grand_total,
+                    }
+                    for invoice in invoices
+                ],
+            }
+        })
@@ -0,0 +1,162 @@
+from datetime import date
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from dashboards.super_admin.models.base import month_bounds
+from dashboards.super_admin.models.gst import ClientBalanceCheckpoint, ClientLedgerEntry
+from dashboards.super_admin.api.list_query import ListSpec, list_response, model_fields
+from dashboards.super_admin.services.receipt_allocation import allocate_receipts
+from dashboards.super_admin.services.receivables import balances_for
+
+
+LEDGER_LIST = ListSpec(
+    fields=model_fields(ClientLedgerEntry),
+    filters={
+        "clients": "clients_id",
+        "kind": "kind__in",
+        "date_from": "entry_date__gte",
+        "date_to": "entry_date__lte",
+    },
+    ordering=("entry_date",),
+    export_name="client_ledger",
+)
+
+
+AGEING_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "clients_id": "clients_id",
+        "client_code": "clients__client_code",
+        "display_name": "clients__display_name",
+        "month": "month",
+        "balance": "balance",
+        "outstanding": "outstanding",
+        "advance": "advance",
+        "due_0_30": "due_0_30",
+        "due_31_60": "due_31_60",
+        "due_61_90": "due_61_90",
+        "due_90_plus": "due_90_plus",
+    },
+    filters={
+        "clients": "clients_id__in",
+    },
+    ordering=("outstanding", "due_90_plus"),
+    labels={
+        "due_0_30": "0-30 days",
+        "due_31_60": "31-60 days",
+        "due_61_90": "61-90 days",
+        "due_90_plus": "90+ days",
+    },
+    export_name="receivables_ageing",
+)
+
+
+class ClientLedgerAPI(APIView):
+    """
+    Ledger entries with the running balance after each (?clients=<id> for a statement)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, LEDGER_LIST, ClientLedgerEntry.objects.all())
+
+
+class ClientBalanceAPI(APIView):
+    """
+    Current balance / outstanding / advance of clients, ?clients=1,2,3
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            client_ids = [int(value) for value in request.query_params.get("clients", "").split(",") if value]
+        except ValueError:
+            client_ids = []
+
+        if not client_ids:
+            return Response({
+                "status": False,
+                "message": "clients is required",
+                "data": []
+            }, status=400)
+
+        return Response({
+            "status": True,
+            "message": "",
+            "data": [
+                {"clients_id": client_id, **figures}
+                for client_id, figures in balances_for(client_ids).items()
+            ]
+        })
+
+
+class ReceivablesAgeingAPI(APIView):
+    """
+    Ageing buckets of every client at a closed month end, ?month=YYYY-MM
+    (one range scan of the month's checkpoints)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            month = date.fromisoformat(f"{request.query_params.get('month')}-01")
+        except ValueError:
+            return Response({
+                "status": False,
+                "message": "month (YYYY-MM) is required",
+                "data": []
+            }, status=400)
+
+        _, as_of = month_bounds(month)
+        return list_response(
+            request, AGEING_LIST, ClientBalanceCheckpoint.objects.filter(month=as_of)
+        )
+
+
+class ReceiptAllocationAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Allocate receipts against their clients' open invoices, oldest due first
+        Expected JSON:
+        {
+          "receipt_ids": [12, 13],
+          "references": {"12": ["INV/24-25/0007"]},
+          "dry_run": false
+        }
+        Invoices listed under a receipt are paid first. Month end runs over
+        every open receipt go through `manage.py allocate_receipts`.
+        """
+        try:
+            receipt_ids = [int(value) for value in request.data.get("receipt_ids") or []]
+            references = {
+                int(receipt_id): [str(number) for number in numbers]
+                for receipt_id, numbers in (request.data.get("references") or {}).items()
+            }
+        except (TypeError, ValueError, AttributeError):
+            receipt_ids = []
+
+        if not receipt_ids:
+            return Response({
+                "status": False,
+                "message": "receipt_ids must be a list of receipt ids",
+                "data": []
+            }, status=400)
+
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
+        allocations, stats = allocate_receipts(receipt_ids, references, dry_run=dry_run)
+
+        return Response({
+            "status": True,
+            "message": "Allocation preview" if dry_run else "Receipts allocated successfully",
+            "data": {
+                **stats,
+                "allocations": [
+                    {"receipt_id": receipt_id, "invoice_id": invoice_id, "applied_amount": amount}
+                    for receipt_id, _, invoice_id, amount in allocations
+                ],
+            }
+        })
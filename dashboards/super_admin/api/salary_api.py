@@ -1,41 +1,216 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from dashboards.super_admin.models.hr import SalarySlip, Employee, Attendance
+from django.db.models import Count, DateField, ExpressionWrapper, F, JSONField, OuterRef, Q, Subquery
+from django.db.models.functions import JSONObject, TruncMonth
+from datetime import date, timedelta
+from dashboards.super_admin.models.base import month_bounds
+from dashboards.super_admin.models.hr import SalarySlip, Employee, Attendance, PayrollRun
+from dashboards.super_admin.api.list_query import ListSpec, list_response
+from dashboards.super_admin.services.payroll import PayrollError, run_payroll
+
+
+ATTENDANCE_STATUSES = ("present", "halfday", "absent", "leave")
+
+
+def with_attendance_days(salary_slips):
+    """
+    attendance_days = {status: days} in the slip's month, one correlated
+    subquery per slip over a (employee, date) range of the live attendance index
+    """
+    month_first = TruncMonth("salary_date", output_field=DateField())
+    salary_slips = salary_slips.annotate(
+        month_first=month_first,
+        # day 1 + 31 days always lands in the next month
+        month_next=TruncMonth(
+            ExpressionWrapper(month_first + timedelta(days=31), output_field=DateField()),
+            output_field=DateField(),
+        ),
+    )
+    days = Attendance.objects.filter(
+        employee_id=OuterRef("employee_id"),
+        date__gte=OuterRef("month_first"),
+        date__lt=OuterRef("month_next"),
+    ).order_by().values("employee_id").annotate(
+        days=JSONObject(**{
+            status: Count("id", filter=Q(status=status)) for status in ATTENDANCE_STATUSES
+        })
+    ).values("days")[:1]
+    return salary_slips.annotate(attendance_days=Subquery(days, output_field=JSONField()))
+
+
+def days_with(status):
+    return lambda row: (row["attendance_days"] or {}).get(status, 0)
+
+
+SALARY_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "employee_id": "employee_id",
+        "employee_code": "employee__employee_id",
+        "employee_name": "employee__name",
+        "department_name": "employee__department__name",
+        "branch_id": "employee__branch_id",
+        "salary_date": "salary_date",
+        "basic_salary": "employee__basic_salary",
+        "gross_salary": "gross_salary",
+        "basic": "basic",
+        "hra": "hra",
+        "allowance": "allowance",
+        "total_earnings": "total_earnings",
+        "other_salary": "other_salary",
+        "pf": "pf",
+        "esi": "esi",
+        "professional_tax": "professional_tax",
+        "tds": "tds",
+        "leave_deduction": "leave_deduction",
+        "advance_deduction": "advance_deduction",
+        "deductions": "total_deductions",
+        "net_pay": "net_salary",
+    },
+    filters={
+        "employee_id": "employee_id",
+        "branch_id": "employee__branch_id",
+        "department_id": "employee__department_id",
+        "salary_date_from": "salary_date__gte",
+        "salary_date_to": "salary_date__lte",
+    },
+    computed={
+        "present_days": (["attendance_days"], days_with("present")),
+        "halfdays": (["attendance_days"], days_with("halfday")),
+        "absent_days": (["attendance_days"], days_with("absent")),
+        "leave_days": (["attendance_days"], days_with("leave")),
+    },
+    ordering=("salary_date", "created_at"),
+    default_ordering="-salary_date",
+    export_name="payroll_register",
+    default_fields=[
+        "id", "employee_id", "employee_name", "department_name", "salary_date",
+        "basic_salary", "present_days", "other_salary", "deductions", "net_pay",
+    ],
+)
+
 
 class SalaryAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """
-        Fetch salary details for all employees, including:
-        - Employee Name
-        - Base Salary
-        - Present/Absent Days
-        - OT Amount
-        - Deductions
-        - Net Pay
-        - Status
+        Payroll register, keyset paginated
+        Query Parameters (Optional):
+        - month (YYYY-MM), salary_date_from / salary_date_to
+        - branch_id, department_id, employee_id
+        - fields, ordering (salary_date / created_at / id), page_size, cursor
+        - export=csv|xlsx|jsonl -> every matching slip as a streamed file
+        Derived columns (other_salary, attendance days) are computed by the database.
+        """
+        salary_slips = with_attendance_days(SalarySlip.objects.annotate(
+            other_salary=F("total_earnings") - F("employee__basic_salary"),
+        ))
+
+        if request.query_params.get("month"):
+            try:
+                first, last = month_bounds(date.fromisoformat(f"{request.query_params['month']}-01"))
+            except ValueError:
+                return Response({
+                    "status": False,
+                    "message": "month must be YYYY-MM",
+                    "data": []
+                }, status=400)
+            salary_slips = salary_slips.filter(salary_date__range=(first, last))
+
+        return list_response(
+            request,
+            SALARY_LIST,
+            salary_slips,
+            "Salary details fetched successfully",
+        )
+
+
+PAYROLL_RUN_LIST = ListSpec(
+    fields={
+        "id": "id",
+        "branch_id": "branch_id",
+        "month": "month",
+        "status": "status",
+        "employees": "employees",
+        "slips_created": "slips_created",
+        "slips_updated": "slips_updated",
+        "skipped": "skipped",
+        "total_gross": "total_gross",
+        "total_deductions": "total_deductions",
+        "total_net": "total_net",
+        "timings": "timings",
+        "error": "error",
+        "started_at": "started_at",
+        "finished_at": "finished_at",
+    },
+    filters={
+        "branch_id": "branch_id",
+        "month": "month",
+        "status": "status__in",
+    },
+    ordering=("started_at",),
+)
+
+
+class PayrollRunAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return list_response(request, PAYROLL_RUN_LIST, PayrollRun.objects.all())
+
+    def post(self, request):
+        """
+        Generate salary slips for a branch and month
+        Expected JSON:
+        {
+          "branch_id": 3,
+          "month": "2026-01",
+          "dry_run": false
+        }
+        Running a month again recomputes its slips, it never duplicates them.
         """
+        try:
+            branch_id = int(request.data.get("branch_id"))
+        except (TypeError, ValueError):
+            branch_id = None
+        try:
+            month = date.fromisoformat(f"{request.data.get('month')}-01")
+        except ValueError:
+            month = None
+
+        if not branch_id or not month:
+            return Response({
+                "status": False,
+                "message": "branch_id and month (YYYY-MM) are required",
+                "data": []
+            }, status=400)
+
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
 
-        # Fetch all salary slips with related employee data
-        salary_slips = SalarySlip.objects.select_related("employee").all()
-
-        # Prepare the response data
-        data = []
-        for slip in salary_slips:
-            data.append({
-                "employee_id": slip.employee.id,
-                "employee_name": slip.employee.name,
-                "basic_salary": slip.employee.basic_salary,  # Assuming Employee model has a basic_salary field
-                "present_days": slip.total_earnings,  # Replace with actual logic for present days
-                "other_salary": slip.total_earnings-slip.employee.basic_salary,  # Assuming SalarySlip has an overtime field
-                "deductions": slip.total_deductions,
-                "net_pay": slip.net_salary,
-            })
+        try:
+            run, rows = run_payroll(branch_id, month, user=request.user, dry_run=dry_run)
+        except PayrollError as exc:
+            return Response({
+                "status": False,
+                "message": str(exc),
+                "data": []
+            }, status=400)
 
         return Response({
             "status": True,
-            "message": "Salary details fetched successfully",
-            "data": data
+            "message": "Payroll preview" if dry_run else "Payroll generated successfully",
+            "data": {
+                "run_id": run.pk,
+                "employees": run.employees,
+                "slips_created": run.slips_created,
+                "slips_updated": run.slips_updated,
+                "skipped": run.skipped,
+                "total_gross": run.total_gross,
+                "total_deductions": run.total_deductions,
+                "total_net": run.total_net,
+                "timings": run.timings,
+                "slips": rows if dry_run else [],
+            }
         })
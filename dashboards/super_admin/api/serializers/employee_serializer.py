@@ -1,16 +1,19 @@
 from rest_framework import serializers
 from dashboards.super_admin.models.hr import Employee
+from dashboards.super_admin.services.employee_photos import photo_url
 import base64
 
 class EmployeeSerializer(serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     designation_name = serializers.CharField(source='designation.designation_name', read_only=True)
+    photo_thumb_url = serializers.SerializerMethodField()
+    photo_url = serializers.SerializerMethodField()
     upload_photo_binary = serializers.SerializerMethodField()
 
     class Meta:
         model = Employee
         fields = "__all__"
-        extra_fields = ['department_name', 'designation_name', 'upload_photo_binary']
+        extra_fields = ['department_name', 'designation_name', 'photo_thumb_url', 'photo_url', 'upload_photo_binary']
 
     def validate_email(self, value):
         qs = Employee.objects.filter(email=value)
@@ -46,7 +49,20 @@ class EmployeeSerializer(serializers.ModelSerializer):
 
         return data
 
+    def get_photo_thumb_url(self, obj):
+        if not obj.upload_photo:
+            return None
+        return photo_url(obj.pk, obj.photo_etag, "thumb")
+
+    def get_photo_url(self, obj):
+        if not obj.upload_photo:
+            return None
+        return photo_url(obj.pk, obj.photo_etag, "medium")
+
     def get_upload_photo_binary(self, obj):
+        # base64 only on request (detail view ?inline_photo=1), use photo_url otherwise
+        if not self.context.get("inline_photo"):
+            return None
         if obj.upload_photo and hasattr(obj.upload_photo, 'path'):
             try:
                 with open(obj.upload_photo.path, "rb") as f:
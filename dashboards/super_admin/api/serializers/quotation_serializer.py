@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 from dashboards.super_admin.models.gst import Quotation, FollowUp, QuotationItem
+from dashboards.super_admin.services.slab_index import price_for
 
 
 
@@ -9,6 +10,8 @@ class QuotationItemSerializer(serializers.ModelSerializer):
         model = QuotationItem
         fields = ["id", "description", "quantity", "rate", "amount"]
         read_only_fields = ["amount"]
+        # no rate -> priced from the quotation's slab (QuotationSerializer.validate)
+        extra_kwargs = {"rate": {"required": False}}
 
 
 class QuotationFollowUpSerializer(serializers.ModelSerializer):
@@ -33,6 +36,27 @@ class QuotationSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["quotation_no", "sub_total", "grand_total"]
 
+    def validate(self, data):
+        slab = data.get("slab_rate", self.instance.slab_rate if self.instance else None)
+
+        for item in data.get("items") or []:
+            if item.get("rate") is not None:
+                continue
+            if slab is None:
+                raise serializers.ValidationError({
+                    "items": "Rate is required when the quotation has no slab rate"
+                })
+
+            qty = item.get("quantity", 1)
+            price = price_for(slab.billing_mode, qty) if qty else None
+            if price is None:
+                raise serializers.ValidationError({
+                    "items": f"No active {slab.billing_mode} slab for quantity {qty}"
+                })
+            item["rate"] = (Decimal(price) / qty).quantize(Decimal("0.0001"))
+
+        return data
+
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
 
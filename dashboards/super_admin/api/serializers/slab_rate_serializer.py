@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from dashboards.super_admin.models.clients import SlabRate
+from dashboards.super_admin.services.slab_index import tier_conflict
 class SlabRateSerializer(serializers.ModelSerializer):
     class Meta:
         model = SlabRate
@@ -22,6 +23,15 @@ class SlabRateSerializer(serializers.ModelSerializer):
                     "min_qty": "Min & Max quantity required for per duty slip"
                 })
 
+            is_active = data.get("is_active", self.instance.is_active if self.instance else True)
+            if is_active:
+                conflict = tier_conflict(
+                    billing_mode, min_qty, max_qty,
+                    exclude_pk=self.instance.pk if self.instance else None,
+                )
+                if conflict:
+                    raise serializers.ValidationError({"min_qty": conflict})
+
         elif billing_mode == "flat":
             if not months:
                 raise serializers.ValidationError({
@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 
 from dashboards.super_admin.api.serializers.slab_rate_serializer import SlabRateSerializer
 from dashboards.super_admin.models.clients import SlabRate
+from dashboards.super_admin.services.slab_index import slab_index
 
 
 class SlabRateAPI(APIView):
@@ -97,6 +98,8 @@ class SlabRateDetailAPI(APIView):
         try:
             slab = SlabRate.objects.get(pk=pk)
             slab.delete(user=request.user)
+            # soft delete is a queryset UPDATE, no post_delete signal
+            slab_index.invalidate()
         except SlabRate.DoesNotExist:
             return Response({
                 "status": False,
@@ -1,24 +1,29 @@
 from django.urls import path
 from dashboards.super_admin.api.agents_api import AgentDetailAPI, AgentListAPI
-from dashboards.super_admin.api.asset_api import AssetAPI,AssetDetailAPI, CategoryAPI, AssetDisposalAPI
-from dashboards.super_admin.api.attendance_api import AttendanceAPI
+from dashboards.super_admin.api.asset_api import AssetAPI,AssetDetailAPI, CategoryAPI, AssetDisposalAPI, DepreciationSchedulerAPI
+from dashboards.super_admin.api.attendance_api import AttendanceAPI, AttendanceBulkAPI, AttendanceMatrixAPI
 
 
 from dashboards.super_admin.api.department_api import DepartmentAPI, DepartmentDetailAPI
 from dashboards.super_admin.api.designation_api import DesignationAPI, DesignationDetailAPI
-from dashboards.super_admin.api.employee_api import EmployeeAPI, EmployeeDetailAPI 
+from dashboards.super_admin.api.employee_api import EmployeeAPI, EmployeeDetailAPI, EmployeePhotoAPI
 from dashboards.super_admin.api.expense_api import ExpenseAPI
 
-from dashboards.super_admin.api.quotation_api import QuotationAPI, QuotationDetailAPI, QuotationFollowUpAPI
-from dashboards.super_admin.api.salary_api import SalaryAPI
-from dashboards.super_admin.api.deals_api import DealDetailAPI, DealListAPI
+from dashboards.super_admin.api.quotation_api import QuotationAPI, QuotationDetailAPI, QuotationFollowUpAPI, QuotationInvoiceBatchAPI
+from dashboards.super_admin.api.salary_api import SalaryAPI, PayrollRunAPI
+from dashboards.super_admin.api.billing_api import BillingRunAPI
+from dashboards.super_admin.api.receivables_api import ClientBalanceAPI, ClientLedgerAPI, ReceiptAllocationAPI, ReceivablesAgeingAPI
+from dashboards.super_admin.api.deals_api import DealBulkStatusAPI, DealDetailAPI, DealListAPI
+from dashboards.super_admin.api.commission_api import CommissionRunAPI, CommissionStatementAPI
 from dashboards.super_admin.api.sidebar_views import SidebarMenuAPI
 from dashboards.super_admin.api.slab_rate_api import SlabRateAPI, SlabRateDetailAPI
-from dashboards.super_admin.api.advance_api import AdvanceAPI
+from dashboards.super_admin.api.advance_api import AdvanceAPI, AdvanceCSVAPI
 from dashboards.super_admin.api.timezones_api import TimezonesAPI
 from dashboards.super_admin.api.purchase_order_api import PurchaseOrderAPI, PurchaseOrderActionAPI, PurchaseOrderUpdateAPI
 from dashboards.super_admin.api.partymaster_api import PartyMasterAPI, PartyMasterDetailAPI
 from dashboards.super_admin.api.grn import GRNAPI, GRNDetailAPI, GRNActionAPI, PurchaseOrderFetchAPI
+from dashboards.super_admin.api.Bills_Payments_api import BillsPaymentsAPI, BillMatchAPI
+from dashboards.super_admin.api.bank_statement_api import BankStatementAPI, BankStatementLineAPI
 
 from dashboards.users.api.login import LoginAPI
 from dashboards.users.api.logout import LogoutAPI
@@ -48,6 +53,12 @@ urlpatterns = [
     path("quotations", QuotationAPI.as_view()),
     path("quotations/<int:pk>", QuotationDetailAPI.as_view()),
     path("quotations/followups", QuotationFollowUpAPI.as_view()),
+    path("quotations/invoice-approved", QuotationInvoiceBatchAPI.as_view()),
+    path("billing/runs", BillingRunAPI.as_view()),
+    path("receivables/balances", ClientBalanceAPI.as_view()),
+    path("receivables/ledger", ClientLedgerAPI.as_view()),
+    path("receivables/ageing", ReceivablesAgeingAPI.as_view()),
+    path("receivables/allocate", ReceiptAllocationAPI.as_view()),
 
     
 
@@ -66,11 +77,16 @@ urlpatterns = [
 
     path("employees", EmployeeAPI.as_view()),
     path("employees/<int:pk>", EmployeeDetailAPI.as_view()),
+    path("employees/<int:pk>/photo", EmployeePhotoAPI.as_view(), name="employee_photo"),
     path("attendance", AttendanceAPI.as_view()),
+    path("attendance/bulk", AttendanceBulkAPI.as_view()),
+    path("attendance/matrix", AttendanceMatrixAPI.as_view()),
     path("attendance/<int:pk>", AttendanceAPI.as_view()),
     path("salaries", SalaryAPI.as_view()),
+    path("payroll/runs", PayrollRunAPI.as_view()),
     
     path("advances", AdvanceAPI.as_view()),
+    path("advances/export", AdvanceCSVAPI.as_view()),
     path("advances/<int:pk>", AdvanceAPI.as_view()),
     # path("advances")
     path("categories",CategoryAPI.as_view(),name="category_list_create"),
@@ -80,6 +96,7 @@ urlpatterns = [
     path("assets/<int:pk>", AssetDetailAPI.as_view(),name="asset_detail_update_delete"),
 
     path("assets/disposal", AssetDisposalAPI.as_view()),
+    path("assets/depreciation", DepreciationSchedulerAPI.as_view()),
 
    
     path("party-master", PartyMasterAPI.as_view()),
@@ -96,12 +113,23 @@ urlpatterns = [
     path("grn/<int:pk>", GRNDetailAPI.as_view()),
     path("grn/actions/<int:pk>", GRNActionAPI.as_view()),
 
+    path("bills", BillsPaymentsAPI.as_view()),
+    path("bills/match", BillMatchAPI.as_view()),
+
+    path("bank-statements", BankStatementAPI.as_view()),
+    path("bank-statements/lines", BankStatementLineAPI.as_view()),
+    path("bank-statements/lines/<int:pk>", BankStatementLineAPI.as_view()),
+
     # agents
     path("agents/", AgentListAPI.as_view()),
     path("agents/<int:pk>/", AgentDetailAPI.as_view()),
 
     path("deals/", DealListAPI.as_view()),
     path("deals/<int:pk>/", DealDetailAPI.as_view()),
+    path("deals/bulk-status", DealBulkStatusAPI.as_view()),
+
+    path("commissions/runs", CommissionRunAPI.as_view()),
+    path("commissions/statements", CommissionStatementAPI.as_view()),
 
 
 
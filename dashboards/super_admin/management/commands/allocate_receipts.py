@@ -0,0 +1,36 @@
+# dashboards/super_admin/management/commands/allocate_receipts.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.services.receipt_allocation import run_allocation
+
+
+class Command(BaseCommand):
+    help = (
+        "Month end receipt allocation: apply the unallocated amount of every "
+        "invoice / advance receipt to its client's open invoices, oldest due "
+        "first (invoice numbers in reference_no are paid first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--client", type=int, help="Only this client")
+        parser.add_argument("--until", help="Only receipts paid on or before, YYYY-MM-DD")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            until = date.fromisoformat(options["until"]) if options["until"] else None
+        except ValueError:
+            raise CommandError("until must be YYYY-MM-DD")
+
+        stats = run_allocation(clients_id=options["client"], until=until, dry_run=options["dry_run"])
+
+        self.stdout.write(
+            f"{stats['clients']} clients, {stats['receipts']} receipts, "
+            f"{stats['allocations']} allocations for {stats['allocated']}, "
+            f"{stats['invoices_paid']} invoices paid, {stats['left_unallocated']} left unallocated"
+        )
+        self.stdout.write(f"{stats['total_ms']}ms ({stats['receipts_per_s']} receipts/s)")
+        if options["dry_run"]:
+            self.stdout.write("Dry run, nothing written")
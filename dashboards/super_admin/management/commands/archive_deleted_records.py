@@ -0,0 +1,47 @@
+# dashboards/super_admin/management/commands/archive_deleted_records.py
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.services.deleted_record_archive import (
+    CODEC_EXTENSIONS,
+    archive_deleted_records,
+    get_retention_days,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move DeletedRecord backups older than the retention window into compressed "
+        "JSONL segments under MEDIA_ROOT. Meant to run nightly from cron, e.g. "
+        "'30 2 * * * python manage.py archive_deleted_records'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help=f"Retention window in days (default: settings, {get_retention_days()})",
+        )
+        parser.add_argument("--codec", choices=sorted(CODEC_EXTENSIONS), default=None)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the records to archive")
+
+    def handle(self, *args, **options):
+        try:
+            stats = archive_deleted_records(
+                retention_days=options["days"],
+                codec=options["codec"],
+                dry_run=options["dry_run"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{stats['records']} record(s) deleted before {stats['cutoff']:%Y-%m-%d} would be archived"
+            )
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {stats['records']} record(s) in {stats['blocks']} block(s), "
+            f"{stats['bytes']} compressed bytes"
+        ))
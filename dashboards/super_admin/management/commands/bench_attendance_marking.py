@@ -0,0 +1,76 @@
+# dashboards/super_admin/management/commands/bench_attendance_marking.py
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from dashboards.super_admin.models.hr import Employee
+from dashboards.super_admin.services.attendance_marking import (
+    build_rows,
+    bulk_mark_attendance,
+    mark_attendance_single,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark attendance marking: one update_or_create per employee/day "
+        "(AttendanceAPI.post) against the bulk upsert (attendance/bulk). "
+        "Every run is rolled back, no attendance is written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, help="Only employees of this branch")
+        parser.add_argument("--employees", type=int, default=2000, help="Max employees to mark")
+        parser.add_argument("--date", help="First day, YYYY-MM-DD (default today)")
+        parser.add_argument("--days", type=int, default=1)
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.order_by("id")
+        if options["branch"]:
+            employees = employees.filter(branch_id=options["branch"])
+        employee_ids = list(employees.values_list("id", flat=True)[:options["employees"]])
+        if not employee_ids:
+            raise CommandError("No employees to mark")
+
+        first_day = date.fromisoformat(options["date"]) if options["date"] else date.today()
+        payload = {
+            "date_from": first_day.isoformat(),
+            "date_to": (first_day + timedelta(days=options["days"] - 1)).isoformat(),
+            "defaults": {"status": "present", "check_in": "09:00:00", "check_out": "18:00:00"},
+            "employee_ids": employee_ids,
+        }
+
+        self.stdout.write(f"{'path':<8}{'rows':>8}{'queries':>10}{'seconds':>10}{'rows/s':>10}")
+
+        for name, run in (("single", self._single), ("bulk", self._bulk)):
+            rows = build_rows(payload)
+            elapsed, queries = self._measure(run, rows)
+            self.stdout.write(
+                f"{name:<8}{len(rows):>8}{queries:>10}{elapsed:>10.3f}{len(rows) / elapsed:>10.0f}"
+            )
+
+    def _single(self, rows):
+        for row in rows:
+            mark_attendance_single(row)
+
+    def _bulk(self, rows):
+        bulk_mark_attendance(rows)
+
+    def _measure(self, run, rows):
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    began = time.perf_counter()
+                    run(rows)
+                    elapsed = time.perf_counter() - began
+                raise _Rollback
+        except _Rollback:
+            pass
+        return elapsed, len(queries)
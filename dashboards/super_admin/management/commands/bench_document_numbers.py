@@ -0,0 +1,92 @@
+# dashboards/super_admin/management/commands/bench_document_numbers.py
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dashboards.super_admin.models.controll_no import DocumentControl
+from dashboards.super_admin.services.document_sequence import DocumentSequenceAllocator
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency benchmark for document numbering: throughput of the gapless "
+        "(row lock per number) and gapped (block per worker) policies as the "
+        "number of parallel writers grows. The series counter is restored afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("control_id", type=int, help="DocumentControl id to benchmark against")
+        parser.add_argument("--writers", default="1,2,4,8,16", help="Comma separated writer counts")
+        parser.add_argument("--per-writer", type=int, default=200, help="Numbers allocated by each writer")
+        parser.add_argument("--block-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            control = DocumentControl.objects.get(pk=options["control_id"])
+        except DocumentControl.DoesNotExist:
+            raise CommandError("DocumentControl not found")
+
+        writers = [int(n) for n in options["writers"].split(",") if n.strip()]
+        per_writer = options["per_writer"]
+        original_number = control.current_number
+
+        self.stdout.write(f"{'policy':<10}{'writers':>8}{'numbers':>10}{'seconds':>10}{'numbers/s':>12}")
+
+        try:
+            for policy in ("gapless", "gapped"):
+                for count in writers:
+                    allocator = DocumentSequenceAllocator(
+                        block_size=options["block_size"],
+                        policies={control.document_type: policy},
+                    )
+                    elapsed, numbers = self._run(allocator, control, count, per_writer)
+
+                    if len(set(numbers)) != len(numbers):
+                        raise CommandError(f"Duplicate numbers issued ({policy}, {count} writers)")
+
+                    self.stdout.write(
+                        f"{policy:<10}{count:>8}{len(numbers):>10}{elapsed:>10.3f}"
+                        f"{len(numbers) / elapsed:>12.0f}"
+                    )
+        finally:
+            DocumentControl.objects.filter(pk=control.pk).update(current_number=original_number)
+
+    def _run(self, allocator, control, count, per_writer):
+        numbers = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(count + 1)
+
+        def writer():
+            issued = []
+            try:
+                start.wait()
+                for _ in range(per_writer):
+                    issued.append(allocator.next_number(
+                        control.clients_id,
+                        control.document_type,
+                        control.financial_year,
+                    ))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+                with lock:
+                    numbers.extend(issued)
+
+        threads = [threading.Thread(target=writer) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        if errors:
+            raise CommandError(f"{len(errors)} writer(s) failed: {errors[0]}")
+
+        return elapsed, numbers
@@ -0,0 +1,75 @@
+# dashboards/super_admin/management/commands/bench_receipt_allocation.py
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from dashboards.super_admin.services.receipt_allocation import OpenInvoices, allocate
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the FIFO allocation pass on synthetic receipts and invoices "
+        "against a per-receipt rescan of the client's invoices (what one open "
+        "invoice query per receipt amounts to). Touches no database rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=2000)
+        parser.add_argument("--invoices", type=int, default=100000)
+        parser.add_argument("--receipts", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        invoices, receipts = self._synthetic(rng, options["clients"], options["invoices"], options["receipts"])
+
+        book = {client_id: OpenInvoices([list(row) for row in rows]) for client_id, rows in invoices.items()}
+        began = time.perf_counter()
+        allocations, left_over = allocate(receipts, book)
+        fifo = time.perf_counter() - began
+
+        book = {client_id: [list(row) for row in rows] for client_id, rows in invoices.items()}
+        began = time.perf_counter()
+        rescanned = self._rescan(receipts, book)
+        rescan = time.perf_counter() - began
+
+        count = len(receipts)
+        self.stdout.write(f"clients           {options['clients']}")
+        self.stdout.write(f"invoices          {options['invoices']}")
+        self.stdout.write(f"receipts          {count}")
+        self.stdout.write(f"fifo pass         {fifo:.3f}s  ({count / fifo:,.0f} receipts/s)")
+        self.stdout.write(f"rescan per receipt{rescan:>7.3f}s  ({count / rescan:,.0f} receipts/s)")
+        self.stdout.write(f"allocations       {len(allocations)}")
+        self.stdout.write(f"allocated         {sum(row[3] for row in allocations):,.2f}")
+        self.stdout.write(f"left unallocated  {sum(left_over.values()):,.2f}")
+        self.stdout.write(f"same result       {allocations == rescanned}")
+
+    def _synthetic(self, rng, clients, invoice_count, receipt_count):
+        invoices = {}
+        for number in range(invoice_count):
+            client_id = rng.randint(1, clients)
+            invoices.setdefault(client_id, []).append(
+                (number + 1, f"INV{number + 1:07d}", Decimal(rng.randint(500, 50000)))
+            )
+
+        receipts = [
+            (number + 1, rng.randint(1, clients), Decimal(rng.randint(500, 80000)), [])
+            for number in range(receipt_count)
+        ]
+        return invoices, receipts
+
+    def _rescan(self, receipts, book):
+        allocations = []
+        for receipt_id, client_id, amount, _ in receipts:
+            for row in book.get(client_id, []):
+                if amount <= 0:
+                    break
+                if row[2] <= 0:
+                    continue
+                applied = min(amount, row[2])
+                row[2] -= applied
+                amount -= applied
+                allocations.append((receipt_id, client_id, row[0], applied))
+        return allocations
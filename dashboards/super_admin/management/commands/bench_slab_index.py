@@ -0,0 +1,76 @@
+# dashboards/super_admin/management/commands/bench_slab_index.py
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.models.clients import SlabRate
+from dashboards.super_admin.services.slab_index import SlabIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark SlabIndex lookups (bisect over the tier boundaries) against a "
+        "linear scan of the tiers, on synthetic contiguous per_duty_slip tiers of "
+        "growing size. The bisect cost should stay flat. Touches no database rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma separated tier counts")
+        parser.add_argument("--lookups", type=int, default=100000)
+        parser.add_argument("--width", type=int, default=50, help="Quantities per tier")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("sizes must be comma separated integers")
+
+        rng = random.Random(options["seed"])
+        width = options["width"]
+        lookups = options["lookups"]
+
+        self.stdout.write(f"{'tiers':>8}{'bisect ns':>12}{'scan ns':>12}{'speedup':>10}")
+        for size in sizes:
+            tiers = self._tiers(size, width)
+            index = SlabIndex(tiers)
+            quantities = [rng.randint(1, size * width) for _ in range(lookups)]
+
+            began = time.perf_counter()
+            found = [index.tier_for("per_duty_slip", quantity) for quantity in quantities]
+            bisect = (time.perf_counter() - began) / lookups
+
+            # the scan gets slow on big tables, time it on a sample
+            sample = quantities[: max(lookups * 100 // size, 100)]
+            began = time.perf_counter()
+            scanned = [self._scan(tiers, quantity) for quantity in sample]
+            scan = (time.perf_counter() - began) / len(sample)
+
+            if found[: len(scanned)] != scanned:
+                raise CommandError(f"Bisect and scan disagree at {size} tiers")
+
+            self.stdout.write(
+                f"{size:>8}{bisect * 1e9:>12,.0f}{scan * 1e9:>12,.0f}{scan / bisect:>9.1f}x"
+            )
+
+    def _tiers(self, size, width):
+        return [
+            SlabRate(
+                pk=number + 1,
+                slab_name=f"Tier {number + 1}",
+                billing_mode="per_duty_slip",
+                price_type="per_unit",
+                min_qty=number * width + 1,
+                max_qty=(number + 1) * width,
+                amount=Decimal("100.00") - Decimal(number % 50),
+            )
+            for number in range(size)
+        ]
+
+    def _scan(self, tiers, quantity):
+        for slab in tiers:
+            if slab.min_qty <= quantity <= slab.max_qty:
+                return slab
+        return None
@@ -0,0 +1,72 @@
+# dashboards/super_admin/management/commands/match_vendor_bills.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from dashboards.super_admin.models.finance import PurchaseOrderItem
+from dashboards.super_admin.services.three_way_match import run_bill_matching
+
+
+class Command(BaseCommand):
+    help = (
+        "Nightly three way match: match the draft / exception vendor bills of a day "
+        "against open PO lines and their GRN quantities. "
+        "--reconcile compares the received / billed counters with the GRN and bill lines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Bill date, YYYY-MM-DD (default yesterday)")
+        parser.add_argument("--reconcile", action="store_true", help="Check the PO line counters first")
+        parser.add_argument("--fix", action="store_true", help="With --reconcile, rewrite drifted lines")
+
+    def handle(self, *args, **options):
+        if options["reconcile"]:
+            self._reconcile(options["fix"])
+
+        try:
+            bill_date = date.fromisoformat(options["date"]) if options["date"] else date.today() - timedelta(days=1)
+        except ValueError:
+            raise CommandError("date must be YYYY-MM-DD")
+
+        stats = run_bill_matching(bill_date=bill_date)
+
+        self.stdout.write(
+            f"{bill_date}: {stats['bills']} bills, {stats['bills_matched']} matched, "
+            f"{stats['bills_exception']} with exceptions, {stats['lines']} lines, "
+            f"{stats['po_lines_updated']} PO lines billed"
+        )
+        for status, count in sorted(stats["outcomes"].items()):
+            self.stdout.write(f"  {status:<18}{count:>8}")
+        self.stdout.write(
+            ", ".join(f"{name} {stats[name]}ms" for name in ("load_ms", "match_ms", "write_ms", "total_ms"))
+        )
+
+    def _reconcile(self, fix):
+        expected = PurchaseOrderItem.quantity_expressions()
+        drifted = list(
+            PurchaseOrderItem.objects.annotate(
+                expected_received=expected["received_quantity"],
+                expected_billed=expected["billed_quantity"],
+            ).filter(
+                ~Q(received_quantity=expected["received_quantity"])
+                | ~Q(billed_quantity=expected["billed_quantity"])
+            ).order_by("id").values_list(
+                "id", "received_quantity", "expected_received", "billed_quantity", "expected_billed"
+            )
+        )
+
+        for pk, received, expected_received, billed, expected_billed in drifted[:50]:
+            self.stdout.write(
+                f"PO line {pk}: received {received} -> {expected_received}, "
+                f"billed {billed} -> {expected_billed}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All PO line counters match their GRN / bill lines"))
+            return
+
+        self.stdout.write(f"{len(drifted)} PO line(s) out of sync")
+        if fix:
+            PurchaseOrderItem.sync_quantities([row[0] for row in drifted])
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} PO line(s)"))
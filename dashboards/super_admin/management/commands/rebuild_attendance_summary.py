@@ -0,0 +1,37 @@
+# dashboards/super_admin/management/commands/rebuild_attendance_summary.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboards.super_admin.models.base import chunked
+from dashboards.super_admin.models.hr import AttendanceMonthlySummary, Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute AttendanceMonthlySummary from Attendance for the given months. "
+        "Use it to backfill the table or after editing attendance outside the ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("months", nargs="+", help="Months as YYYY-MM")
+        parser.add_argument("--branch", type=int, help="Only employees of this branch")
+
+    def handle(self, *args, **options):
+        try:
+            months = [date.fromisoformat(f"{value}-01") for value in options["months"]]
+        except ValueError:
+            raise CommandError("Months must be YYYY-MM")
+
+        employees = Employee.all_objects.order_by("id")
+        if options["branch"]:
+            employees = employees.filter(branch_id=options["branch"])
+        employee_ids = list(employees.values_list("id", flat=True))
+
+        for month in months:
+            rows = 0
+            with transaction.atomic():
+                for chunk in chunked(employee_ids):
+                    rows += AttendanceMonthlySummary.rebuild(month, employee_ids=chunk)
+            self.stdout.write(f"{month:%Y-%m}: {rows} employee summaries")
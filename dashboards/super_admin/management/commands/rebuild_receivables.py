@@ -0,0 +1,85 @@
+# dashboards/super_admin/management/commands/rebuild_receivables.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.models.gst import ClientBalanceCheckpoint
+from dashboards.super_admin.services.receivables import (
+    balance_drift,
+    checkpoint_drift,
+    close_month,
+    post_adjustments,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify the receivables ledger against the raw invoices, receipts, allocations "
+        "and advance rows: the running ClientBalance of every client and the monthly "
+        "checkpoints. --fix posts adjustment entries for drifted balances and rewrites "
+        "drifted months (run it once after migrating to seed the opening balances). "
+        "--close YYYY-MM writes the checkpoints of a month first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--close", help="Month to close, YYYY-MM")
+        parser.add_argument("--month", help="Only verify this month's checkpoints, YYYY-MM")
+        parser.add_argument("--fix", action="store_true", help="Repair what drifted")
+        parser.add_argument("--limit", type=int, default=50, help="Drifted rows to print")
+
+    def handle(self, *args, **options):
+        if options["close"]:
+            month = self._month(options["close"])
+            written = close_month(month)
+            self.stdout.write(self.style.SUCCESS(f"{month:%Y-%m}: {written} checkpoint(s) written"))
+
+        self._verify_balances(options["fix"], options["limit"])
+
+        if options["month"]:
+            months = [self._month(options["month"])]
+        else:
+            months = list(
+                ClientBalanceCheckpoint.objects.order_by("month").values_list("month", flat=True).distinct()
+            )
+        for month in months:
+            self._verify_month(month, options["fix"], options["limit"])
+
+    def _month(self, value):
+        try:
+            return date.fromisoformat(f"{value}-01")
+        except ValueError:
+            raise CommandError("month must be YYYY-MM")
+
+    def _verify_balances(self, fix, limit):
+        drift = balance_drift()
+
+        for client_id, fields in sorted(drift.items())[:limit]:
+            self.stdout.write(
+                f"client {client_id}: "
+                + ", ".join(f"{name} {running} -> {expected}" for name, (running, expected) in fields.items())
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All running balances match their rows"))
+            return
+
+        self.stdout.write(f"{len(drift)} client balance(s) out of sync")
+        if fix:
+            post_adjustments(drift)
+            self.stdout.write(self.style.SUCCESS(f"Posted {len(drift)} adjustment(s)"))
+
+    def _verify_month(self, month, fix, limit):
+        drift = checkpoint_drift(month)
+
+        for client_id, name, stored, expected in drift[:limit]:
+            self.stdout.write(f"{month:%Y-%m} client {client_id}: {name} {stored} -> {expected}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f"{month:%Y-%m}: checkpoints match their rows"))
+            return
+
+        clients = sorted({row[0] for row in drift})
+        self.stdout.write(f"{month:%Y-%m}: {len(clients)} checkpoint(s) out of sync")
+        if fix:
+            close_month(month, clients)
+            self.stdout.write(self.style.SUCCESS(f"{month:%Y-%m}: rewrote {len(clients)} checkpoint(s)"))
@@ -0,0 +1,51 @@
+# dashboards/super_admin/management/commands/reconcile_advance_balances.py
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from dashboards.super_admin.models.hr import AdvanceRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare AdvanceRequest.scheduled_amount / deducted_amount / outstanding_amount with the sum of "
+        "their live installments and report drift. --fix rewrites the drifted rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Recompute the drifted advances")
+        parser.add_argument("--limit", type=int, default=50, help="Drifted rows to print")
+
+    def handle(self, *args, **options):
+        expected = AdvanceRequest.balance_expressions()
+        drifted = AdvanceRequest.all_objects.annotate(
+            expected_scheduled=expected["scheduled_amount"],
+            expected_deducted=expected["deducted_amount"],
+            expected_outstanding=expected["outstanding_amount"],
+        ).filter(
+            ~Q(scheduled_amount=expected["scheduled_amount"])
+            | ~Q(deducted_amount=expected["deducted_amount"])
+            | ~Q(outstanding_amount=expected["outstanding_amount"])
+        ).order_by("id")
+
+        rows = list(drifted.values_list(
+            "id", "scheduled_amount", "expected_scheduled", "deducted_amount", "expected_deducted",
+            "outstanding_amount", "expected_outstanding",
+        ))
+
+        for (
+            pk, scheduled, expected_scheduled, deducted, expected_deducted, outstanding, expected_outstanding
+        ) in rows[:options["limit"]]:
+            self.stdout.write(
+                f"advance {pk}: scheduled {scheduled} -> {expected_scheduled}, "
+                f"deducted {deducted} -> {expected_deducted}, "
+                f"outstanding {outstanding} -> {expected_outstanding}"
+            )
+
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("All advance balances match their installments"))
+            return
+
+        self.stdout.write(f"{len(rows)} advance(s) out of sync")
+        if options["fix"]:
+            AdvanceRequest.sync_balances([row[0] for row in rows])
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(rows)} advance(s)"))
@@ -0,0 +1,44 @@
+# dashboards/super_admin/management/commands/run_billing.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.services.billing_run import BillingError, run_billing
+
+
+class Command(BaseCommand):
+    help = (
+        "Recurring billing: invoice every client of the branch whose billing cycle "
+        "closes with the month, pricing its usage against the SlabRate tiers. Partitions of "
+        "clients run in a process pool with --workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("branch_id", type=int, help="Issuing branch, bills the clients whose billing_branch it is")
+        parser.add_argument("month", help="YYYY-MM, last month of the billed period")
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--dry-run", action="store_true", help="Price only, write nothing")
+
+    def handle(self, *args, **options):
+        try:
+            month = date.fromisoformat(f"{options['month']}-01")
+        except ValueError:
+            raise CommandError("month must be YYYY-MM")
+
+        try:
+            run, invoices = run_billing(
+                options["branch_id"], month, workers=options["workers"], dry_run=options["dry_run"]
+            )
+        except BillingError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{run.period_to:%Y-%m} ({', '.join(run.cycles)}) branch {options['branch_id']}: "
+            f"{run.clients} clients, {len(invoices)} invoices, {len(run.skipped)} skipped"
+        )
+        self.stdout.write(
+            f"sub total {run.total_sub_total}  tax {run.total_tax}  total {run.total_grand}"
+        )
+        self.stdout.write(", ".join(f"{name} {value}" for name, value in run.metrics.items()))
+        for skip in run.skipped:
+            self.stdout.write(f"  skipped client {skip['clients_id']}: {skip['reason']}")
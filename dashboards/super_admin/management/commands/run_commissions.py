@@ -0,0 +1,35 @@
+# dashboards/super_admin/management/commands/run_commissions.py
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.services.commissions import CommissionError, run_commissions
+
+
+class Command(BaseCommand):
+    help = (
+        "Commission batch: compute the commission of every deal that reached its "
+        "agent's trigger status (DealStatusEvent queue) and write one payout "
+        "statement per agent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Compute only, write nothing")
+
+    def handle(self, *args, **options):
+        try:
+            run, statements = run_commissions(dry_run=options["dry_run"])
+        except CommissionError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{run.event_count} events, {run.deals_commissioned} deals commissioned for "
+            f"{run.total_commission} across {run.agents} agents, {len(run.rejected)} rejected"
+        )
+        for statement in statements:
+            self.stdout.write(
+                f"  agent {statement.agent_id:<8}{statement.deals:>6} deals{statement.total_commission:>14}"
+            )
+        for reject in run.rejected[:50]:
+            self.stdout.write(f"  deal {reject['deal_id']}: {reject['reason']}")
+        self.stdout.write(", ".join(f"{name} {value}ms" for name, value in run.metrics.items()))
+        if options["dry_run"]:
+            self.stdout.write("Dry run, nothing written")
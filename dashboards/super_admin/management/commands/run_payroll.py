@@ -0,0 +1,40 @@
+# dashboards/super_admin/management/commands/run_payroll.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.super_admin.services.payroll import PayrollError, run_payroll
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the salary slips of a branch for a month in one batch. "
+        "Re-running a month recomputes its slips instead of duplicating them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("branch_id", type=int)
+        parser.add_argument("month", help="YYYY-MM")
+        parser.add_argument("--dry-run", action="store_true", help="Compute only, write nothing")
+
+    def handle(self, *args, **options):
+        try:
+            month = date.fromisoformat(f"{options['month']}-01")
+        except ValueError:
+            raise CommandError("month must be YYYY-MM")
+
+        try:
+            run, rows = run_payroll(options["branch_id"], month, dry_run=options["dry_run"])
+        except PayrollError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{month:%Y-%m} branch {options['branch_id']}: {run.employees} employees, "
+            f"{run.slips_created} created, {run.slips_updated} updated, {len(run.skipped)} skipped"
+        )
+        self.stdout.write(
+            f"gross {run.total_gross}  deductions {run.total_deductions}  net {run.total_net}"
+        )
+        self.stdout.write(", ".join(f"{name} {ms}ms" for name, ms in run.timings.items()))
+        for skip in run.skipped:
+            self.stdout.write(f"  skipped employee {skip['employee_id']}: {skip['reason']}")
@@ -0,0 +1,85 @@
+# dashboards/super_admin/management/commands/stress_number_counter.py
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dashboards.super_admin.models.controll_no import NumberCounter
+from dashboards.super_admin.services.counters import take
+
+
+def _allocate(name, per_process, count, start):
+    # runs in a worker process set up by django.setup()
+    while time.time() < start:
+        time.sleep(0.001)
+
+    values = []
+    try:
+        for _ in range(per_process):
+            values.extend(take(name, count))
+    finally:
+        connections.close_all()
+    return values
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress test for services.counters: several processes allocate from one "
+        "counter at the same time, every value must come out exactly once, in "
+        "one gap free run, without a single failed allocation. "
+        "The scratch counter is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--per-process", type=int, default=250, help="Allocations per process")
+        parser.add_argument("--count", type=int, default=1, help="Values reserved per allocation")
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        per_process = options["per_process"]
+        count = options["count"]
+        name = f"stress-{uuid.uuid4().hex[:12]}"
+        expected = processes * per_process * count
+
+        # fresh interpreters, nothing inherited from this process' connection
+        connections.close_all()
+        context = multiprocessing.get_context("spawn")
+
+        try:
+            with ProcessPoolExecutor(processes, mp_context=context, initializer=django.setup) as pool:
+                # let every worker boot before the clock starts
+                start = time.time() + 2 + processes * 0.25
+                futures = [
+                    pool.submit(_allocate, name, per_process, count, start)
+                    for _ in range(processes)
+                ]
+
+                values = []
+                errors = []
+                for future in futures:
+                    try:
+                        values.extend(future.result())
+                    except Exception as exc:
+                        errors.append(exc)
+                elapsed = time.time() - start
+        finally:
+            NumberCounter.objects.filter(name=name).delete()
+
+        if errors:
+            raise CommandError(f"{len(errors)} process(es) failed: {errors[0]}")
+
+        duplicates = len(values) - len(set(values))
+        if duplicates:
+            raise CommandError(f"{duplicates} value(s) issued twice")
+        if sorted(values) != list(range(1, expected + 1)):
+            raise CommandError(f"Expected 1..{expected}, got {len(values)} values with gaps")
+
+        self.stdout.write(
+            f"{processes} processes, {len(values)} values, "
+            f"{elapsed:.3f}s, {len(values) / elapsed:.0f} values/s, no duplicates or gaps"
+        )
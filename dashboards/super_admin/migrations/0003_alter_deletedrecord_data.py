@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deletedrecord',
+            name='data',
+            field=models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+    ]
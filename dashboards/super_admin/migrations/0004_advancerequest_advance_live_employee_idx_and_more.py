@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0003_alter_deletedrecord_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='advancerequest',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['employee', 'status'], name='advance_live_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['status', 'category'], name='asset_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['date', 'employee'], name='attendance_live_date_emp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['employee', 'date'], name='attendance_live_emp_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['branch', 'status'], name='employee_live_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['branch', 'expense_date'], name='expense_live_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['party_master', 'status'], name='po_live_party_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['clients', 'status'], name='quotation_live_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['salary_date'], name='salaryslip_live_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0005_archiveddeletedrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='photo_etag',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='photo_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '__first__'),
+        ('super_admin', '0006_employee_photo_etag_employee_photo_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('days', models.CharField(max_length=31)),
+                ('present', models.PositiveSmallIntegerField(default=0)),
+                ('absent', models.PositiveSmallIntegerField(default=0)),
+                ('halfday', models.PositiveSmallIntegerField(default=0)),
+                ('leave', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_summaries', to='branch.branch')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='super_admin.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'branch'], name='attendance_summary_month_idx')],
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+    ]
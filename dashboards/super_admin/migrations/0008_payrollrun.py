@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '__first__'),
+        ('super_admin', '0007_attendancemonthlysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the payroll month')),
+                ('status', models.CharField(choices=[('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=20)),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('slips_created', models.PositiveIntegerField(default=0)),
+                ('slips_updated', models.PositiveIntegerField(default=0)),
+                ('skipped', models.JSONField(blank=True, default=list, help_text='[{employee_id, reason}]')),
+                ('total_gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_net', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('timings', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payroll_runs', to='branch.branch')),
+                ('run_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payroll_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['branch', 'month'], name='payroll_run_branch_month_idx')],
+            },
+        ),
+    ]
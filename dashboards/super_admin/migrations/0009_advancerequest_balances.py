@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_balances(apps, schema_editor):
+    AdvanceRequest = apps.get_model('super_admin', 'AdvanceRequest')
+    AdvanceInstallment = apps.get_model('super_admin', 'AdvanceInstallment')
+
+    paid = Coalesce(
+        Subquery(
+            AdvanceInstallment.objects.filter(advance_id=OuterRef('pk'), is_deleted=False)
+            .order_by().values('advance_id')
+            .annotate(total=Sum('amount')).values('total')[:1]
+        ),
+        Value(Decimal('0.00')),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
+    AdvanceRequest.objects.update(paid_amount=paid, outstanding_amount=F('amount') - paid)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0008_payrollrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advancerequest',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='advancerequest',
+            name='outstanding_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0009_advancerequest_balances'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='depreciationscheduler',
+            name='asset_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DepreciationLedgerLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('slm', 'Straight Line Method'), ('wdv', 'Written Down Value')], max_length=10)),
+                ('days', models.PositiveIntegerField()),
+                ('opening_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('depreciation', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('closing_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='depreciation_lines', to='super_admin.asset')),
+                ('scheduler', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='super_admin.depreciationscheduler')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'scheduler'], name='depreciation_line_asset_idx')],
+            },
+        ),
+    ]
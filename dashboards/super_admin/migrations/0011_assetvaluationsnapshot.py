@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0010_depreciation_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetValuationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('book_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('accumulated_depreciation', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_snapshots', to='super_admin.asset')),
+                ('scheduler', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='snapshots', to='super_admin.depreciationscheduler')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['as_of'], name='asset_snapshot_as_of_idx')],
+                'unique_together': {('asset', 'as_of')},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-18 17:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0012_numbercounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorderitem',
+            name='sku',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='purchaseorderitem',
+            name='received_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='purchaseorderitem',
+            name='billed_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='GoodsReceiptNoteItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=255)),
+                ('sku', models.CharField(blank=True, default='', max_length=64)),
+                ('quantity', models.PositiveIntegerField()),
+                ('grn', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='super_admin.goodsreceiptnote')),
+                ('po_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receipts', to='super_admin.purchaseorderitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BillDetails',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('bill_number', models.CharField(max_length=100)),
+                ('voucher_number', models.CharField(editable=False, max_length=100, null=True, unique=True)),
+                ('bill_date', models.DateField()),
+                ('total_quantity', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('matched', 'Matched'), ('exception', 'Match Exception')], default='draft', max_length=20)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('party_master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bills', to='super_admin.partymaster')),
+                ('purchase_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bills', to='super_admin.purchaseorder')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(condition=models.Q(('is_deleted', False)), fields=['bill_date', 'status'], name='bill_live_date_status_idx'),
+                    models.Index(condition=models.Q(('is_deleted', False)), fields=['party_master', 'bill_date'], name='bill_live_party_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='BillDetailsItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=255)),
+                ('sku', models.CharField(blank=True, default='', max_length=64)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('match_status', models.CharField(choices=[('pending', 'Pending'), ('matched', 'Matched'), ('quantity_mismatch', 'Quantity Mismatch'), ('price_mismatch', 'Price Mismatch'), ('no_po_line', 'No Open PO Line')], default='pending', max_length=20)),
+                ('match_note', models.CharField(blank=True, default='', max_length=255)),
+                ('bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='super_admin.billdetails')),
+                ('po_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bill_lines', to='super_admin.purchaseorderitem')),
+            ],
+        ),
+    ]
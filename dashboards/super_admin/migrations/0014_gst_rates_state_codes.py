@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+def backfill_state_codes(apps, schema_editor):
+    # same rule as services.gstin.state_code, the first two digits of the GSTIN
+    Clients = apps.get_model('super_admin', 'Clients')
+    changed = []
+    for client in Clients.objects.exclude(gstin__isnull=True).exclude(gstin='').only('id', 'gstin'):
+        code = client.gstin.strip()[:2]
+        if code.isdigit():
+            client.gst_state_code = code
+            changed.append(client)
+    Clients.objects.bulk_update(changed, ['gst_state_code'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0013_three_way_match'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clients',
+            name='gst_state_code',
+            field=models.CharField(blank=True, editable=False, max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='slabrate',
+            name='hsn_code',
+            field=models.CharField(blank=True, default='', help_text='HSN / SAC code', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='slabrate',
+            name='gst_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.RunPython(backfill_state_codes, migrations.RunPython.noop),
+    ]
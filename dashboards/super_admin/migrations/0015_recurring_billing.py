@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '__first__'),
+        ('super_admin', '0014_gst_rates_state_codes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billing_mode', models.CharField(choices=[('per_duty_slip', 'Per Duty Slip'), ('flat', 'Flat'), ('local_sms', 'Local SMS'), ('international_sms', 'International SMS'), ('local_whatsapp', 'Local WhatsApp'), ('international_whatsapp', 'International WhatsApp'), ('e_invoice', 'E-Invoice'), ('email', 'Email')], max_length=30)),
+                ('usage_date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('clients', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='super_admin.clients')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['clients', 'usage_date'], name='client_usage_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_to', models.DateField(help_text='Last day of the billed month')),
+                ('cycles', models.JSONField(default=list, help_text='Billing cycles closing with this month')),
+                ('status', models.CharField(choices=[('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=20)),
+                ('clients', models.PositiveIntegerField(default=0)),
+                ('invoices_created', models.PositiveIntegerField(default=0)),
+                ('skipped', models.JSONField(blank=True, default=list, help_text='[{clients_id, reason}]')),
+                ('total_sub_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_tax', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_grand', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='billing_runs', to='branch.branch')),
+                ('run_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='billing_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['branch', 'period_to'], name='billing_run_branch_period_idx')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='gstinvoice',
+            name='quotation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='gst_invoice', to='super_admin.quotation'),
+        ),
+        migrations.AddField(
+            model_name='gstinvoice',
+            name='billing_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='super_admin.billingrun'),
+        ),
+        migrations.AddField(
+            model_name='gstinvoice',
+            name='period_from',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gstinvoice',
+            name='period_to',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gstinvoice',
+            name='usage',
+            field=models.JSONField(blank=True, default=list, help_text='[{billing_mode, slab_rate_id, quantity, amount}]'),
+        ),
+        migrations.AddIndex(
+            model_name='gstinvoice',
+            index=models.Index(fields=['clients', 'period_from'], name='gst_invoice_client_period_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 19:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0015_recurring_billing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slabrate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0016_slab_rate_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientBalance',
+            fields=[
+                ('clients', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receivable_balance', serialize=False, to='super_admin.clients')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('advance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClientLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_date', models.DateField()),
+                ('kind', models.CharField(choices=[('invoice', 'Invoice'), ('receipt', 'Receipt'), ('allocation', 'Allocation'), ('advance', 'Advance'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('balance_change', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_change', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('advance_change', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('advance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('narration', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('clients', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='super_admin.clients')),
+                ('invoice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='super_admin.gstinvoice')),
+                ('receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='super_admin.receipt')),
+                ('allocation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='super_admin.receiptallocation')),
+                ('advance_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='super_admin.clientadvanceledger')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['entry_date'], name='ledger_date_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClientBalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Last day of the closed month')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('advance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('due_0_30', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('due_31_60', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('due_61_90', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('due_90_plus', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('clients', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='super_admin.clients')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'clients'), name='balance_checkpoint_month_client_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 6.0 on 2026-10-18 20:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '__first__'),
+        ('super_admin', '0017_receivables_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_format', models.CharField(max_length=10)),
+                ('date_window', models.PositiveSmallIntegerField(default=3, help_text='Days a bank date may differ from the book date')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('matched_receipts', models.PositiveIntegerField(default=0)),
+                ('matched_expenses', models.PositiveIntegerField(default=0)),
+                ('unmatched', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bank_statements', to='branch.branch')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_statements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_no', models.PositiveIntegerField()),
+                ('txn_date', models.DateField(blank=True, null=True)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('reference_no', models.CharField(blank=True, default='', max_length=100)),
+                ('narration', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('unmatched', 'Unmatched'), ('error', 'Unreadable'), ('resolved', 'Resolved')], default='unmatched', max_length=20)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('raw', models.JSONField(blank=True, default=list)),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statement_lines', to='super_admin.bankstatement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['statement', 'status'], name='bank_line_statement_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='bank_statement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receipts', to='super_admin.bankstatement'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(condition=models.Q(('reconciled_at__isnull', True)), fields=['payment_date'], name='receipt_unreconciled_idx'),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='bank_statement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='super_admin.bankstatement'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('reconciled_at__isnull', True)), fields=['expense_date'], name='expense_unreconciled_idx'),
+        ),
+    ]
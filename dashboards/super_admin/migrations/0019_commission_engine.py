@@ -0,0 +1,94 @@
+# Generated by Django 6.0 on 2026-10-18 20:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def queue_uncommissioned_deals(apps, schema_editor):
+    # deals already at a trigger status without a commission go to the first batch
+    Deal = apps.get_model('super_admin', 'Deal')
+    DealStatusEvent = apps.get_model('super_admin', 'DealStatusEvent')
+    DealStatusEvent.objects.bulk_create(
+        [
+            DealStatusEvent(deal_id=deal_id, from_status='', to_status=status)
+            for deal_id, status in Deal.objects.filter(
+                agent__isnull=False,
+                commission_calculated=False,
+                deal_status__in=['converted', 'payment_received'],
+            ).values_list('id', 'deal_status')
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0018_bank_statements'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommissionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=20)),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('deals_commissioned', models.PositiveIntegerField(default=0)),
+                ('agents', models.PositiveIntegerField(default=0)),
+                ('total_commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rejected', models.JSONField(blank=True, default=list, help_text='[{deal_id, agent_id, reason}]')),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='commission_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DealStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, default='', max_length=30)),
+                ('to_status', models.CharField(choices=[('lead', 'Lead'), ('converted', 'Converted'), ('invoiced', 'Invoiced'), ('payment_received', 'Payment Received'), ('cancelled', 'Cancelled')], max_length=30)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deal_status_events', to=settings.AUTH_USER_MODEL)),
+                ('commission_run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='super_admin.commissionrun')),
+                ('deal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='super_admin.deal')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['to_status', 'id'], name='deal_event_pending_idx'),
+                    models.Index(fields=['deal', 'id'], name='deal_event_deal_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='CommissionStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deals', models.PositiveIntegerField(default=0)),
+                ('deal_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('lines', models.JSONField(blank=True, default=list, help_text='[{deal_id, client_id, deal_value, trigger, commission}]')),
+                ('payment_mode', models.CharField(blank=True, max_length=20, null=True)),
+                ('payout_to', models.CharField(blank=True, default='', max_length=150)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='commission_statements', to='super_admin.agent')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='super_admin.commissionrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['agent', 'created_at'], name='commission_stmt_agent_idx')],
+                'unique_together': {('run', 'agent')},
+            },
+        ),
+        migrations.RunPython(queue_uncommissioned_deals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 21:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '__first__'),
+        ('super_admin', '0019_commission_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clients',
+            name='billing_branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='billed_clients', to='branch.branch'),
+        ),
+        migrations.AddConstraint(
+            model_name='gstinvoice',
+            constraint=models.UniqueConstraint(condition=models.Q(('billing_run__isnull', False), ('is_deleted', False)), fields=('clients', 'period_to'), name='gst_invoice_run_period_uniq'),
+        ),
+    ]
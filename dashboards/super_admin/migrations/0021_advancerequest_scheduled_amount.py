@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 21:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0020_billing_scope'),
+    ]
+
+    operations = [
+        # the column sums every scheduled installment, installments carry no paid flag
+        migrations.RenameField(
+            model_name='advancerequest',
+            old_name='paid_amount',
+            new_name='scheduled_amount',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0021_advancerequest_scheduled_amount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentcontrol',
+            name='document_type',
+            field=models.CharField(choices=[('invoice', 'Invoice'), ('quotation', 'Quotation'), ('receipt', 'Receipt'), ('dutySlip', 'Duty Slip'), ('creditNote', 'Credit Note'), ('debitNote', 'Debit Note'), ('booking', 'Booking'), ('payment', 'Payment'), ('payout', 'Payout'), ('purchaseOrder', 'Purchase Order'), ('perfomaInvoice', 'Performa Invoice')], max_length=50),
+        ),
+    ]
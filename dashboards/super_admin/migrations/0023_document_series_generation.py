@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0022_vendor_bill_numbering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentcontrol',
+            name='series_generation',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
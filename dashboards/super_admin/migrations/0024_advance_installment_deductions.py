@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 23:10
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_outstanding(apps, schema_editor):
+    # nothing is deducted yet, outstanding now counts what is not deducted
+    AdvanceRequest = apps.get_model('super_admin', 'AdvanceRequest')
+    AdvanceRequest.objects.update(outstanding_amount=F('amount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin', '0023_document_series_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advanceinstallment',
+            name='salary_slip',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='advance_installments', to='super_admin.salaryslip'),
+        ),
+        migrations.AddField(
+            model_name='advancerequest',
+            name='deducted_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_outstanding, migrations.RunPython.noop),
+    ]
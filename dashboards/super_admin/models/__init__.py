@@ -1,7 +1,8 @@
-from .agent import Agent, Deal, ClientsAgent
+from .agent import Agent, Deal, ClientsAgent, DealStatusEvent, CommissionRun, CommissionStatement
 from .hr import *
 from .finance import *
 from .inventory import *
 from .clients import *
 from .gst import *
 from .base import *
+from .controll_no import DocumentControl, NumberCounter
@@ -1,6 +1,8 @@
 # agent.py
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.contrib.contenttypes.fields import GenericRelation
 
@@ -195,6 +197,14 @@ class Deal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        deal = super().from_db(db, field_names, values)
+        # status as loaded, the status flow is checked against it without a query
+        if "deal_status" in field_names:
+            deal._loaded_status = values[field_names.index("deal_status")]
+        return deal
+
     # --------------------
     # VALIDATION
     # --------------------
@@ -203,11 +213,11 @@ class Deal(models.Model):
         if self.deal_value <= 0:
             raise ValidationError({"deal_value": "Deal value must be greater than zero."})
 
-        if self.pk:
-            previous = Deal.objects.get(pk=self.pk)
-            if self.deal_status not in self.STATUS_FLOW.get(previous.deal_status, []):
+        previous = getattr(self, "_loaded_status", None)
+        if self.pk and previous and previous != self.deal_status:
+            if self.deal_status not in self.STATUS_FLOW.get(previous, []):
                 raise ValidationError(
-                    f"Cannot change status from {previous.get_deal_status_display()} "
+                    f"Cannot change status from {dict(self.DEAL_STATUS_CHOICES).get(previous, previous)} "
                     f"to {self.get_deal_status_display()}"
                 )
 
@@ -232,28 +242,18 @@ class Deal(models.Model):
         return 0
 
     def save(self, *args, **kwargs):
+        # commissions are computed in batches from the status events (services/commissions.py)
         self.full_clean()  # 🔥 important
 
-        previous = Deal.objects.get(pk=self.pk) if self.pk else None
-
-        # Commission only on valid status change
-        if (
-            self.agent
-            and not self.commission_calculated
-            and previous
-            and previous.deal_status != self.deal_status
-        ):
-            if (
-                self.agent.commission_trigger == "deal_closure"
-                and self.deal_status == "converted"
-            ) or (
-                self.agent.commission_trigger == "on_payment_received"
-                and self.deal_status == "payment_received"
-            ):
-                self.commission_amount = self.calculate_commission()
-                self.commission_calculated = True
+        previous = getattr(self, "_loaded_status", None) if self.pk else None
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous != self.deal_status:
+                DealStatusEvent.objects.create(
+                    deal=self, from_status=previous or "", to_status=self.deal_status
+                )
+        self._loaded_status = self.deal_status
 
     def __str__(self):
         return f"Deal #{self.id} - ₹{self.deal_value}"
@@ -281,3 +281,89 @@ class ClientsAgent(models.Model):
 
     def __str__(self):
         return f"{self.agent} → {self.client}"
+
+
+class DealStatusEvent(models.Model):
+    """
+    One status change of a deal. Events not yet processed are the queue
+    of the commission batch job (services/commissions.py).
+    """
+    deal = models.ForeignKey(Deal, on_delete=models.CASCADE, related_name="status_events")
+    from_status = models.CharField(max_length=30, blank=True, default="")
+    to_status = models.CharField(max_length=30, choices=Deal.DEAL_STATUS_CHOICES)
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="deal_status_events")
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    processed_at = models.DateTimeField(null=True, blank=True)
+    commission_run = models.ForeignKey("CommissionRun", on_delete=models.SET_NULL, null=True, blank=True, related_name="events")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["to_status", "id"], name="deal_event_pending_idx", condition=Q(processed_at__isnull=True)),
+            models.Index(fields=["deal", "id"], name="deal_event_deal_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deal #{self.deal_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class CommissionRun(models.Model):
+    """
+    One commission batch (services/commissions.py) over the pending status events
+    """
+
+    STATUS_CHOICES = [
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="completed")
+    run_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="commission_runs")
+
+    event_count = models.PositiveIntegerField(default=0)
+    deals_commissioned = models.PositiveIntegerField(default=0)
+    agents = models.PositiveIntegerField(default=0)
+    total_commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rejected = models.JSONField(default=list, blank=True, help_text="[{deal_id, agent_id, reason}]")
+
+    # milliseconds per phase: load / compute / write / total
+    metrics = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"Commission run {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class CommissionStatement(models.Model):
+    """
+    Payout statement of one agent for one commission run
+    """
+    run = models.ForeignKey(CommissionRun, on_delete=models.CASCADE, related_name="statements")
+    agent = models.ForeignKey(Agent, on_delete=models.PROTECT, related_name="commission_statements")
+    deals = models.PositiveIntegerField(default=0)
+    deal_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    lines = models.JSONField(default=list, blank=True, help_text="[{deal_id, client_id, deal_value, trigger, commission}]")
+
+    # payout details as they were when the statement was made
+    payment_mode = models.CharField(max_length=20, blank=True, null=True)
+    payout_to = models.CharField(max_length=150, blank=True, default="")
+
+    is_paid = models.BooleanField(default=False)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("run", "agent")
+        indexes = [
+            models.Index(fields=["agent", "created_at"], name="commission_stmt_agent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id} - {self.total_commission}"
@@ -1,7 +1,11 @@
-from django.db import models
+from calendar import monthrange
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from django.forms.models import model_to_dict
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.auth import get_user_model
 
@@ -9,31 +13,250 @@ from config import settings
 
 User = get_user_model()
 
-class SoftDeleteQuerySet(models.QuerySet):
-    def delete(self, user=None):
-        for obj in self:
-            obj.delete(user=user)
-    
-    def hard_delete(self):
-        for obj in self:
-            obj.hard_delete()
+# rows per UPDATE / bulk_create / pk__in chunk (SQLite variable limit safe)
+SOFT_DELETE_BATCH_SIZE = 500
+
+
+def chunked(values, size=SOFT_DELETE_BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def month_bounds(month):
+    """
+    (first day, last day) of the month holding the date month
+    """
+    first = month.replace(day=1)
+    return first, first.replace(day=monthrange(first.year, first.month)[1])
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic() that opens with BEGIN IMMEDIATE on SQLite, so the
+    write lock is taken up front instead of on the first write. Only the
+    outermost block can choose, nested in a caller's transaction this is a
+    plain savepoint: a caller that reads before it allocates a number (or
+    writes at all) opens its own transaction with immediate_atomic(), a
+    deferred one fails its lock upgrade at once under a concurrent writer.
+    Other backends lock rows themselves, plain atomic().
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN has run, later transactions stay deferred
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
+
+
+def generic_children(model):
+    """
+    GenericRelation fields whose related model is soft deletable (Location, FollowUp ...)
+    """
+    return [
+        field for field in model._meta.private_fields
+        if isinstance(field, GenericRelation)
+        and issubclass(field.related_model, SoftDeleteModel)
+    ]
 
 
+def generic_children_queryset(field, model, pks):
+    ct = ContentType.objects.get_for_model(model, for_concrete_model=field.for_concrete_model)
+    return field.related_model.all_objects.filter(**{
+        field.content_type_field_name: ct,
+        f"{field.object_id_field_name}__in": pks,
+    })
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    Set based soft delete / restore.
+    One .values() read for the backup, bulk_create for DeletedRecord and
+    one UPDATE per batch, GenericRelation children follow in batches.
+    Each call runs in one transaction, backups and flags move together.
+    """
+
+    def _concrete_fields(self):
+        return list(self.model._meta.concrete_fields)
+
+    @transaction.atomic
+    def delete(self, user=None, deleted_at=None):
+        """
+        Soft delete, returns (count, {model label: count}) like QuerySet.delete
+        """
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+
+        fields = self._concrete_fields()
+        pk_name = self.model._meta.pk.attname
+        rows = list(
+            self.filter(is_deleted=False).order_by().values(*[f.attname for f in fields])
+        )
+        if not rows:
+            return 0, {}
+
+        deleted_at = deleted_at or timezone.now()
+        content_type = ContentType.objects.get_for_model(self.model)
+        model_name = self.model.__name__
+        pks = [row[pk_name] for row in rows]
+
+        DeletedRecord.objects.bulk_create(
+            [
+                DeletedRecord(
+                    content_type=content_type,
+                    object_id=row[pk_name],
+                    model_name=model_name,
+                    # same keys as model_to_dict (field name, FK as id)
+                    data={field.name: row[field.attname] for field in fields},
+                    deleted_by=user,
+                )
+                for row in rows
+            ],
+            batch_size=SOFT_DELETE_BATCH_SIZE,
+        )
+
+        for chunk in chunked(pks):
+            self.model.all_objects.filter(pk__in=chunk).update(
+                is_deleted=True, deleted_at=deleted_at
+            )
+
+        per_model = {self.model._meta.label: len(rows)}
+        for field in generic_children(self.model):
+            for chunk in chunked(pks):
+                _, children = generic_children_queryset(field, self.model, chunk).delete(
+                    user=user, deleted_at=deleted_at
+                )
+                for label, count in children.items():
+                    per_model[label] = per_model.get(label, 0) + count
+
+        return sum(per_model.values()), per_model
+
+    @transaction.atomic
+    def restore(self):
+        """
+        Bring soft deleted rows back from their latest DeletedRecord backup.
+        Call it on all_objects, the default manager hides deleted rows.
+        """
+        rows = list(self.filter(is_deleted=True).order_by().values_list("pk", "deleted_at"))
+        if not rows:
+            return 0
+
+        pks = [pk for pk, _ in rows]
+        # children deleted together with their parent share its deleted_at
+        cascaded_at = {deleted_at for _, deleted_at in rows if deleted_at}
+
+        content_type = ContentType.objects.get_for_model(self.model)
+        fields = {
+            field.name: field for field in self._concrete_fields()
+            if not field.primary_key and field.name not in ("is_deleted", "deleted_at")
+        }
+
+        for chunk in chunked(pks):
+            backups = {}
+            records = DeletedRecord.objects.filter(
+                content_type=content_type, object_id__in=chunk
+            ).order_by("object_id", "-deleted_at", "-id").values_list("object_id", "data")
+            for object_id, data in records:
+                backups.setdefault(object_id, data)
+
+            archived = [pk for pk in chunk if pk not in backups]
+            if archived:
+                from dashboards.super_admin.services.deleted_record_archive import load_archived_backups
+                backups.update(load_archived_backups(content_type, archived))
+
+            # each row from its own backup keys, a backup older than a
+            # schema change restores what it has and leaves newer columns
+            by_keys = {}
+            missing = []
+            for pk in chunk:
+                data = backups.get(pk)
+                if data is None:
+                    missing.append(pk)
+                    continue
+
+                restored_fields = frozenset(fields) & set(data)
+                obj = self.model(pk=pk, is_deleted=False, deleted_at=None)
+                for name in restored_fields:
+                    field = fields[name]
+                    setattr(obj, field.attname, field.to_python(data[name]))
+                by_keys.setdefault(restored_fields, []).append(obj)
+
+            # no backup left -> only the flags can be restored
+            if missing:
+                self.model.all_objects.filter(pk__in=missing).update(
+                    is_deleted=False, deleted_at=None
+                )
+
+            for restored_fields, objs in by_keys.items():
+                self.model.all_objects.bulk_update(
+                    objs,
+                    ["is_deleted", "deleted_at", *sorted(restored_fields)],
+                    batch_size=SOFT_DELETE_BATCH_SIZE,
+                )
+
+            DeletedRecord.objects.filter(
+                content_type=content_type, object_id__in=chunk
+            ).delete()
+            ArchivedDeletedRecord.objects.filter(
+                content_type=content_type, object_id__in=chunk
+            ).delete()
+
+            for field in generic_children(self.model):
+                generic_children_queryset(field, self.model, chunk).filter(
+                    deleted_at__in=cascaded_at
+                ).restore()
+
+        return len(pks)
+
+    @transaction.atomic
+    def hard_delete(self):
+        pks = list(self.order_by().values_list("pk", flat=True))
+        if not pks:
+            return 0
+
+        content_type = ContentType.objects.get_for_model(self.model)
+        for chunk in chunked(pks):
+            for field in generic_children(self.model):
+                generic_children_queryset(field, self.model, chunk).hard_delete()
+            DeletedRecord.objects.filter(
+                content_type=content_type, object_id__in=chunk
+            ).delete()
+            ArchivedDeletedRecord.objects.filter(
+                content_type=content_type, object_id__in=chunk
+            ).delete()
+            super(SoftDeleteQuerySet, self.model.all_objects.filter(pk__in=chunk)).delete()
+
+        return len(pks)
+
+
+# a model with its own SoftDeleteQuerySet subclass subclasses both managers
+# and sets _queryset_class, related managers inherit it from the class
 class ActiveManager(models.Manager):
+    _queryset_class = SoftDeleteQuerySet
+
     def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).filter(is_deleted=False)
+        return super().get_queryset().filter(is_deleted=False)
 
 
 class AllManager(models.Manager):
-    def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db)
+    _queryset_class = SoftDeleteQuerySet
 
 #to store the object id of deleted records for backup
 class DeletedRecord(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     model_name = models.CharField(max_length=100)
-    data = models.JSONField()   # FULL BACKUP
+    data = models.JSONField(encoder=DjangoJSONEncoder)   # FULL BACKUP
     deleted_by = models.ForeignKey( settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="deleted_records" )
     deleted_at = models.DateTimeField(auto_now_add=True)
 
@@ -45,6 +268,39 @@ class DeletedRecord(models.Model):
     def __str__(self):
         return f"{self.model_name} #{self.object_id}"
 
+def active_index(*fields, name):
+    """
+    Partial index over live rows only (same condition ActiveManager adds),
+    dead rows never bloat the hot lookups of soft deletable models
+    """
+    return models.Index(fields=list(fields), name=name, condition=Q(is_deleted=False))
+
+
+#index of DeletedRecord backups moved to compressed cold storage
+#(see services/deleted_record_archive.py), the JSON itself lives in the segment file
+class ArchivedDeletedRecord(models.Model):
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    model_name = models.CharField(max_length=100)
+    deleted_by = models.ForeignKey( settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="archived_deleted_records" )
+    deleted_at = models.DateTimeField()
+
+    # segment file + byte range of the compressed block + line inside the block
+    segment = models.CharField(max_length=255)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    line = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["content_type", "object_id"], name="archived_record_ct_obj_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id} ({self.segment})"
+
+
 #to implement soft delete functionality
 class SoftDeleteModel(models.Model):
     is_deleted = models.BooleanField(default=False)
@@ -57,27 +313,22 @@ class SoftDeleteModel(models.Model):
 
     def delete(self, user=None, *args, **kwargs):
         if self.is_deleted:
-            return
-
-        DeletedRecord.objects.create(
-            content_type=ContentType.objects.get_for_model(self),
-            object_id=self.pk,
-            model_name=self.__class__.__name__,
-            data=model_to_dict(self),
-            deleted_by=user,
-        )
+            return 0, {}
+
+        deleted_at = timezone.now()
+        result = type(self).all_objects.filter(pk=self.pk).delete(user=user, deleted_at=deleted_at)
 
         self.is_deleted = True
-        self.deleted_at = timezone.now()
-        self.save(update_fields=["is_deleted", "deleted_at"])
+        self.deleted_at = deleted_at
+        return result
+
+    def restore(self):
+        type(self).all_objects.filter(pk=self.pk).restore()
+        self.refresh_from_db()
 
     def hard_delete(self):
-        # remove backup first
-        DeletedRecord.objects.filter(
-            content_type=ContentType.objects.get_for_model(self),
-            object_id=self.pk,
-        ).delete()
-        super().delete()
+        # backup + generic children go with it
+        type(self).all_objects.filter(pk=self.pk).hard_delete()
 
 
 class Location(SoftDeleteModel):
@@ -138,16 +389,6 @@ class PartyMaster(SoftDeleteModel):
     status = models.CharField(max_length=20, choices=STATUS_TYPE, default="active")
     created_at = models.DateTimeField(auto_now_add=True)   
 
-    def delete(self, user=None, *args, **kwargs):
-        for loc in self.location.all():
-            loc.delete(user=user)
-        super().delete(user=user)
-
-    def hard_delete(self):
-        for loc in self.location.all():
-            loc.hard_delete()
-        super().hard_delete()
-
     def __str__(self):
         return self.name
     
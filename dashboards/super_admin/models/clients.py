@@ -1,7 +1,9 @@
 # billing.py
 from django.db import models
 from django.core.exceptions import ValidationError
+from dashboards.branch.models.branch import Branch
 from dashboards.super_admin.models.base import Location, SoftDeleteModel
+from dashboards.super_admin.services.gstin import state_code
 from django.contrib.contenttypes.fields import GenericRelation
 
 
@@ -58,8 +60,15 @@ class SlabRate(SoftDeleteModel):
 
     amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    # GST on invoices billed at this slab, empty -> rate of hsn_code (settings.GST_HSN_RATES)
+    hsn_code = models.CharField(max_length=10, blank=True, default="", help_text="HSN / SAC code")
+    gst_rate = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+
     is_active = models.BooleanField(default=True)
 
+    # bumped on every save, the slab index compares it to spot edits made by other processes
+    updated_at = models.DateTimeField(auto_now=True)
+
     def clean(self):
         if self.billing_mode == "per_duty_slip":
             if not self.price_type:
@@ -67,6 +76,13 @@ class SlabRate(SoftDeleteModel):
             if self.min_qty is None or self.max_qty is None:
                 raise ValidationError("Min & Max qty required")
             self.months = None
+            if self.is_active:
+                # imported here, the slab index imports this module
+                from dashboards.super_admin.services.slab_index import tier_conflict
+
+                conflict = tier_conflict(self.billing_mode, self.min_qty, self.max_qty, exclude_pk=self.pk)
+                if conflict:
+                    raise ValidationError({"min_qty": conflict})
 
         elif self.billing_mode == "flat":
             if not self.months:
@@ -86,6 +102,28 @@ class SlabRate(SoftDeleteModel):
         return f"{self.slab_name} | {self.billing_mode}"
 
 
+class ClientUsage(models.Model):
+    """
+    Billable usage of a client (duty slips, SMS, e-invoices ...),
+    priced against the SlabRate tiers of its billing_mode by the billing run
+    """
+
+    clients = models.ForeignKey("Clients", on_delete=models.CASCADE, related_name="usage")
+    billing_mode = models.CharField(max_length=30, choices=BILLING_MODES)
+    usage_date = models.DateField()
+    quantity = models.PositiveIntegerField(default=1)
+    reference = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["clients", "usage_date"], name="client_usage_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.clients_id} | {self.billing_mode} | {self.usage_date} x{self.quantity}"
+
+
 # Create Clinets profile dashbord
 class Clients(SoftDeleteModel):
     CLIENT_TYPES = [
@@ -132,6 +170,7 @@ class Clients(SoftDeleteModel):
    # LegalTaxInfo
     has_gst = models.BooleanField(default=False)
     gstin = models.CharField(max_length=50, blank=True, null=True)
+    gst_state_code = models.CharField(max_length=2, blank=True, null=True, editable=False)
     pan_tax_id = models.CharField(max_length=50, blank=True, null=True)
     tax_country = models.CharField(max_length=100, blank=True, null=True)
     invoice_name_address = models.TextField(blank=True, null=True)
@@ -155,6 +194,15 @@ class Clients(SoftDeleteModel):
     )
 
     invoice_due_days = models.IntegerField(default=30)
+
+    # branch that issues the recurring invoices, the billing run of a branch bills only its clients
+    billing_branch = models.ForeignKey(
+        Branch,
+        on_delete=models.PROTECT,
+        related_name="billed_clients",
+        blank=True,
+        null=True
+    )
   
     # 🔹 Slab based billing
     slab_rate = models.ForeignKey(
@@ -183,17 +231,15 @@ class Clients(SoftDeleteModel):
     contract_end_date = models.DateField(blank=True, null=True)
     auto_renew = models.BooleanField(default=False)
     terms_conditions = models.TextField(blank=True, null=True)
-    
-    def delete(self, user=None, *args, **kwargs):
-        for loc in self.location.all():
-            loc.delete(user=user)
-        super().delete(user=user)
-
-    def hard_delete(self):
-        for loc in self.location.all():
-            loc.hard_delete()
-        super().hard_delete()
    
 
+    def save(self, *args, **kwargs):
+        # parsed once here, not on every invoice
+        self.gst_state_code = state_code(self.gstin)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "gstin" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "gst_state_code"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"display_name"
@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
@@ -20,7 +21,6 @@ DOCUMENT_TYPES = [
     ("payment", "Payment"),
     ("payout", "Payout"),
     ("purchaseOrder", "Purchase Order"),
-    ("vendorBill", "Vendor Bill"),
     ("perfomaInvoice", "Performa Invoice"),
 ]
 
@@ -118,6 +118,9 @@ class DocumentControl(SoftDeleteModel):
 
     is_locked = models.BooleanField(default=False)
 
+    # bumped by reset_series, cached number blocks of an older generation are dropped
+    series_generation = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -152,6 +155,15 @@ class DocumentControl(SoftDeleteModel):
     def save(self, *args, **kwargs):
         if self.current_number == 0:
             self.current_number = self.start_number - 1
+
+        # current_number only moves through F() updates (see services.document_sequence),
+        # a stale instance saved from admin / API must not wind the series back
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ("current_number", "series_generation")
+            ]
+
         super().save(*args, **kwargs)
 
     # =================================================
@@ -165,51 +177,58 @@ class DocumentControl(SoftDeleteModel):
         if self.is_locked:
             raise ValidationError("This document series is locked.")
 
-        self.current_number += 1
-        self.save(update_fields=["current_number"])
+        DocumentControl.objects.filter(pk=self.pk).update(
+            current_number=F("current_number") + 1
+        )
+        self.refresh_from_db(fields=["current_number"])
 
         return str(self.current_number).zfill(self.number_padding)
 
     # =================================================
     # FULL DOCUMENT NUMBER GENERATOR
     # =================================================
-    @transaction.atomic
     def generate_document_number(self):
         """
         Returns full formatted document number
         Example: INV/TCS/0001/2025-26
         """
-        raw_number = self.get_next_number()
+        from dashboards.super_admin.services.document_sequence import allocate_document_number
 
-        prefix = process_affix(
-            self.prefix,
-            self.clients,
+        return allocate_document_number(
+            self.clients_id,
             self.document_type,
             self.financial_year
         )
 
-        suffix = process_affix(
-            self.suffix,
-            self.clients,
-            self.document_type,
-            self.financial_year
-        )
+    # =================================================
+    # RESET FOR NEW FINANCIAL YEAR (OPTIONAL)
+    # =================================================
+    def reset_series(self):
+        from dashboards.super_admin.services.document_sequence import document_sequences
 
-        parts = []
-        if prefix:
-            parts.append(prefix)
+        DocumentControl.objects.filter(pk=self.pk).update(
+            current_number=self.start_number - 1,
+            is_locked=False,
+            series_generation=F("series_generation") + 1,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=["current_number", "is_locked", "series_generation", "updated_at"])
+        # other processes notice the new generation on their next number
+        document_sequences.discard(self.clients_id, self.document_type)
 
-        parts.append(raw_number)
 
-        if suffix:
-            parts.append(suffix)
+# =====================================================
+# NAMED COUNTERS (PO / GRN / VENDOR BILL)
+# =====================================================
+class NumberCounter(models.Model):
+    """
+    One row per number series that is not tied to a client,
+    e.g. "PO-2026". Only moved through services.counters.
+    """
 
-        return "/".join(parts)
+    name = models.CharField(max_length=100, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    # =================================================
-    # RESET FOR NEW FINANCIAL YEAR (OPTIONAL)
-    # =================================================
-    def reset_series(self):
-        self.current_number = self.start_number - 1
-        self.is_locked = False
-        self.save()
+    def __str__(self):
+        return f"{self.name}: {self.value}"
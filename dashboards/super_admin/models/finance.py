@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.db import models
 from decimal import Decimal
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
-from dashboards.super_admin.models.base import SoftDeleteModel
+from dashboards.super_admin.models.base import SoftDeleteModel, active_index, chunked
 
 
 class PurchaseOrder(SoftDeleteModel):
@@ -23,6 +26,11 @@ class PurchaseOrder(SoftDeleteModel):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
 
+    class Meta:
+        indexes = [
+            active_index("party_master", "status", name="po_live_party_idx"),
+        ]
+
 class PurchaseOrderItem(models.Model):
     purchase_order = models.ForeignKey(
         PurchaseOrder,
@@ -34,11 +42,50 @@ class PurchaseOrderItem(models.Model):
     rate = models.DecimalField(max_digits=12, decimal_places=2)
     tax = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    sku = models.CharField(max_length=64, blank=True, default="")
+
+    # kept up to date by services.three_way_match
+    received_quantity = models.PositiveIntegerField(default=0, editable=False)
+    billed_quantity = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
-        self.amount = self.quantity * self.rate * self.tax/100 + (self.quantity * self.rate)
+        from dashboards.super_admin.services.purchase_orders import stored_amount
+
+        self.amount = stored_amount(self.quantity, self.rate, self.tax)
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def quantity_expressions():
+        """
+        {received_quantity, billed_quantity} as SQL over the live GRN lines
+        and the matched lines of live bills
+        """
+        def total(queryset):
+            return Coalesce(
+                Subquery(
+                    queryset.filter(po_item_id=OuterRef("pk"))
+                    .order_by().values("po_item_id")
+                    .annotate(total=Sum("quantity")).values("total")[:1]
+                ),
+                Value(0),
+            )
+
+        return {
+            "received_quantity": total(GoodsReceiptNoteItem.objects.filter(grn__is_deleted=False)),
+            "billed_quantity": total(
+                BillDetailsItem.objects.filter(match_status="matched", bill__is_deleted=False)
+            ),
+        }
+
+    @classmethod
+    def sync_quantities(cls, item_ids):
+        """
+        Recompute received / billed for the given lines, one UPDATE per chunk
+        """
+        item_ids = sorted({pk for pk in item_ids if pk})
+        for chunk in chunked(item_ids):
+            cls.objects.filter(pk__in=chunk).update(**cls.quantity_expressions())
+
 
 
 
@@ -67,4 +114,161 @@ class GoodsReceiptNote(SoftDeleteModel):
         max_length=20,
         choices=[("submitted", "Submitted"), ("sent", "Sent")],
         default="submitted"
-    )
\ No newline at end of file
+    )
+
+
+class GoodsReceiptNoteItem(models.Model):
+    grn = models.ForeignKey(
+        GoodsReceiptNote,
+        on_delete=models.CASCADE,
+        related_name="items"
+    )
+    po_item = models.ForeignKey(
+        PurchaseOrderItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="receipts"
+    )
+    description = models.CharField(max_length=255)
+    sku = models.CharField(max_length=64, blank=True, default="")
+    quantity = models.PositiveIntegerField()
+
+
+class BillDetails(SoftDeleteModel):
+    party_master = models.ForeignKey(
+        "PartyMaster",
+        on_delete=models.CASCADE,
+        related_name="bills"
+    )
+    # optional, narrows matching to the lines of one order
+    purchase_order = models.ForeignKey(
+        PurchaseOrder,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bills"
+    )
+    bill_number = models.CharField(max_length=100)  # the vendor's own number
+    voucher_number = models.CharField(max_length=100, unique=True, null=True, editable=False)
+    bill_date = models.DateField()
+    total_quantity = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    STATUS_CHOICES = [
+        ("draft", "Draft"),
+        ("matched", "Matched"),
+        ("exception", "Match Exception"),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
+    matched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            active_index("bill_date", "status", name="bill_live_date_status_idx"),
+            active_index("party_master", "bill_date", name="bill_live_party_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.voucher_number or self.bill_number} - {self.party_master_id}"
+
+
+class BillDetailsItem(models.Model):
+    bill = models.ForeignKey(
+        BillDetails,
+        on_delete=models.CASCADE,
+        related_name="items"
+    )
+    po_item = models.ForeignKey(
+        PurchaseOrderItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bill_lines"
+    )
+    description = models.CharField(max_length=255)
+    sku = models.CharField(max_length=64, blank=True, default="")
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    MATCH_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("matched", "Matched"),
+        ("quantity_mismatch", "Quantity Mismatch"),
+        ("price_mismatch", "Price Mismatch"),
+        ("no_po_line", "No Open PO Line"),
+    ]
+    match_status = models.CharField(max_length=20, choices=MATCH_STATUS_CHOICES, default="pending")
+    match_note = models.CharField(max_length=255, blank=True, default="")
+
+    def save(self, *args, **kwargs):
+        self.amount = self.quantity * self.unit_price
+        super().save(*args, **kwargs)
+
+
+class BankStatement(models.Model):
+    """
+    One imported bank statement file (services/bank_statement.py)
+    """
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    branch = models.ForeignKey("branch.Branch", on_delete=models.PROTECT, null=True, blank=True, related_name="bank_statements")
+    file_name = models.CharField(max_length=255)
+    file_format = models.CharField(max_length=10)
+    date_window = models.PositiveSmallIntegerField(default=3, help_text="Days a bank date may differ from the book date")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    imported_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="bank_statements")
+
+    lines = models.PositiveIntegerField(default=0)
+    matched_receipts = models.PositiveIntegerField(default=0)
+    matched_expenses = models.PositiveIntegerField(default=0)
+    unmatched = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+
+    # chunks, per phase milliseconds, lines per second
+    metrics = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.lines} lines)"
+
+
+class BankStatementLine(models.Model):
+    """
+    A statement line that matched no receipt / expense, or could not be
+    read, kept for review. Matched lines only stamp the booked row.
+    """
+    STATUS_CHOICES = [
+        ("unmatched", "Unmatched"),
+        ("error", "Unreadable"),
+        ("resolved", "Resolved"),
+    ]
+
+    statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE, related_name="statement_lines")
+    line_no = models.PositiveIntegerField()
+    txn_date = models.DateField(null=True, blank=True)
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reference_no = models.CharField(max_length=100, blank=True, default="")
+    narration = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="unmatched")
+    note = models.CharField(max_length=255, blank=True, default="")
+    raw = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["statement", "status"], name="bank_line_statement_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.statement_id}:{self.line_no} {self.credit or -self.debit}"
@@ -1,13 +1,25 @@
 # gst.py
 from django.utils import timezone
+from django.conf import settings
 from django.db import models
+from django.db.models import Q, Sum
 from decimal import Decimal
-import re
 from django.db import transaction
 from dashboards.branch.models.branch import Branch
 from dashboards.super_admin.models.clients import SlabRate, Clients
-from dashboards.super_admin.models.controll_no import DocumentControl, get_financial_year
-from dashboards.super_admin.models.base import SoftDeleteModel ,FollowUp
+from dashboards.super_admin.services.document_sequence import allocate_document_number
+from dashboards.super_admin.services.gstin import state_code
+from dashboards.super_admin.services.gst_tax import compute_gst, crosses_states, gst_rate_for
+from dashboards.super_admin.models.base import (
+    ActiveManager,
+    AllManager,
+    FollowUp,
+    SoftDeleteModel,
+    SoftDeleteQuerySet,
+    active_index,
+    chunked,
+    immediate_atomic,
+)
 from django.contrib.contenttypes.fields import GenericRelation
 
 
@@ -62,10 +74,7 @@ def get_state_code_from_gstin(gstin):
     """
     GSTIN ke first 2 digit se state code nikalega
     """
-    if not gstin:
-        return None
-    match = re.match(r"^(\d{2})", gstin)
-    return match.group(1) if match else None
+    return state_code(gstin)
 
 
 
@@ -96,15 +105,26 @@ class Quotation(SoftDeleteModel):
     # ✅ FOLLOWUPS (GENERIC RELATION)
     followups = GenericRelation(FollowUp,related_query_name="quotation")
 
+    class Meta:
+        indexes = [
+            active_index("clients", "status", name="quotation_live_client_idx"),
+        ]
+
+    @staticmethod
+    def subtotals(quotation_ids):
+        """
+        {quotation_id: sum of live item amounts}, one GROUP BY query
+        """
+        return dict(
+            QuotationItem.objects.filter(quotation_id__in=quotation_ids)
+            .order_by().values("quotation_id")
+            .annotate(total=Sum("amount"))
+            .values_list("quotation_id", "total")
+        )
+
     def save(self, *args, **kwargs):
         if not self.quotation_no:
-            with transaction.atomic():
-                control = DocumentControl.objects.select_for_update().get(
-                    company=self.company,
-                    document_type="quotation",
-                    financial_year=get_financial_year()
-                )
-                self.quotation_no = control.generate_document_number()
+            self.quotation_no = allocate_document_number(self.clients_id, "quotation")
 
         super().save(*args, **kwargs)
 
@@ -145,15 +165,82 @@ class QuotationItem(SoftDeleteModel):
 # ===============================
 # GST INVOICE (RENAMED – NO CONFLICT)
 # ===============================
+class GSTInvoiceQuerySet(SoftDeleteQuerySet):
+    """
+    Soft delete / restore / hard delete post the ledger entries of the
+    invoices they take out of or bring back into the client balances
+    """
+
+    @staticmethod
+    def _removal_entries(invoices):
+        from dashboards.super_admin.services import receivables
+
+        entries = []
+        for invoice in invoices:
+            previous = receivables.invoice_amount(invoice)
+            invoice.is_deleted = True
+            entries.append(receivables.invoice_entry(invoice, previous))
+        return entries
+
+    @transaction.atomic
+    def delete(self, user=None, deleted_at=None):
+        from dashboards.super_admin.services import receivables
+
+        invoices = list(self.filter(is_deleted=False).order_by("pk"))
+        result = super().delete(user=user, deleted_at=deleted_at)
+        receivables.post(self._removal_entries(invoices))
+        return result
+
+    @transaction.atomic
+    def restore(self):
+        from dashboards.super_admin.services import receivables
+
+        pks = list(self.filter(is_deleted=True).order_by("pk").values_list("pk", flat=True))
+        count = super().restore()
+        # a deleted invoice counts nothing, the restored one adds its amount back
+        for chunk in chunked(pks):
+            receivables.post([
+                receivables.invoice_entry(invoice)
+                for invoice in self.model.all_objects.filter(pk__in=chunk).order_by("pk")
+            ])
+        return count
+
+    @transaction.atomic
+    def hard_delete(self):
+        from dashboards.super_admin.services import receivables
+
+        entries = self._removal_entries(self.filter(is_deleted=False).order_by("pk"))
+        count = super().hard_delete()
+        # the invoice row is gone, the entry keeps its number in the narration
+        for entry in entries:
+            entry.invoice_id = None
+        receivables.post(entries)
+        return count
+
+
+class GSTInvoiceActiveManager(ActiveManager):
+    _queryset_class = GSTInvoiceQuerySet
+
+
+class GSTInvoiceAllManager(AllManager):
+    _queryset_class = GSTInvoiceQuerySet
+
+
 class GSTInvoice(SoftDeleteModel):
 
     invoice_no = models.CharField( max_length=100,unique=True,blank=True)
     clients = models.ForeignKey(Clients,  on_delete=models.PROTECT, related_name="gst_invoices")
     branch = models.ForeignKey(Branch, on_delete=models.PROTECT, related_name="gst_invoices")
-    quotation = models.OneToOneField(Quotation, on_delete=models.PROTECT,related_name="gst_invoice")
+    quotation = models.OneToOneField(Quotation, on_delete=models.PROTECT,related_name="gst_invoice", blank=True, null=True)
     invoice_date = models.DateField(auto_now_add=True)
     due_date = models.DateField(blank=True, null=True)
 
+    # ================= RECURRING BILLING (no quotation) =================
+    billing_run = models.ForeignKey("BillingRun", on_delete=models.SET_NULL, related_name="invoices", blank=True, null=True)
+    period_from = models.DateField(blank=True, null=True)
+    period_to = models.DateField(blank=True, null=True)
+    usage = models.JSONField(default=list, blank=True, help_text="[{billing_mode, slab_rate_id, quantity, amount}]")
+
     # ================= GST =================
     sub_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     cgst_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
@@ -176,56 +263,66 @@ class GSTInvoice(SoftDeleteModel):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = GSTInvoiceActiveManager()
+    all_objects = GSTInvoiceAllManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["clients", "period_from"], name="gst_invoice_client_period_idx"),
+        ]
+        constraints = [
+            # one live run invoice per client and period, two concurrent billing runs cannot both bill it
+            models.UniqueConstraint(
+                fields=["clients", "period_to"],
+                condition=Q(billing_run__isnull=False, is_deleted=False),
+                name="gst_invoice_run_period_uniq",
+            ),
+        ]
+
     # ================= GST HELPERS =================
 
     def is_inter_state(self):
-        company_state = get_state_code_from_gstin(self.company.gstin)
-        branch_state = get_state_code_from_gstin(self.branch.gstin)
-        return company_state and branch_state and company_state != branch_state
-
-    def calculate_gst(self):
-        gst_rate = Decimal("18.00")  # future: slab_rate based
-
-        self.cgst_rate = self.sgst_rate = self.igst_rate = Decimal("0")
-        self.cgst_amount = self.sgst_amount = self.igst_amount = Decimal("0")
-
-        if self.is_inter_state():
-            self.igst_rate = gst_rate
-            self.igst_amount = self.sub_total * gst_rate / 100
-        else:
-            half = gst_rate / 2
-            self.cgst_rate = half
-            self.sgst_rate = half
-            self.cgst_amount = self.sub_total * half / 100
-            self.sgst_amount = self.sub_total * half / 100
-
-        self.grand_total = (
-            self.sub_total +
-            self.cgst_amount +
-            self.sgst_amount +
-            self.igst_amount
+        # supplier = our branch, recipient = the client (code cached on save)
+        return crosses_states(
+            self.branch.gst_state_code,
+            self.clients.gst_state_code or state_code(self.clients.gstin),
         )
 
+    def calculate_gst(self, rate=None):
+        if rate is None:
+            slab_rate = self.quotation.slab_rate if self.quotation_id else self.clients.slab_rate
+            rate = gst_rate_for(slab_rate, self.clients)
+
+        for name, value in compute_gst(self.sub_total, rate, self.is_inter_state()).items():
+            setattr(self, name, value)
+
     def save(self, *args, **kwargs):
+        # imported here, the receivables service imports these models
+        from dashboards.super_admin.services import receivables
 
-        # 🔥 AUTO INVOICE NUMBER (COMPANY + FY SAFE)
-        if not self.invoice_no:
-            with transaction.atomic():
-                control = DocumentControl.objects.select_for_update().get(
-                    company=self.company,
-                    document_type="invoice",
-                    financial_year=get_financial_year()
-                )
-                self.invoice_no = control.generate_document_number()
+        # the number is taken in the same transaction as the insert,
+        # a failed insert hands the gapless number back
+        with immediate_atomic():
+            # 🔥 AUTO INVOICE NUMBER (COMPANY + FY SAFE)
+            if not self.invoice_no:
+                self.invoice_no = allocate_document_number(self.clients_id, "invoice")
 
-        # Subtotal from quotation items
-        self.sub_total = sum(
-            (item.amount for item in self.quotation.items.all()),
-            Decimal("0.00")
-        )
+            # Subtotal from quotation items, summed by the database
+            # (recurring invoices carry their priced usage instead)
+            if self.quotation_id:
+                self.sub_total = Quotation.subtotals([self.quotation_id]).get(self.quotation_id, Decimal("0.00"))
 
-        self.calculate_gst()
-        super().save(*args, **kwargs)
+            self.calculate_gst()
+
+            previous = Decimal("0.00")
+            if self.pk:
+                stored = GSTInvoice.all_objects.filter(pk=self.pk).first()
+                previous = receivables.invoice_amount(stored) if stored else previous
+
+            super().save(*args, **kwargs)
+            receivables.post([receivables.invoice_entry(self, previous)])
+
+    # delete / restore / hard_delete post their ledger entries in GSTInvoiceQuerySet
 
     def __str__(self):
         return self.invoice_no
@@ -233,6 +330,47 @@ class GSTInvoice(SoftDeleteModel):
 
 
 
+class BillingRun(models.Model):
+    """
+    One recurring billing run (services/billing_run.py) for a billing period
+    """
+
+    STATUS_CHOICES = [
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    branch = models.ForeignKey(Branch, on_delete=models.PROTECT, related_name="billing_runs")
+    period_to = models.DateField(help_text="Last day of the billed month")
+    cycles = models.JSONField(default=list, help_text="Billing cycles closing with this month")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="completed")
+    run_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="billing_runs")
+
+    clients = models.PositiveIntegerField(default=0)
+    invoices_created = models.PositiveIntegerField(default=0)
+    skipped = models.JSONField(default=list, blank=True, help_text="[{clients_id, reason}]")
+
+    total_sub_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_grand = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # workers, per phase milliseconds, clients / invoices per second
+    metrics = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["branch", "period_to"], name="billing_run_branch_period_idx"),
+        ]
+
+    def __str__(self):
+        return f"Billing {self.period_to:%Y-%m} - branch {self.branch_id}"
+
+
 class Receipt(models.Model):
 
     RECEIPT_TYPES = [
@@ -320,34 +458,59 @@ class Receipt(models.Model):
     payment_date = models.DateField(default=timezone.now)
     notes = models.TextField(blank=True, null=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # set when a bank statement line is matched to the receipt
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    bank_statement = models.ForeignKey("BankStatement", on_delete=models.SET_NULL, null=True, blank=True, related_name="receipts")
 
-    def save(self, *args, **kwargs):
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        # 🔹 Auto Receipt Number
-        if not self.receipt_no:
-            control = DocumentControl.objects.get(
-                document_type="receipt",
-                financial_year=get_financial_year()
-            )
-            self.receipt_no = control.generate_number()
-
-        # 🔹 Calculate TDS
-        if self.tds_applicable and self.tds_percentage:
-            self.tds_amount = (
-                self.amount_received * self.tds_percentage / Decimal("100")
-            )
-        else:
-            self.tds_amount = Decimal("0.00")
-
-        # 🔹 Net amount after TDS
-        self.net_amount = self.amount_received - self.tds_amount
-
-        # 🔹 Initially unallocated = net amount
-        if not self.pk:
-            self.unallocated_amount = self.net_amount
+    class Meta:
+        indexes = [
+            models.Index(fields=["payment_date"], name="receipt_unreconciled_idx", condition=Q(reconciled_at__isnull=True)),
+        ]
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        # the number is taken in the same transaction as the insert,
+        # a failed insert hands the gapless number back
+        with immediate_atomic():
+            # 🔹 Auto Receipt Number
+            if not self.receipt_no:
+                self.receipt_no = allocate_document_number(self.clients_id, "receipt")
+
+            # 🔹 Calculate TDS
+            if self.tds_applicable and self.tds_percentage:
+                self.tds_amount = (
+                    self.amount_received * self.tds_percentage / Decimal("100")
+                )
+            else:
+                self.tds_amount = Decimal("0.00")
+
+            # 🔹 Net amount after TDS
+            self.net_amount = self.amount_received - self.tds_amount
+
+            # 🔹 Initially unallocated = net amount
+            if not self.pk:
+                self.unallocated_amount = self.net_amount
+
+            previous = Receipt.objects.filter(pk=self.pk).values_list("net_amount", flat=True).first() if self.pk else None
+            super().save(*args, **kwargs)
+            receivables.post([receivables.receipt_entry(self, previous or Decimal("0.00"))])
+
+    def delete(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        # the allocations go with the receipt (CASCADE)
+        entries = [
+            receivables.allocation_entry(allocation, self.clients_id, allocation.applied_amount, removed=True)
+            for allocation in self.allocations.all()
+        ]
+        entries.append(receivables.receipt_entry(self, self.net_amount, removed=True))
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            receivables.post(entries)
+        return result
 
     def __str__(self):
         return self.receipt_no
@@ -373,6 +536,25 @@ class ReceiptAllocation(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        previous = ReceiptAllocation.objects.filter(pk=self.pk).values_list("applied_amount", flat=True).first() if self.pk else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            receivables.post([
+                receivables.allocation_entry(self, self.receipt.clients_id, previous or Decimal("0.00"))
+            ])
+
+    def delete(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        entry = receivables.allocation_entry(self, self.receipt.clients_id, self.applied_amount, removed=True)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            receivables.post([entry])
+        return result
+
     def __str__(self):
         return f"{self.receipt.receipt_no} → {self.invoice.invoice_no}"
 
@@ -417,8 +599,120 @@ class ClientAdvanceLedger(models.Model):
     narration = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        stored = ClientAdvanceLedger.objects.filter(pk=self.pk).first() if self.pk else None
+        previous = receivables.advance_amount(stored) if stored else Decimal("0.00")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            receivables.post([receivables.advance_entry(self, previous)])
+
+    def delete(self, *args, **kwargs):
+        from dashboards.super_admin.services import receivables
+
+        entry = receivables.advance_entry(self, receivables.advance_amount(self), removed=True)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            receivables.post([entry])
+        return result
+
     def __str__(self):
         sign = "+" if self.entry_type == "credit" else "-"
         return f"{self.clients} {sign}{self.amount}"
     
 
+
+
+# ===============================
+# RECEIVABLES LEDGER (services/receivables.py)
+# ===============================
+class ClientBalance(models.Model):
+    """
+    Running receivable figures of a client, moved by every ledger entry:
+    balance     -> invoiced - received (negative = paid in advance)
+    outstanding -> invoiced - allocated to invoices
+    advance     -> ClientAdvanceLedger credits - debits
+    """
+    clients = models.OneToOneField(Clients, on_delete=models.CASCADE, primary_key=True, related_name="receivable_balance")
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    advance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.clients_id}: {self.balance}"
+
+
+class ClientLedgerEntry(models.Model):
+    """
+    One movement of a client's receivables with the balances after it.
+    Append only: edits and deletes of the source rows post a reversing entry.
+    """
+
+    KINDS = [
+        ("invoice", "Invoice"),
+        ("receipt", "Receipt"),
+        ("allocation", "Allocation"),
+        ("advance", "Advance"),
+        ("adjustment", "Adjustment"),
+    ]
+
+    clients = models.ForeignKey(Clients, on_delete=models.PROTECT, related_name="ledger_entries")
+    entry_date = models.DateField()
+    kind = models.CharField(max_length=20, choices=KINDS)
+
+    invoice = models.ForeignKey(GSTInvoice, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    receipt = models.ForeignKey(Receipt, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    allocation = models.ForeignKey(ReceiptAllocation, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    advance_entry = models.ForeignKey(ClientAdvanceLedger, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+
+    balance_change = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_change = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    advance_change = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # running figures after this entry
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2)
+    advance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    narration = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entry_date"], name="ledger_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.clients_id} {self.kind} {self.balance_change} -> {self.balance}"
+
+
+class ClientBalanceCheckpoint(models.Model):
+    """
+    Closing receivables of a client at a month end, with the open invoice
+    amounts aged from their due date (invoice date when there is none).
+    Written by receivables.close_month, checked by rebuild_receivables.
+    """
+    clients = models.ForeignKey(Clients, on_delete=models.CASCADE, related_name="balance_checkpoints")
+    month = models.DateField(help_text="Last day of the closed month")
+
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    advance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    due_0_30 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    due_31_60 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    due_61_90 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    due_90_plus = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # month first, an ageing report is one range scan of this index
+            models.UniqueConstraint(fields=["month", "clients"], name="balance_checkpoint_month_client_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.clients_id} @ {self.month}: {self.balance}"
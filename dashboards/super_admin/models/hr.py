@@ -1,10 +1,22 @@
 # dashboards/super_admin/models/hr.py
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from calendar import monthrange
+from datetime import date, datetime
 from decimal import Decimal
 from django.utils import timezone
-from dashboards.super_admin.models.base import SoftDeleteModel
+from django.utils.dateparse import parse_date
+from dashboards.super_admin.models.base import (
+    ActiveManager,
+    AllManager,
+    SoftDeleteModel,
+    SoftDeleteQuerySet,
+    active_index,
+    chunked,
+)
 
 
 
@@ -61,6 +73,9 @@ class Employee(SoftDeleteModel):
     father_name = models.CharField(max_length=255,blank=True,null=True,verbose_name="Father Name")
     mother_name = models.CharField(max_length=255,blank=True,null=True,verbose_name="Mother Name")
     upload_photo = models.ImageField(upload_to='employee_photos/',blank=True,null=True,verbose_name="Employee Photo")
+    # sha1 of the uploaded photo, ETag + cache busting of the resized derivatives
+    photo_etag = models.CharField(max_length=40,blank=True,null=True,editable=False)
+    photo_updated_at = models.DateTimeField(blank=True,null=True,editable=False)
     upload_employee_signature = models.ImageField(upload_to='employee_signature/',blank=True,null=True,verbose_name="Employee Signature Upload")
     joining_date = models.DateField(verbose_name="Joining Date")
     basic_salary = models.DecimalField(max_digits=10,decimal_places=2,verbose_name="Basic Salary")
@@ -161,14 +176,53 @@ class Employee(SoftDeleteModel):
 
         return f"{prefix}{new_number:04d}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        employee = super().from_db(db, field_names, values)
+        # photo as loaded, a replaced or cleared photo drops its derivatives on save
+        if "upload_photo" in field_names:
+            employee._loaded_photo = values[field_names.index("upload_photo")]
+        return employee
+
     def save(self, *args, **kwargs):
+        from dashboards.super_admin.services.employee_photos import delete_photo_derivatives
+
         if not self.employee_id:
             self.employee_id = self._generate_employee_id()
+
+        # a freshly assigned file is committed to storage by super().save()
+        photo_uploaded = bool(self.upload_photo) and not self.upload_photo._committed
+        if not self.upload_photo:
+            self.photo_etag = self.photo_updated_at = None
+
         super().save(*args, **kwargs)
 
+        previous = getattr(self, "_loaded_photo", None)
+        if previous and previous != (self.upload_photo.name or None):
+            delete_photo_derivatives(previous)
+        self._loaded_photo = self.upload_photo.name or None
+
+        if photo_uploaded:
+            self.refresh_photo_derivatives()
+
+    def refresh_photo_derivatives(self):
+        """
+        Resize the current photo into its WebP / JPEG derivatives
+        """
+        from dashboards.super_admin.services.employee_photos import generate_photo_derivatives
+
+        self.photo_etag, self.photo_updated_at = generate_photo_derivatives(self)
+        Employee.all_objects.filter(pk=self.pk).update(
+            photo_etag=self.photo_etag,
+            photo_updated_at=self.photo_updated_at,
+        )
+
     class Meta:
         verbose_name = "Employee"
         verbose_name_plural = "Employees"
+        indexes = [
+            active_index("branch", "status", name="employee_live_branch_idx"),
+        ]
         permissions = [
             ("view_employee_salary", "Can view employee salary"),
             ("edit_employee_bank", "Can edit bank details"),
@@ -217,6 +271,9 @@ class SalarySlip(SoftDeleteModel):
         # duplicate salary for same month
         unique_together = ("employee", "salary_date")
         ordering = ["-salary_date"]
+        indexes = [
+            active_index("salary_date", name="salaryslip_live_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.salary_date.strftime('%B %Y')}"
@@ -256,6 +313,85 @@ class SalarySlip(SoftDeleteModel):
         
         super().save(*args, **kwargs)
         
+class PayrollRun(models.Model):
+    """
+    One batch payroll run (services/payroll.py) for a branch and month
+    """
+
+    STATUS_CHOICES = [
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    branch = models.ForeignKey("branch.Branch", on_delete=models.PROTECT, related_name="payroll_runs")
+    month = models.DateField(help_text="First day of the payroll month")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="completed")
+    run_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="payroll_runs")
+
+    employees = models.PositiveIntegerField(default=0)
+    slips_created = models.PositiveIntegerField(default=0)
+    slips_updated = models.PositiveIntegerField(default=0)
+    skipped = models.JSONField(default=list, blank=True, help_text="[{employee_id, reason}]")
+
+    total_gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # milliseconds per phase: prefetch / compute / write / total
+    timings = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["branch", "month"], name="payroll_run_branch_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payroll {self.month:%Y-%m} - branch {self.branch_id}"
+
+
+class AttendanceQuerySet(SoftDeleteQuerySet):
+    """
+    Soft delete / restore / hard delete keep AttendanceMonthlySummary in step
+    """
+
+    def _summary_keys(self):
+        return list(self.order_by().values_list("employee_id", "date").distinct())
+
+    @transaction.atomic
+    def delete(self, user=None, deleted_at=None):
+        keys = self._summary_keys()
+        result = super().delete(user=user, deleted_at=deleted_at)
+        AttendanceMonthlySummary.refresh_for(keys)
+        return result
+
+    @transaction.atomic
+    def restore(self):
+        keys = self._summary_keys()
+        count = super().restore()
+        AttendanceMonthlySummary.refresh_for(keys)
+        return count
+
+    @transaction.atomic
+    def hard_delete(self):
+        keys = self._summary_keys()
+        count = super().hard_delete()
+        AttendanceMonthlySummary.refresh_for(keys)
+        return count
+
+
+class AttendanceActiveManager(ActiveManager):
+    _queryset_class = AttendanceQuerySet
+
+
+class AttendanceAllManager(AllManager):
+    _queryset_class = AttendanceQuerySet
+
+
 class Attendance(SoftDeleteModel):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
     date = models.DateField(default=timezone.now)
@@ -273,11 +409,134 @@ class Attendance(SoftDeleteModel):
     # 👇 yeh naya field – yahin leave reason / OT / comment le sakte ho
     note = models.CharField(max_length=255, blank=True, null=True)
 
+    objects = AttendanceActiveManager()
+    all_objects = AttendanceAllManager()
+
     def __str__(self):
         return f"{self.employee.name} - {self.status}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        AttendanceMonthlySummary.refresh_for([(self.employee_id, self.date)])
+
     class Meta:
         unique_together = ("date", "employee")
+        indexes = [
+            active_index("date", "employee", name="attendance_live_date_emp_idx"),
+            active_index("employee", "date", name="attendance_live_emp_date_idx"),
+        ]
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_date(str(value))
+
+
+class AttendanceMonthlySummary(models.Model):
+    """
+    One row per employee per month, maintained on every Attendance write.
+    days holds one code per calendar day (see DAY_CODES, "-" = not marked)
+    so a month x branch matrix is a single indexed read.
+    """
+
+    DAY_CODES = {
+        "present": "P",
+        "absent": "A",
+        "halfday": "H",
+        "leave": "L",
+    }
+    UNMARKED = "-"
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="attendance_summaries")
+    branch = models.ForeignKey("branch.Branch", on_delete=models.SET_NULL, null=True, blank=True, related_name="attendance_summaries")
+    month = models.DateField(help_text="First day of the month")
+    days = models.CharField(max_length=31)
+    present = models.PositiveSmallIntegerField(default=0)
+    absent = models.PositiveSmallIntegerField(default=0)
+    halfday = models.PositiveSmallIntegerField(default=0)
+    leave = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("employee", "month")
+        indexes = [
+            models.Index(fields=["month", "branch"], name="attendance_summary_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month:%Y-%m}"
+
+    @classmethod
+    def refresh_for(cls, keys):
+        """
+        Recompute the summaries touched by (employee_id, date) keys,
+        one read + one upsert per month and chunk of employees
+        """
+        months = {}
+        for employee_id, day in keys:
+            day = _as_date(day)
+            if employee_id and day:
+                months.setdefault(day.replace(day=1), set()).add(employee_id)
+
+        for month, employee_ids in months.items():
+            for chunk in chunked(sorted(employee_ids)):
+                cls.rebuild(month, employee_ids=chunk)
+
+    @classmethod
+    def rebuild(cls, month, employee_ids=None, branch_id=None):
+        """
+        Recompute a month from Attendance, for the given employees / branch or everyone.
+        Employees without a live attendance row that month lose their summary.
+        """
+        month = month.replace(day=1)
+        last_day = month.replace(day=monthrange(month.year, month.month)[1])
+
+        employees = Employee.all_objects.all()
+        if employee_ids is not None:
+            employees = employees.filter(id__in=employee_ids)
+        if branch_id is not None:
+            employees = employees.filter(branch_id=branch_id)
+        branches = dict(employees.values_list("id", "branch_id"))
+        if not branches:
+            return 0
+
+        attendance = Attendance.objects.filter(
+            employee_id__in=list(branches), date__range=(month, last_day)
+        ).values_list("employee_id", "date", "status")
+
+        grids = {}
+        for employee_id, day, status in attendance:
+            grid = grids.setdefault(employee_id, [cls.UNMARKED] * last_day.day)
+            grid[day.day - 1] = cls.DAY_CODES.get(status, cls.UNMARKED)
+
+        rows = []
+        for employee_id, grid in grids.items():
+            days = "".join(grid)
+            rows.append(cls(
+                employee_id=employee_id,
+                branch_id=branches[employee_id],
+                month=month,
+                days=days,
+                present=days.count("P"),
+                absent=days.count("A"),
+                halfday=days.count("H"),
+                leave=days.count("L"),
+                updated_at=timezone.now(),
+            ))
+
+        cls.objects.filter(employee_id__in=list(branches), month=month).exclude(
+            employee_id__in=list(grids)
+        ).delete()
+        cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["employee", "month"],
+            update_fields=["branch", "days", "present", "absent", "halfday", "leave", "updated_at"],
+        )
+        return len(rows)
 
 
 # advance 
@@ -332,20 +591,124 @@ class AdvanceRequest(SoftDeleteModel):
     created_at = models.DateTimeField(auto_now_add=True)
 
     # ================= CALCULATED =================
+    # kept in sync by every AdvanceInstallment write and payroll run (sync_balances):
+    # scheduled = sum of the live installments, deducted = the part taken on
+    # salary slips, outstanding = amount not yet deducted
+    scheduled_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"), editable=False)
+    deducted_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"), editable=False)
+    outstanding_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"), editable=False)
+
+    class Meta:
+        indexes = [
+            active_index("employee", "status", name="advance_live_employee_idx"),
+        ]
+
+    BALANCE_FIELDS = ("scheduled_amount", "deducted_amount", "outstanding_amount")
+
     @property
     def total_installment_amount(self):
-        return sum(
-            (inst.amount for inst in self.installments.all()),
-            Decimal("0.00")
-        )
+        return self.scheduled_amount
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.outstanding_amount = Decimal(str(self.amount or 0)) - (self.deducted_amount or Decimal("0.00"))
+            super().save(*args, **kwargs)
+            return
+
+        # the balances only move through sync_balances, a stale instance
+        # saved from admin / API must not write its copies back
+        update_fields = kwargs.get("update_fields")
+        kwargs["update_fields"] = [
+            name for name in (
+                update_fields if update_fields is not None
+                else [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            )
+            if name not in self.BALANCE_FIELDS
+        ]
+        super().save(*args, **kwargs)
+
+        if update_fields is None or "amount" in update_fields:
+            AdvanceRequest.sync_balances([self.pk])
+            self.refresh_from_db(fields=self.BALANCE_FIELDS)
+
+    @staticmethod
+    def balance_expressions():
+        """
+        {scheduled_amount, deducted_amount, outstanding_amount} as SQL over the live installments
+        """
+        def installment_total(**filters):
+            return Coalesce(
+                Subquery(
+                    AdvanceInstallment.objects.filter(advance_id=OuterRef("pk"), **filters)
+                    .order_by().values("advance_id")
+                    .annotate(total=Sum("amount")).values("total")[:1]
+                ),
+                Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            )
+
+        deducted = installment_total(salary_slip__isnull=False)
+        return {
+            "scheduled_amount": installment_total(),
+            "deducted_amount": deducted,
+            "outstanding_amount": F("amount") - deducted,
+        }
+
+    @classmethod
+    def sync_balances(cls, advance_ids):
+        """
+        Recompute scheduled_amount / deducted_amount / outstanding_amount from
+        the live installments of the given advances, one UPDATE per chunk
+        """
+        advance_ids = sorted({pk for pk in advance_ids if pk})
+        for chunk in chunked(advance_ids):
+            cls.all_objects.filter(pk__in=chunk).update(**cls.balance_expressions())
 
-    @property
-    def outstanding_amount(self):
-        return self.amount - self.total_installment_amount
-    
     def __str__(self):
         return f"Advance #{self.id} - {self.employee.name}"
-    
+
+
+class AdvanceInstallmentQuerySet(SoftDeleteQuerySet):
+    """
+    Soft delete / restore / hard delete keep the advance balances in step
+    """
+
+    def _advance_ids(self):
+        return list(self.order_by().values_list("advance_id", flat=True).distinct())
+
+    @transaction.atomic
+    def delete(self, user=None, deleted_at=None):
+        advance_ids = self._advance_ids()
+        result = super().delete(user=user, deleted_at=deleted_at)
+        AdvanceRequest.sync_balances(advance_ids)
+        return result
+
+    @transaction.atomic
+    def restore(self):
+        advance_ids = self._advance_ids()
+        count = super().restore()
+        AdvanceRequest.sync_balances(advance_ids)
+        return count
+
+    @transaction.atomic
+    def hard_delete(self):
+        advance_ids = self._advance_ids()
+        count = super().hard_delete()
+        AdvanceRequest.sync_balances(advance_ids)
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        AdvanceRequest.sync_balances(obj.advance_id for obj in objs)
+        return objs
+
+
+class AdvanceInstallmentActiveManager(ActiveManager):
+    _queryset_class = AdvanceInstallmentQuerySet
+
+
+class AdvanceInstallmentAllManager(AllManager):
+    _queryset_class = AdvanceInstallmentQuerySet
 
 
 class AdvanceInstallment(SoftDeleteModel):
@@ -364,6 +727,22 @@ class AdvanceInstallment(SoftDeleteModel):
     )
 
     payslip_deduction = models.BooleanField(default=True)
+    # the salary slip that deducted it (set by the payroll run), None while still due
+    salary_slip = models.ForeignKey(
+        SalarySlip,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="advance_installments"
+    )
+
+    objects = AdvanceInstallmentActiveManager()
+    all_objects = AdvanceInstallmentAllManager()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        AdvanceRequest.sync_balances([self.advance_id])
 
     def __str__(self):
         return f"{self.advance} - Installment {self.installment_no}"
@@ -1,7 +1,8 @@
 from django.db import models
+from django.db.models import Q
 from decimal import Decimal
 from datetime import date
-from .base import Category,  SoftDeleteModel
+from .base import Category,  SoftDeleteModel, active_index
 
 
 class Asset(SoftDeleteModel):
@@ -45,6 +46,11 @@ class Asset(SoftDeleteModel):
     # remarks = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            active_index("status", "category", name="asset_live_status_idx"),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
@@ -78,6 +84,59 @@ class DepreciationScheduler(SoftDeleteModel):
     created_at = models.DateTimeField(auto_now_add=True)
     posted_by=models.CharField(max_length=150, blank=True, null=True)
     total_depreciation=models.DecimalField(max_digits=15, decimal_places=2, default=0.0)
+    asset_count=models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Depreciation {self.period_from} - {self.period_to}"
+
+
+class DepreciationLedgerLine(models.Model):
+    """
+    Charge booked against one asset by a DepreciationScheduler run
+    """
+    scheduler = models.ForeignKey(DepreciationScheduler, on_delete=models.CASCADE, related_name="lines")
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="depreciation_lines")
+    method = models.CharField(max_length=10, choices=Asset.DEPRECIATION_METHOD)
+    days = models.PositiveIntegerField()
+    opening_value = models.DecimalField(max_digits=12, decimal_places=2)
+    depreciation = models.DecimalField(max_digits=12, decimal_places=2)
+    closing_value = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["asset", "scheduler"], name="depreciation_line_asset_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.depreciation}"
+
+class AssetValuationSnapshot(models.Model):
+    """
+    Book value of an asset at the end of a depreciation period.
+    Append only, history is never rewritten; as_of valuations start
+    from the latest snapshot on or before the requested date.
+    """
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="valuation_snapshots")
+    scheduler = models.ForeignKey(DepreciationScheduler, on_delete=models.SET_NULL, null=True, blank=True, related_name="snapshots")
+    as_of = models.DateField()
+    book_value = models.DecimalField(max_digits=12, decimal_places=2)
+    accumulated_depreciation = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("asset", "as_of")
+        indexes = [
+            models.Index(fields=["as_of"], name="asset_snapshot_as_of_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} @ {self.as_of}: {self.book_value}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Asset valuation snapshots are append only")
+        super().save(*args, **kwargs)
+
 
 class Expense(SoftDeleteModel):
     PAYMENT_CHOICES = [
@@ -105,8 +164,21 @@ class Expense(SoftDeleteModel):
     status = models.CharField(max_length=20,choices=STATUS_CHOICES,default="paid")
     description = models.TextField(blank=True, null=True)
     attachment = models.FileField(upload_to="expenses/",blank=True,null=True,help_text="Bill / Invoice / Receipt")
+    # set when a bank statement line is matched to the expense
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    bank_statement = models.ForeignKey("BankStatement", on_delete=models.SET_NULL, null=True, blank=True, related_name="expenses")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            active_index("branch", "expense_date", name="expense_live_branch_idx"),
+            models.Index(
+                fields=["expense_date"],
+                name="expense_unreconciled_idx",
+                condition=Q(is_deleted=False, reconciled_at__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.category} - ₹{self.amount}"
 
@@ -0,0 +1,230 @@
+# dashboards/super_admin/services/attendance_marking.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_time
+
+from dashboards.super_admin.models.hr import Attendance, AttendanceMonthlySummary, Employee
+
+
+BULK_BATCH_SIZE = 500
+MAX_BULK_DAYS = 31
+MAX_BULK_ROWS = 50000
+
+ATTENDANCE_STATUSES = {value for value, _ in Attendance._meta.get_field("status").choices}
+
+# a conflicting (date, employee) row is overwritten, soft deleted ones come back
+UPSERT_FIELDS = ["status", "check_in", "check_out", "note", "is_deleted", "deleted_at"]
+
+
+class BulkAttendanceError(Exception):
+    pass
+
+
+def _parse_dates(data):
+    if data.get("date"):
+        day = parse_date(str(data["date"]))
+        if not day:
+            raise BulkAttendanceError("date must be YYYY-MM-DD")
+        return [day]
+
+    date_from = parse_date(str(data.get("date_from") or ""))
+    date_to = parse_date(str(data.get("date_to") or ""))
+    if not date_from or not date_to:
+        raise BulkAttendanceError("date or date_from / date_to are required")
+    if date_to < date_from:
+        raise BulkAttendanceError("date_to must be on or after date_from")
+
+    days = (date_to - date_from).days + 1
+    if days > MAX_BULK_DAYS:
+        raise BulkAttendanceError(f"A range can cover at most {MAX_BULK_DAYS} days")
+
+    skip = data.get("skip_weekdays") or []
+    if not isinstance(skip, (list, tuple)):
+        raise BulkAttendanceError("skip_weekdays must be a list of weekdays 0-6 (Monday = 0)")
+    try:
+        skip = {int(day) for day in skip}
+    except (TypeError, ValueError):
+        skip = None
+    if skip is None or not skip <= set(range(7)):
+        raise BulkAttendanceError("skip_weekdays must be a list of weekdays 0-6 (Monday = 0)")
+    return [
+        date_from + timedelta(days=offset)
+        for offset in range(days)
+        if (date_from + timedelta(days=offset)).weekday() not in skip
+    ]
+
+
+def _parse_time(value):
+    if value in (None, ""):
+        return None, None
+    parsed = parse_time(str(value))
+    if parsed is None:
+        return None, f"Invalid time: {value}"
+    return parsed, None
+
+
+def build_rows(data):
+    """
+    One row per (record, date) from the bulk payload:
+
+    {
+      "date": "2026-01-08" | "date_from" + "date_to" (+ "skip_weekdays": [6]),
+      "defaults": {"status": "present", "check_in": "09:00", "check_out": "18:00"},
+      "records": [{"employee_id": 10}, {"employee_id": 11, "status": "leave", "note": "Sick"}]
+    }
+
+    "employee_ids": [10, 11] is shorthand for records that only use the defaults.
+    """
+    dates = _parse_dates(data)
+    defaults = data.get("defaults") or {}
+
+    records = list(data.get("records") or [])
+    records += [{"employee_id": pk} for pk in data.get("employee_ids") or []]
+    if not records:
+        raise BulkAttendanceError("records or employee_ids are required")
+
+    if len(records) * len(dates) > MAX_BULK_ROWS:
+        raise BulkAttendanceError(f"At most {MAX_BULK_ROWS} attendance rows per request")
+
+    rows = []
+    for record in records:
+        merged = {**defaults, **record}
+        errors = []
+
+        try:
+            employee_id = int(merged.get("employee_id"))
+        except (TypeError, ValueError):
+            employee_id = merged.get("employee_id")
+            errors.append("employee_id is required")
+
+        status = merged.get("status")
+        if status not in ATTENDANCE_STATUSES:
+            errors.append(f"status must be one of {', '.join(sorted(ATTENDANCE_STATUSES))}")
+
+        check_in, error = _parse_time(merged.get("check_in"))
+        if error:
+            errors.append(error)
+        check_out, error = _parse_time(merged.get("check_out"))
+        if error:
+            errors.append(error)
+
+        for day in dates:
+            rows.append({
+                "employee_id": employee_id,
+                "date": day,
+                "status": status,
+                "check_in": check_in,
+                "check_out": check_out,
+                "note": merged.get("note", ""),
+                "error": "; ".join(errors) or None,
+            })
+
+    return rows
+
+
+def bulk_mark_attendance(rows):
+    """
+    Upsert attendance rows in a handful of queries:
+    one in_bulk for the employees, one read of the existing keys
+    (created, updated or restored from a soft delete), batched
+    INSERT .. ON CONFLICT, the monthly summary refresh and one id read back.
+    Returns one result per input row, in order.
+    """
+    employee_ids = {row["employee_id"] for row in rows if not row["error"]}
+    employees = Employee.objects.in_bulk(employee_ids) if employee_ids else {}
+
+    for row in rows:
+        if not row["error"] and row["employee_id"] not in employees:
+            row["error"] = "Invalid employee"
+
+    valid = [row for row in rows if not row["error"]]
+
+    # last one wins when a payload repeats (employee, date)
+    keyed = {(row["employee_id"], row["date"]): row for row in valid}
+
+    ids = {}
+    existing = {}
+    if keyed:
+        dates = [key[1] for key in keyed]
+        scope = Attendance.all_objects.filter(
+            employee_id__in={key[0] for key in keyed},
+            date__range=(min(dates), max(dates)),
+        )
+
+        # key -> is_deleted of the row the upsert will overwrite
+        existing = {
+            (employee_id, day): is_deleted
+            for employee_id, day, is_deleted in scope.values_list("employee_id", "date", "is_deleted")
+            if (employee_id, day) in keyed
+        }
+
+        with transaction.atomic():
+            Attendance.all_objects.bulk_create(
+                [
+                    Attendance(
+                        employee_id=employee_id,
+                        date=day,
+                        status=row["status"],
+                        check_in=row["check_in"],
+                        check_out=row["check_out"],
+                        note=row["note"],
+                        is_deleted=False,
+                        deleted_at=None,
+                    )
+                    for (employee_id, day), row in keyed.items()
+                ],
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["date", "employee"],
+                update_fields=UPSERT_FIELDS,
+            )
+            # bulk_create skips Attendance.save, refresh the month grids here
+            AttendanceMonthlySummary.refresh_for(keyed)
+
+        ids = {
+            (employee_id, day): pk
+            for pk, employee_id, day in scope.values_list("id", "employee_id", "date")
+            if (employee_id, day) in keyed
+        }
+
+    results = []
+    for row in rows:
+        key = (row["employee_id"], row["date"])
+        if row["error"]:
+            results.append({
+                "employee_id": row["employee_id"],
+                "date": row["date"],
+                "saved": False,
+                "error": row["error"],
+            })
+            continue
+
+        results.append({
+            "employee_id": row["employee_id"],
+            "date": row["date"],
+            "saved": True,
+            "attendance_id": ids.get(key),
+            "created": key not in existing,
+            "restored": existing.get(key, False),
+        })
+
+    return results
+
+
+def mark_attendance_single(row):
+    """
+    The one-employee path of AttendanceAPI.post, kept for the benchmark
+    """
+    employee = Employee.objects.get(id=row["employee_id"])
+    with transaction.atomic():
+        return Attendance.objects.update_or_create(
+            employee=employee,
+            date=row["date"],
+            defaults={
+                "status": row["status"],
+                "check_in": row["check_in"],
+                "check_out": row["check_out"],
+                "note": row["note"],
+            },
+        )
@@ -0,0 +1,384 @@
+# dashboards/super_admin/services/bank_statement.py
+import csv
+import io
+import itertools
+import re
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from dashboards.super_admin.models.finance import BankStatement, BankStatementLine
+from dashboards.super_admin.models.gst import Receipt
+from dashboards.super_admin.models.inventory import Expense
+
+
+# statement lines parsed, matched and written per transaction
+IMPORT_CHUNK_SIZE = 5000
+
+LINE_BATCH_SIZE = 1000
+
+DEFAULT_DATE_WINDOW = 3
+
+STATEMENT_FORMATS = ("csv", "xlsx")
+
+# rows above the header (bank name, account, period ...) skipped at most
+HEADER_SCAN_ROWS = 30
+
+ZERO = Decimal("0.00")
+
+# normalised header -> column, first match wins
+COLUMN_ALIASES = {
+    "date": ("date", "txn date", "transaction date", "tran date", "value date", "posting date"),
+    "reference": (
+        "reference", "reference no", "ref no", "ref", "utr", "utr no", "transaction id",
+        "cheque no", "chq no", "chq ref no", "chq no ref no", "ref no cheque no", "instrument no",
+    ),
+    "narration": ("narration", "description", "particulars", "remarks", "details", "transaction details"),
+    "debit": ("debit", "dr", "withdrawal", "withdrawals", "withdrawal amt", "withdrawal amount", "debit amount"),
+    "credit": ("credit", "cr", "deposit", "deposits", "deposit amt", "deposit amount", "credit amount"),
+    "amount": ("amount", "txn amount", "transaction amount"),
+    "direction": ("dr cr", "cr dr", "debit credit", "type"),
+}
+
+DATE_FORMATS = (
+    "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y-%m-%d",
+    "%d/%m/%y", "%d-%m-%y", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y", "%d %b %y",
+)
+
+
+class BankStatementError(Exception):
+    pass
+
+
+def normalise_header(value):
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def normalise_reference(value):
+    return re.sub(r"[^A-Z0-9]", "", str(value or "").upper())
+
+
+def statement_format(file_name):
+    extension = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+    if extension not in STATEMENT_FORMATS:
+        raise BankStatementError("Statement must be a .csv or .xlsx file")
+    return extension
+
+
+# =====================================================
+# PARSING (lazy, one row at a time)
+# =====================================================
+def read_rows(file, file_format):
+    """
+    Raw rows of a statement as sequences, read lazily: csv.reader over a
+    text wrapper, or openpyxl read-only mode (rows streamed from the
+    sheet XML, never the whole workbook in memory)
+    """
+    if file_format == "csv":
+        yield from csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline=""))
+        return
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def column_map(row):
+    names = [normalise_header(value) for value in row]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(names):
+            if name in aliases:
+                columns.setdefault(field, index)
+    if "date" in columns and columns.keys() & {"credit", "debit", "amount"}:
+        return columns
+    return None
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    text = str(value or "").strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        raise ValueError(f"Unreadable date {text!r}")
+
+
+def parse_amount(value):
+    """
+    Signed Decimal: "1,250.00", 1250.0, "1250 Cr", "(1250)", "1250 Dr" -> -1250; blank -> 0
+    """
+    if value is None or value == "":
+        return ZERO
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+
+    text = str(value).strip().upper().replace(",", "").replace("₹", "")
+    sign = 1
+    if text.endswith("DR"):
+        sign, text = -1, text[:-2]
+    elif text.endswith("CR"):
+        text = text[:-2]
+    if text.startswith("(") and text.endswith(")"):
+        sign, text = -sign, text[1:-1]
+
+    text = text.strip()
+    if not text or text == "-":
+        return ZERO
+    try:
+        return (sign * Decimal(text)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"Unreadable amount {value!r}")
+
+
+def _cell(row, columns, field):
+    index = columns.get(field)
+    return row[index] if index is not None and index < len(row) else None
+
+
+def parse_line(line_no, row, columns):
+    line = {
+        "line_no": line_no,
+        "txn_date": None,
+        "credit": ZERO,
+        "debit": ZERO,
+        "reference_no": str(_cell(row, columns, "reference") or "").strip()[:100],
+        "narration": str(_cell(row, columns, "narration") or "").strip()[:255],
+        "raw": ["" if value is None else str(value) for value in row],
+        "error": "",
+    }
+
+    try:
+        line["txn_date"] = parse_date(_cell(row, columns, "date"))
+
+        if "credit" in columns or "debit" in columns:
+            line["credit"] = abs(parse_amount(_cell(row, columns, "credit")))
+            line["debit"] = abs(parse_amount(_cell(row, columns, "debit")))
+        else:
+            amount = parse_amount(_cell(row, columns, "amount"))
+            direction = normalise_header(_cell(row, columns, "direction"))
+            if direction in ("dr", "debit", "d") or (not direction and amount < 0):
+                line["debit"] = abs(amount)
+            else:
+                line["credit"] = abs(amount)
+    except ValueError as exc:
+        line["error"] = str(exc)
+        return line
+
+    if not line["credit"] and not line["debit"]:
+        line["error"] = "No amount on line"
+    elif line["credit"] and line["debit"]:
+        line["error"] = "Line has both a credit and a debit"
+    return line
+
+
+def parse_lines(rows):
+    """
+    Statement lines (dicts) from raw rows: the header is found in the
+    first HEADER_SCAN_ROWS rows, blank rows are skipped
+    """
+    rows = iter(rows)
+    columns = None
+    line_no = 0
+    for line_no, row in enumerate(itertools.islice(rows, HEADER_SCAN_ROWS), start=1):
+        columns = column_map(row)
+        if columns:
+            break
+    if not columns:
+        raise BankStatementError(
+            f"No header with a date and an amount column in the first {HEADER_SCAN_ROWS} rows"
+        )
+
+    for line_no, row in enumerate(rows, start=line_no + 1):
+        if all(value is None or str(value).strip() == "" for value in row):
+            continue
+        yield parse_line(line_no, row, columns)
+
+
+# =====================================================
+# MATCHING
+# =====================================================
+class CandidateIndex:
+    """
+    Unreconciled receipts (credits) and expenses (debits) of a date range,
+    hashed on (kind, amount, reference) and on (kind, amount, date). A
+    line is matched on its reference within the date window first, else
+    on the amount at the nearest date of the window (never against a
+    booked row carrying a different reference).
+    """
+
+    def __init__(self, window):
+        self.offsets = sorted(range(-window, window + 1), key=abs)
+        self.window = window
+        self.by_reference = {}
+        self.by_date = {}
+        self.references = {}
+        self.used = set()
+
+    def add(self, kind, pk, amount, reference, booked_on):
+        reference = normalise_reference(reference)
+        if reference:
+            self.by_reference.setdefault((kind, amount, reference), []).append((booked_on, pk))
+            self.references[(kind, pk)] = reference
+        self.by_date.setdefault((kind, amount, booked_on), []).append(pk)
+
+    def match(self, kind, amount, reference, txn_date):
+        reference = normalise_reference(reference)
+
+        if reference:
+            best = None
+            for booked_on, pk in self.by_reference.get((kind, amount, reference), ()):
+                gap = abs((booked_on - txn_date).days)
+                if (kind, pk) not in self.used and gap <= self.window and (best is None or gap < best[0]):
+                    best = (gap, pk)
+            if best:
+                self.used.add((kind, best[1]))
+                return best[1]
+
+        for offset in self.offsets:
+            for pk in self.by_date.get((kind, amount, txn_date + timedelta(days=offset)), ()):
+                booked_reference = self.references.get((kind, pk))
+                if (kind, pk) in self.used or (reference and booked_reference and booked_reference != reference):
+                    continue
+                self.used.add((kind, pk))
+                return pk
+        return None
+
+
+def load_candidates(first, last, window, branch_id=None):
+    """
+    Two queries: the bank (non cash) receipts and expenses booked between
+    first - window and last + window that no statement line matched yet
+    """
+    index = CandidateIndex(window)
+    span = (first - timedelta(days=window), last + timedelta(days=window))
+
+    receipts = Receipt.objects.filter(reconciled_at__isnull=True, payment_date__range=span).exclude(payment_mode="cash")
+    expenses = Expense.objects.filter(reconciled_at__isnull=True, expense_date__range=span).exclude(payment_mode="cash")
+    if branch_id:
+        receipts = receipts.filter(branch_id=branch_id)
+        expenses = expenses.filter(branch_id=branch_id)
+
+    # the bank credits what is left after TDS
+    for pk, amount, reference, booked_on in receipts.values_list("id", "net_amount", "reference_no", "payment_date"):
+        index.add("receipt", pk, amount, reference, booked_on)
+    for pk, amount, reference, booked_on in expenses.values_list("id", "amount", "reference_no", "expense_date"):
+        index.add("expense", pk, amount, reference, booked_on)
+    return index
+
+
+# =====================================================
+# IMPORT
+# =====================================================
+def _import_chunk(statement, lines, counts):
+    dated = [line["txn_date"] for line in lines if not line["error"]]
+    index = load_candidates(min(dated), max(dated), statement.date_window, statement.branch_id) if dated else None
+
+    receipt_ids = []
+    expense_ids = []
+    review = []
+    for line in lines:
+        if line["error"]:
+            counts["errors"] += 1
+            review.append(BankStatementLine(statement=statement, status="error", note=line["error"][:255], **_line_fields(line)))
+            continue
+
+        if line["credit"]:
+            pk = index.match("receipt", line["credit"], line["reference_no"], line["txn_date"])
+            matched = receipt_ids
+        else:
+            pk = index.match("expense", line["debit"], line["reference_no"], line["txn_date"])
+            matched = expense_ids
+
+        if pk is None:
+            counts["unmatched"] += 1
+            review.append(BankStatementLine(statement=statement, status="unmatched", **_line_fields(line)))
+        else:
+            matched.append(pk)
+
+    now = timezone.now()
+    with transaction.atomic():
+        if receipt_ids:
+            Receipt.objects.filter(pk__in=receipt_ids).update(reconciled_at=now, bank_statement=statement)
+        if expense_ids:
+            Expense.objects.filter(pk__in=expense_ids).update(reconciled_at=now, bank_statement=statement)
+        BankStatementLine.objects.bulk_create(review, batch_size=LINE_BATCH_SIZE)
+
+    counts["lines"] += len(lines)
+    counts["matched_receipts"] += len(receipt_ids)
+    counts["matched_expenses"] += len(expense_ids)
+
+
+def _line_fields(line):
+    return {name: line[name] for name in ("line_no", "txn_date", "credit", "debit", "reference_no", "narration", "raw")}
+
+
+def import_statement(file, file_name, branch_id=None, user=None, date_window=None):
+    """
+    Stream a CSV / XLSX bank statement into the books, IMPORT_CHUNK_SIZE
+    lines at a time so memory stays flat whatever the statement size:
+    each chunk loads the unreconciled receipts / expenses of its date
+    range (two queries), matches its lines through CandidateIndex, stamps
+    the matched rows with two UPDATEs and bulk inserts the unmatched and
+    unreadable lines for review, in its own transaction.
+    Returns the BankStatement with its counts.
+    """
+    file_format = statement_format(file_name)
+    clock = time.perf_counter()
+
+    statement = BankStatement.objects.create(
+        branch_id=branch_id,
+        file_name=file_name[:255],
+        file_format=file_format,
+        date_window=DEFAULT_DATE_WINDOW if date_window is None else date_window,
+        imported_by=user,
+        started_at=timezone.now(),
+    )
+
+    counts = dict.fromkeys(("lines", "matched_receipts", "matched_expenses", "unmatched", "errors"), 0)
+    chunks = 0
+    try:
+        lines = parse_lines(read_rows(file, file_format))
+        while True:
+            chunk = list(itertools.islice(lines, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            _import_chunk(statement, chunk, counts)
+            chunks += 1
+    except Exception as exc:
+        # chunks already written stay, their rows are reconciled
+        for name, value in counts.items():
+            setattr(statement, name, value)
+        statement.status = "failed"
+        statement.error = str(exc)
+        statement.finished_at = timezone.now()
+        statement.save()
+        raise BankStatementError(f"Statement import failed: {exc}") from exc
+
+    elapsed = time.perf_counter() - clock
+    for name, value in counts.items():
+        setattr(statement, name, value)
+    statement.status = "completed"
+    statement.metrics = {
+        "chunks": chunks,
+        "total_ms": round(elapsed * 1000, 1),
+        "lines_per_s": round(counts["lines"] / elapsed, 1) if elapsed else None,
+    }
+    statement.finished_at = timezone.now()
+    statement.save()
+    return statement
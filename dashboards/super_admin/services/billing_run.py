@@ -0,0 +1,342 @@
+# dashboards/super_admin/services/billing_run.py
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from dashboards.branch.models.branch import Branch
+from dashboards.super_admin.models.base import chunked, immediate_atomic, month_bounds
+from dashboards.super_admin.models.clients import ClientUsage, Clients
+from dashboards.super_admin.models.gst import BillingRun, GSTInvoice
+from dashboards.super_admin.services.document_sequence import document_sequences
+from dashboards.super_admin.services.gst_tax import compute_gst, crosses_states, gst_rate_for, hsn_rates
+from dashboards.super_admin.services.gstin import state_code
+from dashboards.super_admin.services.receivables import post_invoices
+from dashboards.super_admin.services.slab_index import slab_amount, slab_index
+
+
+# clients per unit of work handed to a worker process
+PARTITION_SIZE = 200
+
+INVOICE_BATCH_SIZE = 500
+
+CYCLE_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+ZERO = Decimal("0.00")
+
+
+class BillingError(Exception):
+    pass
+
+
+# =====================================================
+# PERIODS
+# =====================================================
+def cycles_closing(period_to):
+    """
+    Billing cycles that end with this month: quarters end Jun / Sep / Dec / Mar,
+    the (financial) year ends in March
+    """
+    cycles = ["monthly"]
+    if period_to.month % 3 == 0:
+        cycles.append("quarterly")
+    if period_to.month == 3:
+        cycles.append("yearly")
+    return cycles
+
+
+def cycle_period(cycle, period_to):
+    """
+    (first day, last day) of the cycle ending with period_to's month
+    """
+    first = period_to.replace(day=1)
+    for _ in range(CYCLE_MONTHS[cycle] - 1):
+        first = (first - timedelta(days=1)).replace(day=1)
+    return first, period_to
+
+
+# =====================================================
+# PRICING
+# =====================================================
+def price_client(clients, usage, slabs):
+    """
+    Invoice lines for one client: its flat fee when billed flat, plus
+    every billing_mode it used in the period priced at the matching tier
+    (slabs is a SlabIndex). Modes without quantity tiers take the client's
+    own slab first. Returns (lines, problems).
+    """
+    lines = []
+    problems = []
+
+    own = clients.slab_rate
+    if own is not None and own.billing_mode == "flat":
+        lines.append({
+            "billing_mode": "flat",
+            "slab_rate_id": own.pk,
+            "quantity": 1,
+            "amount": str(own.amount),
+        })
+
+    for billing_mode, quantity in sorted(usage.items()):
+        if own is not None and own.billing_mode == billing_mode and own.min_qty is None:
+            slab = own
+        else:
+            slab = slabs.tier_for(billing_mode, quantity)
+        if slab is None:
+            problems.append(f"No active slab for {billing_mode} at {quantity}")
+            continue
+        lines.append({
+            "billing_mode": billing_mode,
+            "slab_rate_id": slab.pk,
+            "quantity": quantity,
+            "amount": str(slab_amount(slab, quantity)),
+        })
+
+    return lines, problems
+
+
+# =====================================================
+# ONE PARTITION (runs in a worker process)
+# =====================================================
+def already_billed(client_ids, period_to):
+    return set(
+        GSTInvoice.objects.filter(
+            clients_id__in=client_ids,
+            billing_run__isnull=False,
+            period_to=period_to,
+        ).values_list("clients_id", flat=True)
+    )
+
+
+def bill_partition(client_ids, branch_id, period_to, run_id=None, dry_run=False):
+    """
+    Price and invoice one partition of clients in its own transaction:
+    one query for the clients, one for the ones already billed, one
+    GROUP BY of usage per cycle, one take_many per client for its invoice
+    number (DocumentControl), a bulk insert of the invoices and their
+    receivables ledger entries. The priced clients are locked and checked
+    for invoices again before writing, a concurrent run that got there
+    first wins; the unique (clients, period_to) constraint on run
+    invoices backs this up where row locks are not available.
+    """
+    clock = time.perf_counter()
+    timings = {}
+
+    branch = Branch.objects.get(pk=branch_id)
+    slabs = slab_index.get()
+    rates = hsn_rates()
+
+    clients = list(
+        Clients.objects.filter(pk__in=client_ids).select_related("slab_rate").order_by("id")
+    )
+    periods = {client.pk: cycle_period(client.billing_cycle, period_to) for client in clients}
+
+    billed = already_billed(client_ids, period_to)
+
+    usage = {}
+    by_period = {}
+    for client in clients:
+        by_period.setdefault(periods[client.pk], []).append(client.pk)
+    for (first, last), ids in by_period.items():
+        for row in ClientUsage.objects.filter(
+            clients_id__in=ids, usage_date__range=(first, last)
+        ).values("clients_id", "billing_mode").annotate(quantity=Sum("quantity")):
+            usage.setdefault(row["clients_id"], {})[row["billing_mode"]] = row["quantity"]
+    timings["load_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+
+    step = time.perf_counter()
+    skipped = []
+    priced = []
+    for client in clients:
+        if client.pk in billed:
+            skipped.append({"clients_id": client.pk, "reason": "Already billed for this period"})
+            continue
+
+        lines, problems = price_client(client, usage.get(client.pk, {}), slabs)
+        sub_total = sum((Decimal(line["amount"]) for line in lines), ZERO)
+        if problems:
+            skipped.append({"clients_id": client.pk, "reason": "; ".join(problems)})
+            continue
+        if not sub_total:
+            skipped.append({"clients_id": client.pk, "reason": "Nothing to bill"})
+            continue
+        priced.append((client, lines, sub_total))
+    timings["price_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    step = time.perf_counter()
+    today = timezone.now().date()
+    branch_state = branch.gst_state_code
+    invoices = []
+
+    # reads come first, so on SQLite the write lock is taken at BEGIN
+    # (IMMEDIATE): a deferred transaction cannot wait for another worker's
+    # lock when it upgrades, it fails with "database is locked" at once
+    with transaction.atomic() if dry_run else immediate_atomic():
+        if not dry_run:
+            locked = list(
+                Clients.objects.select_for_update().filter(
+                    pk__in=[client.pk for client, _, _ in priced]
+                ).order_by("id").values_list("id", flat=True)
+            )
+            billed = already_billed(locked, period_to)
+            for client, _, _ in priced:
+                if client.pk in billed:
+                    skipped.append({"clients_id": client.pk, "reason": "Already billed for this period"})
+            priced = [row for row in priced if row[0].pk not in billed]
+
+        for client, lines, sub_total in priced:
+            invoice_no = None
+            if not dry_run:
+                try:
+                    invoice_no = document_sequences.take_many(client.pk, "invoice", 1)[0]
+                except ValidationError as exc:
+                    skipped.append({"clients_id": client.pk, "reason": exc.messages[0]})
+                    continue
+
+            first, last = periods[client.pk]
+            inter_state = crosses_states(branch_state, client.gst_state_code or state_code(client.gstin))
+            invoices.append(GSTInvoice(
+                invoice_no=invoice_no,
+                clients=client,
+                branch=branch,
+                billing_run_id=run_id,
+                period_from=first,
+                period_to=last,
+                usage=lines,
+                due_date=today + timedelta(days=client.invoice_due_days or 0),
+                sub_total=sub_total,
+                **compute_gst(sub_total, gst_rate_for(client.slab_rate, client, rates), inter_state),
+            ))
+
+        if not dry_run:
+            GSTInvoice.objects.bulk_create(invoices, batch_size=INVOICE_BATCH_SIZE)
+            post_invoices(invoices)
+    timings["write_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    return {
+        "clients": len(clients),
+        "skipped": skipped,
+        "invoices": [
+            {
+                "clients_id": invoice.clients_id,
+                "invoice_no": invoice.invoice_no,
+                "period_from": invoice.period_from,
+                "sub_total": invoice.sub_total,
+                "tax": invoice.grand_total - invoice.sub_total,
+                "grand_total": invoice.grand_total,
+            }
+            for invoice in invoices
+        ],
+        "timings": timings,
+    }
+
+
+def _bill_partition_in_worker(*args):
+    try:
+        return bill_partition(*args)
+    finally:
+        connections.close_all()
+
+
+# =====================================================
+# RUN
+# =====================================================
+def run_billing(branch_id, month, user=None, workers=1, dry_run=False):
+    """
+    Invoice every client of the branch (Clients.billing_branch) whose
+    billing cycle closes with month.
+    Clients are split into partitions of PARTITION_SIZE; with workers > 1
+    the partitions run in a process pool, each in its own transaction, so
+    a failed partition leaves the others billed (a re-run skips them).
+    Returns (BillingRun, invoice rows). The run is unsaved on dry_run.
+    """
+    started_at = timezone.now()
+    clock = time.perf_counter()
+
+    _, period_to = month_bounds(month)
+    cycles = cycles_closing(period_to)
+
+    if not Branch.objects.filter(pk=branch_id).exists():
+        raise BillingError("Branch not found")
+
+    client_ids = list(
+        Clients.objects.filter(
+            billing_branch_id=branch_id, billing_cycle__in=cycles
+        ).order_by("id").values_list("id", flat=True)
+    )
+    partitions = list(chunked(client_ids, PARTITION_SIZE))
+
+    run = BillingRun(
+        branch_id=branch_id,
+        period_to=period_to,
+        cycles=cycles,
+        run_by=user,
+        clients=len(client_ids),
+        started_at=started_at,
+    )
+    if not dry_run:
+        run.save()
+
+    results = []
+    try:
+        if workers > 1 and len(partitions) > 1:
+            # fresh interpreters, nothing inherited from this process' connection
+            connections.close_all()
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                min(workers, len(partitions)), mp_context=context, initializer=django.setup
+            ) as pool:
+                futures = [
+                    pool.submit(_bill_partition_in_worker, partition, branch_id, period_to, run.pk, dry_run)
+                    for partition in partitions
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [
+                bill_partition(partition, branch_id, period_to, run.pk, dry_run)
+                for partition in partitions
+            ]
+    except Exception as exc:
+        if dry_run:
+            raise BillingError(f"Billing run failed: {exc}") from exc
+        run.status = "failed"
+        run.error = str(exc)
+        run.finished_at = timezone.now()
+        run.save()
+        raise BillingError(f"Billing run failed: {exc}") from exc
+
+    invoices = [row for result in results for row in result["invoices"]]
+    elapsed = time.perf_counter() - clock
+
+    run.invoices_created = 0 if dry_run else len(invoices)
+    run.skipped = [
+        {"clients_id": skip["clients_id"], "reason": skip["reason"]}
+        for result in results for skip in result["skipped"]
+    ]
+    run.total_sub_total = sum((row["sub_total"] for row in invoices), ZERO)
+    run.total_tax = sum((row["tax"] for row in invoices), ZERO)
+    run.total_grand = sum((row["grand_total"] for row in invoices), ZERO)
+    run.metrics = {
+        "workers": min(workers, len(partitions)) if workers > 1 and len(partitions) > 1 else 1,
+        "partitions": len(partitions),
+        # summed over partitions, they overlap in time with several workers
+        **{
+            name: round(sum(result["timings"][name] for result in results), 1)
+            for name in ("load_ms", "price_ms", "write_ms")
+        },
+        "total_ms": round(elapsed * 1000, 1),
+        "clients_per_s": round(len(client_ids) / elapsed, 1) if elapsed else None,
+        "invoices_per_s": round(len(invoices) / elapsed, 1) if elapsed else None,
+    }
+    run.finished_at = timezone.now()
+    if not dry_run:
+        run.save()
+
+    return run, invoices
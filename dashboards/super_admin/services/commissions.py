@@ -0,0 +1,197 @@
+# dashboards/super_admin/services/commissions.py
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, DecimalField, ExpressionWrapper, F, Max, Value, When
+from django.utils import timezone
+
+from dashboards.super_admin.models.agent import (
+    Agent,
+    CommissionRun,
+    CommissionStatement,
+    Deal,
+    DealStatusEvent,
+)
+
+
+COMMISSION_BATCH_SIZE = 500
+
+# agent commission_trigger -> the deal status that earns the commission
+TRIGGER_STATUS = {
+    "deal_closure": "converted",
+    "on_payment_received": "payment_received",
+}
+
+ZERO = Decimal("0.00")
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+class CommissionError(Exception):
+    pass
+
+
+def commission_expressions():
+    """
+    Same rules as Deal.calculate_commission, as annotations:
+    percentage -> deal value x rate / 100, flat -> the agent's amount
+    """
+    return {
+        "commission": ExpressionWrapper(
+            Case(
+                When(agent__commission_type="percentage", then=F("deal_value") * F("agent__commission_value") / Value(Decimal("100"))),
+                When(agent__commission_type="flat", then=F("agent__commission_value")),
+                default=Value(ZERO),
+                output_field=MONEY,
+            ),
+            output_field=MONEY,
+        ),
+        "flat_exceeds_value": Case(
+            When(agent__commission_type="flat", agent__commission_value__gt=F("deal_value"), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    }
+
+
+def triggered_deals(events):
+    """
+    Deals earning a commission from the events: one annotated query per
+    trigger type for the deals that reached their agent's trigger status
+    and have no commission yet
+    """
+    rows = []
+    for trigger, status in TRIGGER_STATUS.items():
+        rows.extend(
+            Deal.objects.filter(
+                agent__isnull=False,
+                agent__commission_trigger=trigger,
+                commission_calculated=False,
+                pk__in=events.filter(to_status=status).values("deal_id"),
+            ).annotate(
+                trigger=Value(trigger), **commission_expressions()
+            ).order_by("agent_id", "id").values(
+                "id", "agent_id", "client_id", "deal_value", "trigger", "commission", "flat_exceeds_value"
+            )
+        )
+    return rows
+
+
+def payout_to(agent):
+    if agent.payment_mode == "bank" and agent.account_number:
+        return f"{agent.bank_name or ''} {agent.account_number} {agent.ifsc_code or ''}".strip()
+    if agent.payment_mode == "upi":
+        return agent.upi_id or ""
+    return ""
+
+
+def run_commissions(user=None, dry_run=False, event_ids=None):
+    """
+    Process the pending DealStatusEvents (only event_ids when given) in
+    one transaction: the events present when the run starts are fixed by
+    their max id, the triggered deals come from one annotated query per
+    trigger type, commissions are written with one bulk_update, every
+    agent gets a payout statement (one bulk insert) and the events are
+    marked processed with one UPDATE.
+    Returns (CommissionRun, statements); unsaved on dry_run.
+    """
+    started_at = timezone.now()
+    clock = time.perf_counter()
+    timings = {}
+
+    run = CommissionRun(run_by=user, started_at=started_at)
+
+    try:
+        with transaction.atomic():
+            pending = DealStatusEvent.objects.filter(processed_at__isnull=True)
+            if event_ids is not None:
+                pending = pending.filter(pk__in=event_ids)
+            last_id = pending.aggregate(last=Max("id"))["last"]
+            events = pending.filter(id__lte=last_id or 0)
+
+            rows = triggered_deals(events)
+            agents = Agent.objects.in_bulk({row["agent_id"] for row in rows})
+            timings["load_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+
+            step = time.perf_counter()
+            rejected = []
+            earned = []
+            for row in rows:
+                if row["flat_exceeds_value"]:
+                    rejected.append({
+                        "deal_id": row["id"],
+                        "agent_id": row["agent_id"],
+                        "reason": "Flat commission cannot exceed deal value.",
+                    })
+                    continue
+                row["commission"] = row["commission"].quantize(Decimal("0.01"))
+                earned.append(row)
+
+            per_agent = {}
+            for row in earned:
+                per_agent.setdefault(row["agent_id"], []).append(row)
+
+            statements = [
+                CommissionStatement(
+                    agent=agents[agent_id],
+                    deals=len(lines),
+                    deal_value=sum((line["deal_value"] for line in lines), ZERO),
+                    total_commission=sum((line["commission"] for line in lines), ZERO),
+                    lines=[
+                        {
+                            "deal_id": line["id"],
+                            "client_id": line["client_id"],
+                            "deal_value": str(line["deal_value"]),
+                            "trigger": line["trigger"],
+                            "commission": str(line["commission"]),
+                        }
+                        for line in lines
+                    ],
+                    payment_mode=agents[agent_id].payment_mode,
+                    payout_to=payout_to(agents[agent_id]),
+                )
+                for agent_id, lines in per_agent.items()
+            ]
+            timings["compute_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+            run.event_count = events.count()
+            run.deals_commissioned = len(earned)
+            run.agents = len(statements)
+            run.total_commission = sum((row["commission"] for row in earned), ZERO)
+            run.rejected = rejected
+
+            if not dry_run:
+                step = time.perf_counter()
+                now = timezone.now()
+                run.save()
+
+                Deal.objects.bulk_update(
+                    [
+                        Deal(pk=row["id"], commission_amount=row["commission"], commission_calculated=True, updated_at=now)
+                        for row in earned
+                    ],
+                    ["commission_amount", "commission_calculated", "updated_at"],
+                    batch_size=COMMISSION_BATCH_SIZE,
+                )
+                for statement in statements:
+                    statement.run = run
+                CommissionStatement.objects.bulk_create(statements, batch_size=COMMISSION_BATCH_SIZE)
+                events.update(processed_at=now, commission_run=run)
+                timings["write_ms"] = round((time.perf_counter() - step) * 1000, 1)
+    except Exception as exc:
+        if dry_run:
+            raise CommissionError(f"Commission run failed: {exc}") from exc
+        run.pk = None
+        run.status = "failed"
+        run.error = str(exc)
+        run.finished_at = timezone.now()
+        run.save()
+        raise CommissionError(f"Commission run failed: {exc}") from exc
+
+    timings["total_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+    run.metrics = timings
+    run.finished_at = timezone.now()
+    if not dry_run:
+        run.save(update_fields=["metrics", "finished_at"])
+    return run, statements
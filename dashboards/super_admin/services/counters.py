@@ -0,0 +1,75 @@
+# dashboards/super_admin/services/counters.py
+from django.db.models import F, Max
+from django.utils import timezone
+
+from dashboards.super_admin.models.base import immediate_atomic
+from dashboards.super_admin.models.controll_no import NumberCounter
+from dashboards.super_admin.models.finance import BillDetails, GoodsReceiptNote, PurchaseOrder
+
+
+def take(name, count=1, seed=None):
+    """
+    Reserve count consecutive values on the named counter, returns them as a range.
+
+    The UPDATE runs first: PostgreSQL row-locks the counter and SQLite
+    holds its write lock (the block opens with BEGIN IMMEDIATE, callers
+    with their own transaction open it with immediate_atomic()) until the
+    caller's transaction ends, so concurrent callers queue instead of
+    reading the same value. A missing counter is inserted
+    with ON CONFLICT DO NOTHING, starting from seed() when given, so the
+    first allocation of a series needs no retry either.
+    """
+    counter = NumberCounter.objects.filter(name=name)
+
+    with immediate_atomic():
+        updated = counter.update(value=F("value") + count, updated_at=timezone.now())
+
+        if not updated:
+            NumberCounter.objects.bulk_create(
+                [NumberCounter(name=name, value=seed() if seed else 0)],
+                ignore_conflicts=True,
+            )
+            counter.update(value=F("value") + count, updated_at=timezone.now())
+
+        last = counter.values_list("value", flat=True).get()
+
+    return range(last - count + 1, last + 1)
+
+
+# =====================================================
+# YEARLY SERIES: PO-2026-00001
+# =====================================================
+def legacy_last_number(model, field, prefix):
+    """
+    Highest number issued before the series had a counter
+    """
+    last = (
+        model.all_objects
+        .filter(**{f"{field}__startswith": prefix})
+        .aggregate(last=Max(field))["last"]
+    )
+    return int(last.split("-")[-1]) if last else 0
+
+
+def yearly_numbers(code, model, field, count=1, year=None):
+    year = year or timezone.now().year
+    prefix = f"{code}-{year}-"
+
+    values = take(
+        f"{code}-{year}",
+        count,
+        seed=lambda: legacy_last_number(model, field, prefix),
+    )
+    return [f"{prefix}{value:05d}" for value in values]
+
+
+def next_po_number():
+    return yearly_numbers("PO", PurchaseOrder, "po_number")[0]
+
+
+def next_grn_number():
+    return yearly_numbers("GRN", GoodsReceiptNote, "grn_number")[0]
+
+
+def next_vendor_bill_number():
+    return yearly_numbers("VB", BillDetails, "voucher_number")[0]
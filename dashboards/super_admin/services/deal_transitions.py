@@ -0,0 +1,122 @@
+# dashboards/super_admin/services/deal_transitions.py
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from dashboards.super_admin.models.agent import Deal, DealStatusEvent
+from dashboards.super_admin.models.base import chunked
+from dashboards.super_admin.services.commissions import CommissionError, TRIGGER_STATUS, run_commissions
+
+
+# deals per pk__in chunk, status read, lock and UPDATE
+DEAL_BATCH_SIZE = 500
+
+EVENT_BATCH_SIZE = 500
+
+STATUS_LABELS = dict(Deal.DEAL_STATUS_CHOICES)
+
+
+class DealTransitionError(Exception):
+    pass
+
+
+def plan_transitions(current, to_status):
+    """
+    current -> {deal_id: status}. Checks every move against
+    Deal.STATUS_FLOW in memory. Returns ({from_status: [deal_ids]}, rejected)
+    """
+    groups = {}
+    rejected = []
+    for deal_id, status in current.items():
+        if status == to_status:
+            reason = f"Already {STATUS_LABELS[to_status]}"
+        elif to_status not in Deal.STATUS_FLOW.get(status, []):
+            reason = f"Cannot change status from {STATUS_LABELS.get(status, status)} to {STATUS_LABELS[to_status]}"
+        else:
+            groups.setdefault(status, []).append(deal_id)
+            continue
+        rejected.append({"deal_id": deal_id, "from_status": status, "reason": reason})
+    return groups, rejected
+
+
+def transition_deals(deal_ids, to_status, user=None):
+    """
+    Move many deals to to_status: one query for their current statuses,
+    the status flow checked in memory, then per DEAL_BATCH_SIZE deals the
+    rows still at the status as read (deal_status=old) are locked and
+    moved with one UPDATE. A deal changed by someone else in between is
+    left alone and reported instead of overwritten. Status events are bulk
+    inserted for the rows this call moved and, when to_status is a
+    commission trigger, the commission batch runs over exactly these events.
+    Returns a dict with applied ids, rejected deals and the commission run.
+    """
+    if to_status not in STATUS_LABELS:
+        raise DealTransitionError(f"Unknown deal status {to_status!r}")
+
+    deal_ids = list(dict.fromkeys(deal_ids))
+    current = {}
+    for chunk in chunked(deal_ids, DEAL_BATCH_SIZE):
+        current.update(Deal.objects.filter(pk__in=chunk).values_list("id", "deal_status"))
+
+    groups, rejected = plan_transitions(current, to_status)
+    rejected.extend(
+        {"deal_id": deal_id, "from_status": None, "reason": "Deal not found"}
+        for deal_id in deal_ids if deal_id not in current
+    )
+
+    applied = []
+    events = []
+    if groups:
+        planned = sorted(deal_id for ids in groups.values() for deal_id in ids)
+        now = timezone.now()
+        with transaction.atomic():
+            for chunk in chunked(planned, DEAL_BATCH_SIZE):
+                by_status = {}
+                for deal_id in chunk:
+                    by_status.setdefault(current[deal_id], []).append(deal_id)
+                guard = Q()
+                for from_status, ids in by_status.items():
+                    guard |= Q(pk__in=ids, deal_status=from_status)
+                # rows still at the status as read; locked, so the UPDATE moves exactly these
+                moving = list(
+                    Deal.objects.select_for_update().filter(guard).order_by("id").values_list("id", flat=True)
+                )
+                Deal.objects.filter(guard, pk__in=moving).update(deal_status=to_status, updated_at=now)
+                applied.extend(moving)
+
+            moved = set(applied)
+            rejected.extend(
+                {
+                    "deal_id": deal_id,
+                    "from_status": current[deal_id],
+                    "reason": "Status changed by another user, reload and retry",
+                }
+                for deal_id in planned if deal_id not in moved
+            )
+
+            events = DealStatusEvent.objects.bulk_create(
+                [
+                    DealStatusEvent(
+                        deal_id=deal_id, from_status=current[deal_id], to_status=to_status, changed_by=user
+                    )
+                    for deal_id in applied
+                ],
+                batch_size=EVENT_BATCH_SIZE,
+            )
+
+    commission_run = None
+    commission_error = None
+    if events and to_status in TRIGGER_STATUS.values():
+        # the transitions stay committed; on failure the events wait for the next batch run
+        try:
+            commission_run, _ = run_commissions(user=user, event_ids=[event.pk for event in events])
+        except CommissionError as exc:
+            commission_error = str(exc)
+
+    return {
+        "requested": len(deal_ids),
+        "applied": applied,
+        "rejected": rejected,
+        "commission_run": commission_run,
+        "commission_error": commission_error,
+    }
@@ -0,0 +1,265 @@
+# dashboards/super_admin/services/deleted_record_archive.py
+import fcntl
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from dashboards.super_admin.models.base import ArchivedDeletedRecord, DeletedRecord
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+
+# =====================================================
+# SETTINGS
+# =====================================================
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_ARCHIVE_DIR = "archive/deleted_records"
+
+# records per compressed block, a restore decompresses one block only
+BLOCK_RECORDS = 200
+
+# start a new segment file once the current one is this big
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+CODEC_EXTENSIONS = {
+    "gzip": ".jsonl.gz",
+    "zstd": ".jsonl.zst",
+}
+
+
+def get_retention_days():
+    return getattr(settings, "DELETED_RECORD_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+
+
+def get_archive_root():
+    return Path(settings.MEDIA_ROOT) / getattr(
+        settings, "DELETED_RECORD_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR
+    )
+
+
+def get_default_codec():
+    return getattr(
+        settings,
+        "DELETED_RECORD_ARCHIVE_CODEC",
+        "zstd" if zstandard else "gzip",
+    )
+
+
+def codec_for_segment(segment):
+    for codec, extension in CODEC_EXTENSIONS.items():
+        if segment.endswith(extension):
+            return codec
+    raise ValueError(f"Unknown archive segment: {segment}")
+
+
+# =====================================================
+# COMPRESSION
+# =====================================================
+def compress(codec, raw):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed, use the gzip codec")
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def decompress(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst archive segments")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+# =====================================================
+# SEGMENT FILES (APPEND ONLY)
+# =====================================================
+class SegmentWriter:
+    """
+    Appends compressed blocks to the newest segment of a codec.
+    Every block is a self contained gzip member / zstd frame, so
+    (offset, length) is enough to read it back.
+    """
+
+    def __init__(self, root, codec):
+        self.root = root
+        self.codec = codec
+        self.extension = CODEC_EXTENSIONS[codec]
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment = self._latest_segment()
+
+    def _segment_name(self, number):
+        return f"segment-{number:06d}{self.extension}"
+
+    def _latest_segment(self):
+        existing = sorted(self.root.glob(f"segment-*{self.extension}"))
+        if not existing:
+            return self._segment_name(1)
+
+        latest = existing[-1].name
+        if (self.root / latest).stat().st_size < SEGMENT_MAX_BYTES:
+            return latest
+
+        number = int(latest[len("segment-"):len("segment-") + 6])
+        return self._segment_name(number + 1)
+
+    def append(self, block):
+        path = self.root / self.segment
+        if path.exists() and path.stat().st_size >= SEGMENT_MAX_BYTES:
+            number = int(self.segment[len("segment-"):len("segment-") + 6])
+            self.segment = self._segment_name(number + 1)
+            path = self.root / self.segment
+
+        with open(path, "ab") as fh:
+            offset = fh.tell()
+            fh.write(block)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        return self.segment, offset, len(block)
+
+
+class ArchiveLock:
+    """
+    flock on a lock file, only one archive run may append to the segments
+    at a time. The kernel drops the lock when its process dies, a crashed
+    run leaves the file behind but never blocks the next one.
+    """
+
+    def __init__(self, root):
+        self.path = root / ".archive.lock"
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_CREAT | os.O_WRONLY)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self.fd)
+            raise RuntimeError(f"Another archive run holds {self.path}")
+        # holder's pid, for whoever finds the lock taken
+        os.ftruncate(self.fd, 0)
+        os.write(self.fd, str(os.getpid()).encode())
+        return self
+
+    def __exit__(self, *exc):
+        # the file stays, unlinking it would let a waiting run lock a
+        # new file while another still holds the old one
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+# =====================================================
+# ARCHIVE
+# =====================================================
+def serialize_record(record):
+    return {
+        "id": record.id,
+        "content_type": record.content_type_id,
+        "object_id": record.object_id,
+        "model_name": record.model_name,
+        "data": record.data,
+        "deleted_by": record.deleted_by_id,
+        "deleted_at": record.deleted_at,
+    }
+
+
+def archive_deleted_records(retention_days=None, codec=None, dry_run=False):
+    """
+    Move DeletedRecord rows older than the retention window into
+    compressed JSONL segments under MEDIA_ROOT and index them.
+    The block is on disk (fsync) before its rows leave the database,
+    a failed transaction only leaves an unreferenced block behind.
+    """
+    retention_days = get_retention_days() if retention_days is None else retention_days
+    codec = codec or get_default_codec()
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    expired = DeletedRecord.objects.filter(deleted_at__lt=cutoff)
+    stats = {"records": 0, "blocks": 0, "bytes": 0, "cutoff": cutoff}
+
+    if dry_run:
+        stats["records"] = expired.count()
+        return stats
+
+    root = get_archive_root()
+    with ArchiveLock(root):
+        writer = SegmentWriter(root, codec)
+
+        while True:
+            records = list(expired.order_by("id")[:BLOCK_RECORDS])
+            if not records:
+                break
+
+            raw = "\n".join(
+                json.dumps(serialize_record(record), cls=DjangoJSONEncoder)
+                for record in records
+            ).encode("utf-8")
+            segment, offset, length = writer.append(compress(codec, raw))
+
+            with transaction.atomic():
+                ArchivedDeletedRecord.objects.bulk_create([
+                    ArchivedDeletedRecord(
+                        content_type_id=record.content_type_id,
+                        object_id=record.object_id,
+                        model_name=record.model_name,
+                        deleted_by_id=record.deleted_by_id,
+                        deleted_at=record.deleted_at,
+                        segment=segment,
+                        offset=offset,
+                        length=length,
+                        line=line,
+                    )
+                    for line, record in enumerate(records)
+                ])
+                DeletedRecord.objects.filter(id__in=[record.id for record in records]).delete()
+
+            stats["records"] += len(records)
+            stats["blocks"] += 1
+            stats["bytes"] += length
+
+    return stats
+
+
+# =====================================================
+# READ BACK
+# =====================================================
+def read_block(segment, offset, length):
+    with open(get_archive_root() / segment, "rb") as fh:
+        fh.seek(offset)
+        blob = fh.read(length)
+    return decompress(codec_for_segment(segment), blob).decode("utf-8").split("\n")
+
+
+def load_archived_backups(content_type, object_ids):
+    """
+    {object_id: data} of the latest archived backup per object,
+    one indexed lookup + one block read per distinct block
+    """
+    entries = ArchivedDeletedRecord.objects.filter(
+        content_type=content_type, object_id__in=object_ids
+    ).order_by("object_id", "-deleted_at", "-id")
+
+    latest = {}
+    for entry in entries:
+        latest.setdefault(entry.object_id, entry)
+
+    blocks = {}
+    backups = {}
+    for object_id, entry in latest.items():
+        key = (entry.segment, entry.offset, entry.length)
+        if key not in blocks:
+            blocks[key] = read_block(*key)
+        backups[object_id] = json.loads(blocks[key][entry.line])["data"]
+
+    return backups
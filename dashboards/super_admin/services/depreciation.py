@@ -0,0 +1,289 @@
+# dashboards/super_admin/services/depreciation.py
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import OuterRef, Subquery
+
+from dashboards.super_admin.models.base import immediate_atomic
+from dashboards.super_admin.models.inventory import (
+    Asset,
+    AssetValuationSnapshot,
+    DepreciationLedgerLine,
+    DepreciationScheduler,
+)
+
+
+DEPRECIABLE_STATUSES = ("active", "maintenance")
+
+DAYS_IN_YEAR = 365.0
+
+# WDV needs a salvage value, Schedule II practice is 5% of cost when none is set
+WDV_DEFAULT_RESIDUAL_RATE = 0.05
+
+WRITE_BATCH_SIZE = 2000
+
+ASSET_COLUMNS = (
+    "id", "purchase_value", "residual_value", "useful_life_years",
+    "depreciation_start_date", "depreciation_method", "current_value",
+)
+
+
+class DepreciationError(Exception):
+    pass
+
+
+# =====================================================
+# LOAD
+# =====================================================
+def to_columns(rows):
+    """
+    ASSET_COLUMNS tuples -> column arrays
+    """
+    ids, purchase, residual, life, start, method, current = zip(*rows)
+    purchase = np.array(purchase, dtype=np.float64)
+    current = np.array(
+        [p if c is None else c for p, c in zip(purchase.tolist(), current)],
+        dtype=np.float64,
+    )
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "purchase_value": purchase,
+        "residual_value": np.array([r or 0 for r in residual], dtype=np.float64),
+        "useful_life_years": np.array(life, dtype=np.float64),
+        "start": np.array(start, dtype="datetime64[D]"),
+        "is_wdv": np.array([m == "wdv" for m in method], dtype=bool),
+        "current_value": current,
+    }
+
+
+def load_assets(period_to):
+    """
+    One query, straight into column arrays
+    """
+    rows = list(
+        Asset.objects.filter(
+            status__in=DEPRECIABLE_STATUSES,
+            depreciation_start_date__lte=period_to,
+        ).order_by("id").values_list(*ASSET_COLUMNS)
+    )
+    if not rows:
+        return None
+    return to_columns(rows)
+
+
+# =====================================================
+# COMPUTE
+# =====================================================
+def compute_depreciation(columns, period_from, period_to):
+    """
+    SLM and WDV charges for the period in one pass over the arrays.
+
+    SLM: (cost - residual) / life, pro rata for the days in the period
+    WDV: rate = 1 - (residual / cost) ** (1 / life) on the opening book value,
+         compounded over the fraction of the year
+    A charge never takes the book value below the residual value, an asset
+    without a start date (NaT) is not charged.
+    Returns (days, charge, closing) arrays.
+    """
+    undated = np.isnat(columns["start"])
+    start = np.maximum(columns["start"], np.datetime64(period_from, "D"))
+    days = (np.datetime64(period_to, "D") - start).astype(np.int64) + 1
+    days = np.where(undated, 0, np.clip(days, 0, None))
+    fraction = days / DAYS_IN_YEAR
+
+    cost = columns["purchase_value"]
+    residual = columns["residual_value"]
+    life = columns["useful_life_years"]
+    opening = columns["current_value"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slm = np.where(life > 0, (cost - residual) / life, 0.0) * fraction
+
+        salvage = np.where(residual > 0, residual, cost * WDV_DEFAULT_RESIDUAL_RATE)
+        ratio = np.where(cost > 0, salvage / cost, 1.0)
+        rate = np.where(life > 0, 1.0 - ratio ** (1.0 / life), 0.0)
+        wdv = opening * (1.0 - (1.0 - rate) ** fraction)
+
+    charge = np.where(columns["is_wdv"], wdv, slm)
+    charge = np.clip(charge, 0.0, np.maximum(opening - residual, 0.0))
+    charge = np.nan_to_num(np.round(charge, 2))
+    closing = np.round(opening - charge, 2)
+
+    return days, charge, closing
+
+
+# =====================================================
+# RUN
+# =====================================================
+def check_overlap(period_from, period_to):
+    overlapping = DepreciationScheduler.objects.filter(
+        period_from__lte=period_to, period_to__gte=period_from
+    ).first()
+    if overlapping:
+        raise DepreciationError(
+            f"Depreciation already posted for {overlapping.period_from} - {overlapping.period_to}"
+        )
+
+
+def run_depreciation(period_from, period_to, schedule="monthly", posted_by=None, dry_run=False):
+    """
+    Depreciate every live asset for a period, write current_value back
+    with bulk_update, book one DepreciationLedgerLine per charged asset and
+    an AssetValuationSnapshot of every loaded asset at period_to.
+    A period overlapping an earlier run is refused, it would be charged twice;
+    the check is repeated inside the write transaction so two concurrent
+    runs cannot both post it.
+    Returns (scheduler, stats).
+    """
+    if period_to < period_from:
+        raise DepreciationError("period_to must be on or after period_from")
+
+    check_overlap(period_from, period_to)
+
+    stats = {}
+    clock = time.perf_counter()
+
+    columns = load_assets(period_to)
+    stats["load_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+    if columns is None:
+        raise DepreciationError("No assets to depreciate in this period")
+
+    step = time.perf_counter()
+    days, charge, closing = compute_depreciation(columns, period_from, period_to)
+    stats["compute_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    charged = np.nonzero(charge > 0)[0]
+    total = Decimal(f"{charge.sum():.2f}")
+    stats["assets"] = int(len(charge))
+    stats["charged"] = int(len(charged))
+    stats["total_depreciation"] = total
+
+    scheduler = DepreciationScheduler(
+        period_from=period_from,
+        period_to=period_to,
+        schedule=schedule,
+        posted_by=posted_by,
+        total_depreciation=total,
+        asset_count=len(charged),
+    )
+    if dry_run:
+        stats["total_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+        return scheduler, stats
+
+    step = time.perf_counter()
+    ids = columns["id"][charged].tolist()
+    methods = np.where(columns["is_wdv"][charged], "wdv", "slm").tolist()
+    day_counts = days[charged].tolist()
+    openings = columns["current_value"][charged].tolist()
+    charges = charge[charged].tolist()
+    closings = closing[charged].tolist()
+
+    # BEGIN IMMEDIATE: a concurrent run waits here and then sees this period
+    with immediate_atomic():
+        check_overlap(period_from, period_to)
+        scheduler.save()
+
+        Asset.all_objects.bulk_update(
+            [Asset(pk=pk, current_value=Decimal(f"{value:.2f}")) for pk, value in zip(ids, closings)],
+            ["current_value"],
+            batch_size=WRITE_BATCH_SIZE,
+        )
+
+        DepreciationLedgerLine.objects.bulk_create(
+            [
+                DepreciationLedgerLine(
+                    scheduler=scheduler,
+                    asset_id=pk,
+                    method=method,
+                    days=day_count,
+                    opening_value=Decimal(f"{opening:.2f}"),
+                    depreciation=Decimal(f"{amount:.2f}"),
+                    closing_value=Decimal(f"{value:.2f}"),
+                )
+                for pk, method, day_count, opening, amount, value in zip(
+                    ids, methods, day_counts, openings, charges, closings
+                )
+            ],
+            batch_size=WRITE_BATCH_SIZE,
+        )
+
+        # the register as of period_to, charged or not
+        AssetValuationSnapshot.objects.bulk_create(
+            [
+                AssetValuationSnapshot(
+                    asset_id=pk,
+                    scheduler=scheduler,
+                    as_of=period_to,
+                    book_value=Decimal(f"{value:.2f}"),
+                    accumulated_depreciation=Decimal(f"{cost - value:.2f}"),
+                )
+                for pk, cost, value in zip(
+                    columns["id"].tolist(),
+                    columns["purchase_value"].tolist(),
+                    closing.tolist(),
+                )
+            ],
+            batch_size=WRITE_BATCH_SIZE,
+        )
+
+    stats["write_ms"] = round((time.perf_counter() - step) * 1000, 1)
+    stats["total_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+    return scheduler, stats
+
+
+# =====================================================
+# AS OF VALUATION
+# =====================================================
+def charge_from(start, snapshot_date):
+    """
+    First day still to be charged: the day after the snapshot, never
+    before the depreciation start. None when the asset has no start date.
+    """
+    if start is None or snapshot_date is None:
+        return start
+    return max(start, snapshot_date + timedelta(days=1))
+
+
+def book_values_as_of(asset_ids, as_of):
+    """
+    {asset_id: book value on as_of}: the latest snapshot on or before
+    as_of (one query, correlated on (asset, as_of)) plus the charge from the
+    day after it up to as_of, computed like a run. Assets without a snapshot
+    are depreciated from purchase value and their depreciation start date.
+    """
+    if not asset_ids:
+        return {}
+
+    latest = AssetValuationSnapshot.objects.filter(
+        asset_id=OuterRef("pk"), as_of__lte=as_of
+    ).order_by("-as_of")
+
+    rows = list(
+        Asset.all_objects.filter(pk__in=asset_ids).annotate(
+            snapshot_value=Subquery(latest.values("book_value")[:1]),
+            snapshot_date=Subquery(latest.values("as_of")[:1]),
+        ).values_list(*ASSET_COLUMNS[:-1], "snapshot_value", "snapshot_date")
+    )
+    if not rows:
+        return {}
+
+    # opening value: the snapshot, else the purchase value
+    columns = to_columns([
+        (*row[:6], row[1] if row[6] is None else row[6])
+        for row in rows
+    ])
+    # a snapshot covers everything up to its date
+    columns["start"] = np.array(
+        [charge_from(row[4], row[7]) for row in rows],
+        dtype="datetime64[D]",
+    )
+
+    dated = columns["start"][~np.isnat(columns["start"])]
+    period_from = dated.min() if len(dated) else np.datetime64(as_of, "D")
+    _, _, closing = compute_depreciation(columns, period_from, as_of)
+    return {
+        int(pk): Decimal(f"{value:.2f}")
+        for pk, value in zip(columns["id"].tolist(), closing.tolist())
+    }
@@ -0,0 +1,314 @@
+# dashboards/super_admin/services/document_sequence.py
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from dashboards.super_admin.models.base import immediate_atomic
+from dashboards.super_admin.models.controll_no import DocumentControl, get_financial_year
+
+
+# =====================================================
+# NUMBERING POLICY
+# =====================================================
+# gapless -> every number is taken inside the caller's transaction,
+#            a rollback gives the number back (statutory series)
+# gapped  -> numbers are reserved in blocks per worker process and
+#            handed out from memory, unused numbers are lost on restart;
+#            each number re-reads the series row (one indexed SELECT), a
+#            locked, reset or re-templated series drops the cached block
+# Vendor bills, POs and GRNs are not client series, they are numbered by
+# services.counters (VB-YYYY-nnnnn ...) inside the caller's transaction.
+GAPLESS_DOCUMENT_TYPES = {
+    "invoice",
+    "receipt",
+    "creditNote",
+    "debitNote",
+}
+
+DEFAULT_BLOCK_SIZE = 20
+
+
+def get_numbering_policy(document_type):
+    """
+    settings.DOCUMENT_NUMBER_POLICY = {"quotation": "gapless"} overrides the default
+    """
+    overrides = getattr(settings, "DOCUMENT_NUMBER_POLICY", {})
+    if document_type in overrides:
+        return overrides[document_type]
+    return "gapless" if document_type in GAPLESS_DOCUMENT_TYPES else "gapped"
+
+
+def get_block_size(document_type):
+    """
+    settings.DOCUMENT_NUMBER_BLOCK_SIZE can be an int or a dict per document type
+    """
+    value = getattr(settings, "DOCUMENT_NUMBER_BLOCK_SIZE", DEFAULT_BLOCK_SIZE)
+    if isinstance(value, dict):
+        value = value.get(document_type, DEFAULT_BLOCK_SIZE)
+    return max(int(value), 1)
+
+
+# =====================================================
+# PREFIX / SUFFIX TEMPLATES
+# =====================================================
+def compile_affix(value, client_code, document_type, financial_year):
+    """
+    Resolve the placeholders that never change inside one series.
+    Date placeholders ({YYYY}, {YY}, {MM}) are kept for render_affix.
+    """
+    if not value:
+        return None
+
+    replacements = {
+        "{FY}": financial_year,
+        "{COMP}": client_code,
+        "{DOC}": document_type.upper(),
+    }
+
+    for key, val in replacements.items():
+        value = value.replace(key, val)
+
+    return value
+
+
+def render_affix(template, today):
+    if not template or "{" not in template:
+        return template
+
+    return (
+        template
+        .replace("{YYYY}", today.strftime("%Y"))
+        .replace("{YY}", today.strftime("%y"))
+        .replace("{MM}", today.strftime("%m"))
+    )
+
+
+class CompiledSeries:
+    """
+    Compiled prefix / suffix + padding for one (client, document type, FY)
+    """
+
+    def __init__(self, control):
+        self.raw_prefix = control.prefix
+        self.raw_suffix = control.suffix
+        self.padding = control.number_padding
+        self.prefix = compile_affix(
+            control.prefix,
+            control.clients.client_code,
+            control.document_type,
+            control.financial_year,
+        )
+        self.suffix = compile_affix(
+            control.suffix,
+            control.clients.client_code,
+            control.document_type,
+            control.financial_year,
+        )
+
+    def is_stale(self, control):
+        return (
+            self.raw_prefix != control.prefix
+            or self.raw_suffix != control.suffix
+            or self.padding != control.number_padding
+        )
+
+    def format(self, number, today):
+        parts = []
+
+        prefix = render_affix(self.prefix, today)
+        if prefix:
+            parts.append(prefix)
+
+        parts.append(str(number).zfill(self.padding))
+
+        suffix = render_affix(self.suffix, today)
+        if suffix:
+            parts.append(suffix)
+
+        return "/".join(parts)
+
+
+class NumberBlock:
+
+    def __init__(self, first, last, series, generation):
+        self.next = first
+        self.last = last
+        self.series = series
+        self.generation = generation
+
+    def exhausted(self):
+        return self.next > self.last
+
+    def take(self):
+        number = self.next
+        self.next += 1
+        return number
+
+
+# =====================================================
+# ALLOCATOR
+# =====================================================
+class DocumentSequenceAllocator:
+    """
+    Per-process document number allocator.
+
+    One UPDATE ... current_number + n reserves numbers for a series,
+    gapped series keep the reserved block in memory so most calls
+    never touch the database.
+    """
+
+    def __init__(self, block_size=None, policies=None):
+        self.block_size = block_size
+        self.policies = policies or {}
+        self._lock = threading.Lock()
+        self._series_locks = {}
+        self._blocks = {}
+        self._templates = {}
+
+    def get_policy(self, document_type):
+        if document_type in self.policies:
+            return self.policies[document_type]
+        return get_numbering_policy(document_type)
+
+    def get_block_size(self, document_type):
+        if self.block_size:
+            return self.block_size
+        return get_block_size(document_type)
+
+    def _series_lock(self, key):
+        with self._lock:
+            lock = self._series_locks.get(key)
+            if lock is None:
+                lock = self._series_locks[key] = threading.Lock()
+            return lock
+
+    # -------------------------------------------------
+    # DB RESERVATION
+    # -------------------------------------------------
+    @staticmethod
+    def _series(key):
+        clients_id, document_type, financial_year = key
+        return DocumentControl.objects.filter(
+            clients_id=clients_id,
+            document_type=document_type,
+            financial_year=financial_year,
+        )
+
+    def _block_usable(self, key, block):
+        """
+        The series is still unlocked, not reset and formatted the same way
+        as when the block was reserved
+        """
+        row = self._series(key).values_list(
+            "is_locked", "series_generation", "prefix", "suffix", "number_padding"
+        ).first()
+        if row is None:
+            return False
+        is_locked, generation, prefix, suffix, padding = row
+        return (
+            not is_locked
+            and generation == block.generation
+            and (prefix, suffix, padding) == (block.series.raw_prefix, block.series.raw_suffix, block.series.padding)
+        )
+
+    def _reserve(self, key, count):
+        """
+        Bump current_number by count and return (first, last, compiled series, generation).
+        Opens with BEGIN IMMEDIATE so SQLite takes its write lock up front and
+        PostgreSQL row-locks the series for the rest of the transaction.
+        """
+        clients_id, document_type, financial_year = key
+        series = self._series(key)
+
+        with immediate_atomic():
+            updated = series.filter(is_locked=False).update(
+                current_number=F("current_number") + count,
+                updated_at=timezone.now(),
+            )
+
+            if not updated:
+                if series.exists():
+                    raise ValidationError("This document series is locked.")
+                raise ValidationError(
+                    f"Document series not configured for {document_type} ({financial_year})."
+                )
+
+            control = series.select_related("clients").get()
+
+        compiled = self._templates.get(key)
+        if compiled is None or compiled.is_stale(control):
+            compiled = self._templates[key] = CompiledSeries(control)
+
+        return (
+            control.current_number - count + 1,
+            control.current_number,
+            compiled,
+            control.series_generation,
+        )
+
+    # -------------------------------------------------
+    # PUBLIC API
+    # -------------------------------------------------
+    def next_number(self, clients_id, document_type, financial_year=None):
+        """
+        Returns full formatted document number
+        Example: INV/TCS/0001/2025-26
+        """
+        financial_year = financial_year or get_financial_year()
+        key = (clients_id, document_type, financial_year)
+
+        # A block reserved inside the caller's transaction could be rolled
+        # back while still cached here, so only cache outside of one.
+        if self.get_policy(document_type) == "gapless" or connection.in_atomic_block:
+            return self.take_many(clients_id, document_type, 1, financial_year)[0]
+
+        with self._series_lock(key):
+            block = self._blocks.get(key)
+            if block is not None and not block.exhausted() and not self._block_usable(key, block):
+                # reserving again raises for a locked series
+                block = None
+            if block is None or block.exhausted():
+                block = self._blocks[key] = NumberBlock(
+                    *self._reserve(key, self.get_block_size(document_type))
+                )
+            number = block.take()
+
+        return block.series.format(number, timezone.now().date())
+
+    def take_many(self, clients_id, document_type, count, financial_year=None):
+        """
+        Reserve count consecutive numbers in the caller's transaction.
+        Used by batch jobs which write all documents in one transaction.
+        """
+        financial_year = financial_year or get_financial_year()
+        key = (clients_id, document_type, financial_year)
+
+        first, last, compiled, _ = self._reserve(key, count)
+        today = timezone.now().date()
+
+        return [compiled.format(number, today) for number in range(first, last + 1)]
+
+    def discard(self, clients_id=None, document_type=None):
+        """
+        Drop cached blocks / templates (series edited or reset) of this
+        process; other processes drop theirs on their next number
+        """
+        with self._lock:
+            for cache in (self._blocks, self._templates):
+                for key in list(cache):
+                    if clients_id is not None and key[0] != clients_id:
+                        continue
+                    if document_type is not None and key[1] != document_type:
+                        continue
+                    del cache[key]
+
+
+document_sequences = DocumentSequenceAllocator()
+
+
+def allocate_document_number(clients_id, document_type, financial_year=None):
+    return document_sequences.next_number(clients_id, document_type, financial_year)
@@ -0,0 +1,85 @@
+# dashboards/super_admin/services/employee_photos.py
+import hashlib
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+
+# longest edge in px, "thumb" for lists / avatars, "medium" for profile cards
+PHOTO_SIZES = {
+    "thumb": 96,
+    "medium": 320,
+}
+
+# format -> (Pillow format, extension, content type)
+PHOTO_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+}
+
+
+def derivative_name(original_name, size, fmt):
+    """
+    employee_photos/ravi.png -> employee_photos/ravi.thumb.webp
+    """
+    stem, _ = posixpath.splitext(original_name)
+    return f"{stem}.{size}.{PHOTO_FORMATS[fmt][1]}"
+
+
+def generate_photo_derivatives(employee):
+    """
+    Resize the uploaded photo once into WebP + JPEG per size, stored next to
+    the original. Returns (etag, generated_at) for the Employee row.
+    """
+    photo = employee.upload_photo
+    photo.open("rb")
+    try:
+        raw = photo.read()
+    finally:
+        photo.close()
+
+    etag = hashlib.sha1(raw).hexdigest()
+    image = ImageOps.exif_transpose(Image.open(BytesIO(raw)))
+
+    for size, edge in PHOTO_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+
+        for fmt, (pil_format, _, _) in PHOTO_FORMATS.items():
+            target = resized
+            if pil_format == "JPEG" and target.mode not in ("RGB", "L"):
+                target = target.convert("RGB")
+
+            buffer = BytesIO()
+            target.save(buffer, pil_format, quality=82, optimize=True)
+
+            name = derivative_name(photo.name, size, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    return etag, timezone.now()
+
+
+def delete_photo_derivatives(original_name):
+    for size in PHOTO_SIZES:
+        for fmt in PHOTO_FORMATS:
+            name = derivative_name(original_name, size, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+
+def photo_url(employee_id, etag, size="thumb"):
+    """
+    Cache busted URL of the photo endpoint, ?v changes with every new upload
+    """
+    url = reverse("employee_photo", args=[employee_id])
+    query = f"?size={size}"
+    if etag:
+        query += f"&v={etag[:12]}"
+    return url + query
@@ -0,0 +1,147 @@
+# dashboards/super_admin/services/gst_invoicing.py
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from dashboards.super_admin.models.base import immediate_atomic
+from dashboards.super_admin.models.gst import GSTInvoice, Quotation
+from dashboards.super_admin.services.document_sequence import document_sequences
+from dashboards.super_admin.services.gst_tax import compute_gst, crosses_states, gst_rate_for, hsn_rates
+from dashboards.super_admin.services.gstin import state_code
+from dashboards.super_admin.services.receivables import post_invoices
+
+
+INVOICE_BATCH_SIZE = 500
+
+
+class InvoicingError(Exception):
+    pass
+
+
+def parse_id(value, name):
+    """
+    Payload id -> int, None when not given
+    """
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvoicingError(f"{name} must be a number")
+
+
+def parse_quotation_ids(values):
+    """
+    Payload quotation_ids -> list of ints, None when not given
+    """
+    if not values:
+        return None
+    if not isinstance(values, (list, tuple)):
+        raise InvoicingError("quotation_ids must be a list of quotation ids")
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise InvoicingError("quotation_ids must be a list of quotation ids")
+
+
+def build_invoice(quotation, sub_total, invoice_no, today, rates):
+    """
+    Unsaved GSTInvoice for an approved quotation, GST computed like GSTInvoice.save
+    """
+    clients = quotation.clients
+    branch = quotation.branch
+
+    inter_state = crosses_states(
+        branch.gst_state_code,
+        clients.gst_state_code or state_code(clients.gstin),
+    )
+    rate = gst_rate_for(quotation.slab_rate, clients, rates)
+
+    return GSTInvoice(
+        invoice_no=invoice_no,
+        clients=clients,
+        branch=branch,
+        quotation=quotation,
+        due_date=today + timedelta(days=clients.invoice_due_days or 0),
+        sub_total=sub_total,
+        **compute_gst(sub_total, rate, inter_state),
+    )
+
+
+def invoice_approved_quotations(quotation_ids=None, branch_id=None, clients_id=None, dry_run=False):
+    """
+    Invoice every approved quotation that has no invoice yet, in one transaction:
+    one query for the quotations, one GROUP BY for their sub totals, one number
+    reservation per client (take_many), bulk inserts of the invoices and one
+    post of their receivables ledger entries.
+    Quotations without a branch or without items are skipped and reported.
+    Returns (invoices, skipped, stats).
+    """
+    clock = time.perf_counter()
+
+    quotations = Quotation.objects.filter(
+        status="approved", gst_invoice__isnull=True
+    ).select_related("clients", "branch", "slab_rate").order_by("clients_id", "id")
+    if quotation_ids:
+        quotations = quotations.filter(pk__in=quotation_ids)
+    if branch_id:
+        quotations = quotations.filter(branch_id=branch_id)
+    if clients_id:
+        quotations = quotations.filter(clients_id=clients_id)
+
+    today = timezone.now().date()
+    rates = hsn_rates()
+    skipped = []
+
+    # reads come first, BEGIN IMMEDIATE takes the SQLite write lock up front
+    # (a deferred transaction fails its lock upgrade under a concurrent run)
+    with transaction.atomic() if dry_run else immediate_atomic():
+        # lock the quotations so a concurrent run cannot invoice them twice
+        quotations = list(quotations.select_for_update(of=("self",)))
+        subtotals = Quotation.subtotals([quotation.pk for quotation in quotations])
+
+        billable = []
+        for quotation in quotations:
+            if not quotation.branch_id:
+                skipped.append({"quotation_id": quotation.pk, "reason": "No branch on quotation"})
+            elif quotation.pk not in subtotals:
+                skipped.append({"quotation_id": quotation.pk, "reason": "Quotation has no items"})
+            else:
+                billable.append(quotation)
+
+        per_client = {}
+        for quotation in billable:
+            per_client.setdefault(quotation.clients_id, []).append(quotation)
+
+        invoices = []
+        for client_id, client_quotations in per_client.items():
+            if dry_run:
+                numbers = [None] * len(client_quotations)
+            else:
+                try:
+                    numbers = document_sequences.take_many(client_id, "invoice", len(client_quotations))
+                except ValidationError as exc:
+                    raise InvoicingError(f"Client {client_id}: {exc.messages[0]}")
+            for quotation, invoice_no in zip(client_quotations, numbers):
+                invoices.append(build_invoice(
+                    quotation, subtotals[quotation.pk], invoice_no, today, rates
+                ))
+
+        if not dry_run:
+            GSTInvoice.objects.bulk_create(invoices, batch_size=INVOICE_BATCH_SIZE)
+            post_invoices(invoices)
+
+    stats = {
+        "quotations": len(quotations),
+        "invoiced": len(invoices),
+        "skipped": len(skipped),
+        "clients": len(per_client),
+        "sub_total": sum((invoice.sub_total for invoice in invoices), Decimal("0.00")),
+        "grand_total": sum((invoice.grand_total for invoice in invoices), Decimal("0.00")),
+        "total_ms": round((time.perf_counter() - clock) * 1000, 1),
+    }
+    return invoices, skipped, stats
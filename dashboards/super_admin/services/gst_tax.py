@@ -0,0 +1,76 @@
+# dashboards/super_admin/services/gst_tax.py
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+
+# no model imports here, models.gst uses these from GSTInvoice.save
+DEFAULT_GST_RATE = Decimal("18.00")
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+GST_FIELDS = [
+    "cgst_rate", "sgst_rate", "igst_rate",
+    "cgst_amount", "sgst_amount", "igst_amount", "grand_total",
+]
+
+
+def money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def hsn_rates():
+    """
+    settings.GST_HSN_RATES = {"996601": 5, "998314": 18}, HSN / SAC code -> rate
+    """
+    return {
+        str(code): Decimal(str(rate))
+        for code, rate in getattr(settings, "GST_HSN_RATES", {}).items()
+    }
+
+
+def gst_rate_for(slab_rate=None, clients=None, rates=None):
+    """
+    The slab's own rate, else the rate of its HSN / SAC code, else the
+    client's default_tax_percent, else DEFAULT_GST_RATE.
+    Pass rates=hsn_rates() once when resolving many invoices.
+    """
+    if slab_rate is not None:
+        if slab_rate.gst_rate is not None:
+            return slab_rate.gst_rate
+        if slab_rate.hsn_code:
+            rate = (hsn_rates() if rates is None else rates).get(slab_rate.hsn_code)
+            if rate is not None:
+                return rate
+
+    if clients is not None and clients.default_tax_percent is not None:
+        return clients.default_tax_percent
+
+    return getattr(settings, "DEFAULT_GST_RATE", DEFAULT_GST_RATE)
+
+
+def crosses_states(supplier_state, recipient_state):
+    return bool(supplier_state and recipient_state and supplier_state != recipient_state)
+
+
+def compute_gst(sub_total, rate, inter_state):
+    """
+    IGST across states, CGST + SGST split in half within one.
+    Returns the GSTInvoice field values (GST_FIELDS).
+    """
+    rate = Decimal(rate)
+    values = dict.fromkeys(GST_FIELDS, ZERO)
+
+    if inter_state:
+        values["igst_rate"] = rate
+        values["igst_amount"] = money(sub_total * rate / 100)
+    else:
+        half = rate / 2
+        values["cgst_rate"] = values["sgst_rate"] = half
+        values["cgst_amount"] = values["sgst_amount"] = money(sub_total * half / 100)
+
+    values["grand_total"] = (
+        sub_total + values["cgst_amount"] + values["sgst_amount"] + values["igst_amount"]
+    )
+    return values
@@ -0,0 +1,16 @@
+# dashboards/super_admin/services/gstin.py
+import re
+
+
+# no model imports here, Clients and Branch call this from save()
+_STATE_CODE = re.compile(r"^\s*(\d{2})")
+
+
+def state_code(gstin):
+    """
+    First two digits of a GSTIN (the state code), None when missing
+    """
+    if not gstin:
+        return None
+    match = _STATE_CODE.match(gstin)
+    return match.group(1) if match else None
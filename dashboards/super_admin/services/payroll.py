@@ -0,0 +1,327 @@
+# dashboards/super_admin/services/payroll.py
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from dashboards.branch.models.branch import Branch
+from dashboards.super_admin.models.base import chunked, month_bounds
+from dashboards.super_admin.models.hr import (
+    AdvanceInstallment,
+    AdvanceRequest,
+    Attendance,
+    Employee,
+    PayrollRun,
+    SalarySlip,
+)
+
+
+PAYROLL_BATCH_SIZE = 500
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+
+# (gross from, monthly professional tax), highest matching slab wins;
+# none by default, SalarySlip.save never deducted it. States that levy it set
+# PAYROLL_PROFESSIONAL_TAX_SLABS, e.g. ((0, 0), (15000, 200))
+DEFAULT_PROFESSIONAL_TAX_SLABS = ()
+
+# a halfday costs half a day of gross, paid leave costs nothing
+UNPAID_DAY_WEIGHTS = {
+    "absent": Decimal("1"),
+    "halfday": Decimal("0.5"),
+}
+
+SLIP_FIELDS = [
+    "gross_salary", "basic", "hra", "da", "allowance", "overtime", "total_earnings",
+    "pf", "esi", "professional_tax", "tds", "leave_deduction", "advance_deduction",
+    "total_deductions", "net_salary", "remarks", "generated_on", "updated_at",
+    "is_deleted", "deleted_at",
+]
+
+
+class PayrollError(Exception):
+    pass
+
+
+def money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def professional_tax_slabs():
+    slabs = getattr(settings, "PAYROLL_PROFESSIONAL_TAX_SLABS", DEFAULT_PROFESSIONAL_TAX_SLABS)
+    return sorted((Decimal(str(start)), Decimal(str(tax))) for start, tax in slabs)
+
+
+# =====================================================
+# PREFETCH
+# =====================================================
+def load_inputs(branch_id, month):
+    """
+    Four queries for the whole branch: employees, attendance counts
+    per employee, payslip installments due in the month and the slips
+    already issued. Employee.basic_salary is the monthly gross.
+    Installments are (id, advance_id, employee_id, amount): the ones not
+    deducted yet and the ones this month's slip took, a re-run takes them again.
+    """
+    first, last = month_bounds(month)
+
+    employees = list(
+        Employee.objects.filter(branch_id=branch_id, joining_date__lte=last)
+        .exclude(status__iexact="inactive")
+        .order_by("id")
+        .values_list("id", "basic_salary")
+    )
+
+    attendance = {
+        row["employee_id"]: row
+        for row in Attendance.objects.filter(
+            employee__branch_id=branch_id, date__range=(first, last)
+        ).values("employee_id").annotate(
+            absent=Count("id", filter=Q(status="absent")),
+            halfday=Count("id", filter=Q(status="halfday")),
+        )
+    }
+
+    installments = list(
+        AdvanceInstallment.objects.filter(
+            advance__employee__branch_id=branch_id,
+            advance__status="active",
+            advance__is_deleted=False,
+            payslip_deduction=True,
+            due_date__range=(first, last),
+        ).filter(
+            Q(salary_slip__isnull=True) | Q(salary_slip__salary_date=first)
+        ).order_by("id").values_list("id", "advance_id", "advance__employee_id", "amount")
+    )
+
+    # slips already issued this month {employee_id: {salary_date: is_deleted}},
+    # a live slip on another date than ours cannot be upserted
+    existing = {}
+    for employee_id, salary_date, is_deleted in SalarySlip.all_objects.filter(
+        employee__branch_id=branch_id, salary_date__range=(first, last)
+    ).values_list("employee_id", "salary_date", "is_deleted"):
+        existing.setdefault(employee_id, {})[salary_date] = is_deleted
+
+    return employees, attendance, installments, existing
+
+
+# =====================================================
+# COMPUTE (column wise, same formulas as SalarySlip.save)
+# =====================================================
+def compute_columns(gross, unpaid_days, advance, days_in_month):
+    """
+    Every argument is a column (list) with one entry per employee,
+    returns {component: column}
+    """
+    slabs = professional_tax_slabs()
+    days = Decimal(days_in_month)
+
+    basic = [g * Decimal("0.5") for g in gross]
+    hra = [b * Decimal("0.5") for b in basic]
+    allowance = [g - h - b for g, h, b in zip(gross, hra, basic)]
+    da = [ZERO] * len(gross)
+    overtime = [ZERO] * len(gross)
+    pf = [Decimal("1800") if b >= Decimal("15000") else b * Decimal("0.12") for b in basic]
+    esi = [g * Decimal("0.0075") if g <= Decimal("21000") else ZERO for g in gross]
+    professional_tax = [
+        next((tax for start, tax in reversed(slabs) if g >= start), ZERO) for g in gross
+    ]
+    tds = [ZERO] * len(gross)
+    leave_deduction = [money(g / days * u) for g, u in zip(gross, unpaid_days)]
+
+    columns = {
+        "gross_salary": gross,
+        "basic": basic,
+        "hra": hra,
+        "da": da,
+        "allowance": allowance,
+        "overtime": overtime,
+        "pf": pf,
+        "esi": esi,
+        "professional_tax": professional_tax,
+        "tds": tds,
+        "leave_deduction": leave_deduction,
+        "advance_deduction": advance,
+    }
+    columns = {name: [money(v) for v in column] for name, column in columns.items()}
+
+    columns["total_earnings"] = [
+        sum(parts) for parts in zip(
+            columns["basic"], columns["hra"], columns["da"],
+            columns["allowance"], columns["overtime"],
+        )
+    ]
+    columns["total_deductions"] = [
+        sum(parts) for parts in zip(
+            columns["pf"], columns["esi"], columns["professional_tax"], columns["tds"],
+            columns["leave_deduction"], columns["advance_deduction"],
+        )
+    ]
+    columns["net_salary"] = [
+        e - d for e, d in zip(columns["total_earnings"], columns["total_deductions"])
+    ]
+    return columns
+
+
+# =====================================================
+# RUN
+# =====================================================
+def run_payroll(branch_id, month, user=None, dry_run=False):
+    """
+    Generate the SalarySlip of every active employee of a branch for a month.
+    Slips are dated on the 1st of the month; running again recomputes them
+    through the (employee, salary_date) unique key instead of duplicating.
+    The advance installments deducted are linked to the slip in the same
+    transaction (record_deductions).
+    Returns the PayrollRun (unsaved on dry_run) and the computed rows.
+    """
+    started_at = timezone.now()
+    clock = time.perf_counter()
+    timings = {}
+
+    if not Branch.objects.filter(pk=branch_id).exists():
+        raise PayrollError("Branch not found")
+
+    first, last = month_bounds(month)
+    employees, attendance, installments, existing = load_inputs(branch_id, first)
+    timings["prefetch_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+
+    skipped = []
+    payable = []
+    for pk, basic_salary in employees:
+        other = [
+            day for day, is_deleted in existing.get(pk, {}).items()
+            if day != first and not is_deleted
+        ]
+        if other:
+            skipped.append({"employee_id": pk, "reason": f"Slip already issued on {other[0]}"})
+        elif not basic_salary:
+            skipped.append({"employee_id": pk, "reason": "No salary set"})
+        else:
+            payable.append((pk, basic_salary))
+
+    # --------------- compute ---------------
+    step = time.perf_counter()
+    payable_ids = [pk for pk, _ in payable]
+    advances = {}
+    for _, _, employee_id, amount in installments:
+        advances[employee_id] = advances.get(employee_id, ZERO) + amount
+    unpaid_days = [
+        sum(
+            (Decimal(attendance.get(pk, {}).get(status, 0)) * weight
+             for status, weight in UNPAID_DAY_WEIGHTS.items()),
+            ZERO,
+        )
+        for pk in payable_ids
+    ]
+    columns = compute_columns(
+        gross=[salary for _, salary in payable],
+        unpaid_days=unpaid_days,
+        advance=[advances.get(pk) or ZERO for pk in payable_ids],
+        days_in_month=last.day,
+    )
+    timings["compute_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    rows = [
+        {"employee_id": pk, **{name: column[i] for name, column in columns.items()}}
+        for i, pk in enumerate(payable_ids)
+    ]
+
+    run = PayrollRun(
+        branch_id=branch_id,
+        month=first,
+        run_by=user,
+        employees=len(employees),
+        slips_created=sum(1 for pk in payable_ids if first not in existing.get(pk, {})),
+        slips_updated=sum(1 for pk in payable_ids if first in existing.get(pk, {})),
+        skipped=skipped,
+        total_gross=sum(columns["gross_salary"], ZERO),
+        total_deductions=sum(columns["total_deductions"], ZERO),
+        total_net=sum(columns["net_salary"], ZERO),
+        started_at=started_at,
+    )
+
+    if dry_run:
+        timings["total_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+        run.timings = timings
+        return run, rows
+
+    # --------------- write ---------------
+    step = time.perf_counter()
+    now = timezone.now()
+    remarks = f"Payroll run {first:%Y-%m}"
+
+    try:
+        with transaction.atomic():
+            SalarySlip.all_objects.bulk_create(
+                [
+                    SalarySlip(
+                        salary_date=first,
+                        generated_on=now,
+                        updated_at=now,
+                        remarks=remarks,
+                        is_deleted=False,
+                        deleted_at=None,
+                        **row,
+                    )
+                    for row in rows
+                ],
+                batch_size=PAYROLL_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["employee", "salary_date"],
+                update_fields=SLIP_FIELDS,
+            )
+            record_deductions(first, payable_ids, installments)
+            timings["write_ms"] = round((time.perf_counter() - step) * 1000, 1)
+            timings["total_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+
+            run.timings = timings
+            run.finished_at = timezone.now()
+            run.save()
+    except Exception as exc:
+        # slips rolled back, keep a trace of the attempt
+        run.pk = None
+        run.status = "failed"
+        run.error = str(exc)
+        run.slips_created = run.slips_updated = 0
+        run.timings = timings
+        run.finished_at = timezone.now()
+        run.save()
+        raise PayrollError(f"Payroll run failed: {exc}") from exc
+
+    return run, rows
+
+
+def record_deductions(month, employee_ids, installments):
+    """
+    Link the installments deducted on the month's slips to those slips and
+    move the advance balances (sync_balances). Installments a previous run
+    of the month took are released first, one no longer due is left undeducted.
+    Per PAYROLL_BATCH_SIZE employees: the slip ids and the release, then one
+    bulk update of the links.
+    """
+    employee_ids = set(employee_ids)
+    slips = {}
+    advance_ids = set()
+    for chunk in chunked(sorted(employee_ids), PAYROLL_BATCH_SIZE):
+        slips.update(
+            SalarySlip.all_objects.filter(employee_id__in=chunk, salary_date=month)
+            .values_list("employee_id", "id")
+        )
+        taken_before = AdvanceInstallment.all_objects.filter(
+            salary_slip__employee_id__in=chunk, salary_slip__salary_date=month
+        )
+        advance_ids.update(taken_before.values_list("advance_id", flat=True))
+        taken_before.update(salary_slip=None)
+
+    taken = []
+    for pk, advance_id, employee_id, _ in installments:
+        if employee_id in employee_ids:
+            taken.append(AdvanceInstallment(pk=pk, salary_slip_id=slips[employee_id]))
+            advance_ids.add(advance_id)
+    AdvanceInstallment.all_objects.bulk_update(taken, ["salary_slip"], batch_size=PAYROLL_BATCH_SIZE)
+    AdvanceRequest.sync_balances(advance_ids)
@@ -0,0 +1,122 @@
+# dashboards/super_admin/services/purchase_orders.py
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from dashboards.super_admin.models.finance import PurchaseOrder, PurchaseOrderItem
+
+
+ITEM_BATCH_SIZE = 500
+
+ITEM_FIELDS = ["description", "sku", "quantity", "rate", "tax", "amount"]
+
+CENT = Decimal("0.01")
+
+
+class PurchaseOrderError(Exception):
+    pass
+
+
+def line_amount(quantity, rate, tax):
+    """
+    quantity x rate plus tax percent of it
+    """
+    return quantity * rate * tax / 100 + (quantity * rate)
+
+
+def stored_amount(quantity, rate, tax):
+    """
+    line_amount at the column's 2 places. SQLite keeps whatever it is given,
+    so the amount is rounded before the write, not by the database.
+    """
+    return line_amount(quantity, rate, tax).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _clean_item(item, current=None):
+    """
+    Payload item -> field values, missing keys keep the current line's values
+    """
+    def pick(name, default):
+        if name in item and item[name] is not None:
+            return item[name]
+        return getattr(current, name) if current else default
+
+    try:
+        quantity = int(pick("quantity", 1))
+        rate = Decimal(str(pick("rate", None)))
+        tax = Decimal(str(pick("tax", 0)))
+    except (TypeError, ValueError, InvalidOperation):
+        raise PurchaseOrderError(f"Invalid quantity, rate or tax on item {item.get('description')!r}")
+
+    if quantity < 0:
+        raise PurchaseOrderError("Item quantity cannot be negative")
+
+    return {
+        "description": pick("description", None),
+        "sku": pick("sku", ""),
+        "quantity": quantity,
+        "rate": rate,
+        "tax": tax,
+        "amount": stored_amount(quantity, rate, tax),
+    }
+
+
+def _item_id(item):
+    try:
+        return int(item.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def write_items(order, items_data):
+    """
+    Replace the lines of a purchase order with items_data in a fixed number
+    of queries: one read of the current lines, one bulk_create for the new
+    ones, one bulk_update for the kept ones and one DELETE for the rest.
+    Items carrying the id of a current line update it, the others are added.
+    Returns the order total, summed by the database so it matches the
+    stored (rounded) line amounts. Call inside a transaction.
+    """
+    existing = {item.id: item for item in order.items.all()} if order.pk else {}
+
+    to_create = []
+    to_update = []
+    kept_ids = set()
+
+    for item in items_data:
+        item_id = _item_id(item)
+        current = existing.get(item_id)
+
+        values = _clean_item(item, current)
+        if current is None:
+            to_create.append(PurchaseOrderItem(purchase_order=order, **values))
+            continue
+
+        for name, value in values.items():
+            setattr(current, name, value)
+        to_update.append(current)
+        kept_ids.add(item_id)
+
+    removed = set(existing) - kept_ids
+    if removed:
+        PurchaseOrderItem.objects.filter(pk__in=removed).delete()
+
+    if to_update:
+        PurchaseOrderItem.objects.bulk_update(to_update, ITEM_FIELDS, batch_size=ITEM_BATCH_SIZE)
+
+    if to_create:
+        PurchaseOrderItem.objects.bulk_create(to_create, batch_size=ITEM_BATCH_SIZE)
+
+    return PurchaseOrderItem.objects.filter(purchase_order=order).aggregate(
+        total=Coalesce(Sum("amount"), Decimal("0"))
+    )["total"]
+
+
+def save_order_total(order, total):
+    """
+    One UPDATE for the header amount, no second full save
+    """
+    PurchaseOrder.all_objects.filter(pk=order.pk).update(amount=total)
+    order.amount = total
+    return order
@@ -0,0 +1,243 @@
+# dashboards/super_admin/services/receipt_allocation.py
+import time
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from dashboards.super_admin.models.base import chunked, immediate_atomic
+from dashboards.super_admin.models.gst import GSTInvoice, Receipt, ReceiptAllocation
+from dashboards.super_admin.services import receivables
+
+
+ALLOCATION_BATCH_SIZE = 500
+
+# clients per transaction in a month end run
+PARTITION_SIZE = 500
+
+# security deposits are held, never applied to invoices
+ALLOCATABLE_RECEIPT_TYPES = ("invoice", "advance")
+
+ZERO = Decimal("0.00")
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+# =====================================================
+# CORE (no database)
+# =====================================================
+class OpenInvoices:
+    """
+    Open invoices of one client, oldest due first, as [invoice_id,
+    invoice_no, open amount] rows. A cursor skips the settled head, so
+    FIFO over a month of receipts walks the list once.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursor = 0
+        self.by_number = {row[1]: row for row in rows}
+
+    def take(self, row, amount):
+        applied = min(amount, row[2])
+        row[2] -= applied
+        return applied
+
+    def fifo(self):
+        while self.cursor < len(self.rows):
+            row = self.rows[self.cursor]
+            if row[2] > 0:
+                yield row
+            else:
+                self.cursor += 1
+
+
+def allocate(receipts, book):
+    """
+    receipts -> [(receipt_id, clients_id, amount, [invoice numbers])] in
+    allocation order, book -> {clients_id: OpenInvoices}.
+    Invoices named by a receipt are paid first, the rest goes FIFO.
+    Returns ([(receipt_id, clients_id, invoice_id, amount)], {receipt_id: left over}).
+    """
+    allocations = []
+    left_over = {}
+
+    for receipt_id, client_id, amount, references in receipts:
+        invoices = book.get(client_id)
+        if invoices is not None and amount > 0:
+            for number in references:
+                row = invoices.by_number.get(number)
+                if row is None or row[2] <= 0 or amount <= 0:
+                    continue
+                applied = invoices.take(row, amount)
+                amount -= applied
+                allocations.append((receipt_id, client_id, row[0], applied))
+
+            if amount > 0:
+                for row in invoices.fifo():
+                    applied = invoices.take(row, amount)
+                    amount -= applied
+                    allocations.append((receipt_id, client_id, row[0], applied))
+                    if amount <= 0:
+                        break
+
+        left_over[receipt_id] = amount
+
+    return allocations, left_over
+
+
+# =====================================================
+# LOAD
+# =====================================================
+def open_invoice_book(client_ids):
+    """
+    {clients_id: OpenInvoices} of the unpaid invoices of the clients, one
+    query per ALLOCATION_BATCH_SIZE clients: amount open = grand total -
+    allocations so far, ordered by due date (invoice date when there is
+    none), then id. The invoice rows are locked (select_for_update), so
+    call it inside the allocation transaction.
+    """
+    paid = ReceiptAllocation.objects.filter(
+        invoice=OuterRef("pk")
+    ).order_by().values("invoice").annotate(total=Sum("applied_amount")).values("total")
+
+    grouped = {}
+    for chunk in chunked(sorted(client_ids), ALLOCATION_BATCH_SIZE):
+        rows = GSTInvoice.objects.filter(
+            clients_id__in=chunk, status="unpaid"
+        ).select_for_update(of=("self",)).annotate(
+            open_amount=ExpressionWrapper(
+                F("grand_total") - Coalesce(Subquery(paid, output_field=MONEY), Value(ZERO)),
+                output_field=MONEY,
+            ),
+            due_on=Coalesce("due_date", "invoice_date"),
+        ).filter(open_amount__gt=0).order_by("clients_id", "due_on", "id").values_list(
+            "clients_id", "id", "invoice_no", "open_amount"
+        )
+        for client_id, invoice_id, invoice_no, open_amount in rows:
+            grouped.setdefault(client_id, []).append([invoice_id, invoice_no, open_amount])
+    return {client_id: OpenInvoices(invoice_rows) for client_id, invoice_rows in grouped.items()}
+
+
+def open_receipts():
+    return Receipt.objects.filter(
+        unallocated_amount__gt=0, receipt_type__in=ALLOCATABLE_RECEIPT_TYPES
+    )
+
+
+# =====================================================
+# WRITE
+# =====================================================
+def allocate_receipts(receipt_ids, references=None, dry_run=False):
+    """
+    Allocate the unallocated amount of the receipts, in one transaction:
+    the receipts and their clients' open invoices (both locked), one query per
+    ALLOCATION_BATCH_SIZE ids each, then one bulk insert of the allocations, one bulk update of the
+    receipts, one UPDATE of the invoices now paid and one post of the
+    ledger entries. references -> {receipt_id: [invoice_no, ...]} paid
+    first; a receipt whose reference_no is an open invoice number of its
+    client pays that invoice first too.
+    Returns (allocations, stats).
+    """
+    references = references or {}
+
+    with immediate_atomic():
+        receipts = []
+        for chunk in chunked(sorted(set(receipt_ids)), ALLOCATION_BATCH_SIZE):
+            receipts.extend(open_receipts().filter(pk__in=chunk).select_for_update().order_by("id"))
+        receipts.sort(key=lambda receipt: (receipt.payment_date, receipt.pk))
+        book = open_invoice_book({receipt.clients_id for receipt in receipts})
+
+        allocations, left_over = allocate(
+            [
+                (
+                    receipt.pk,
+                    receipt.clients_id,
+                    receipt.unallocated_amount,
+                    [*references.get(receipt.pk, []), *([receipt.reference_no] if receipt.reference_no else [])],
+                )
+                for receipt in receipts
+            ],
+            book,
+        )
+        # invoices this run brought to zero
+        settled = {invoice_id for _, _, invoice_id, _ in allocations} & {
+            row[0] for invoices in book.values() for row in invoices.rows if row[2] <= 0
+        }
+
+        if not dry_run:
+            _write(receipts, allocations, left_over, settled)
+
+    stats = {
+        "receipts": len(receipts),
+        "allocations": len(allocations),
+        "allocated": sum((row[3] for row in allocations), ZERO),
+        "invoices_paid": len(settled),
+        "left_unallocated": sum(left_over.values(), ZERO),
+    }
+    return allocations, stats
+
+
+def _write(receipts, allocations, left_over, settled):
+    rows = ReceiptAllocation.objects.bulk_create(
+        [
+            ReceiptAllocation(receipt_id=receipt_id, invoice_id=invoice_id, applied_amount=amount)
+            for receipt_id, _, invoice_id, amount in allocations
+        ],
+        batch_size=ALLOCATION_BATCH_SIZE,
+    )
+
+    changed = []
+    for receipt in receipts:
+        if left_over[receipt.pk] != receipt.unallocated_amount:
+            receipt.unallocated_amount = left_over[receipt.pk]
+            changed.append(receipt)
+    Receipt.objects.bulk_update(changed, ["unallocated_amount"], batch_size=ALLOCATION_BATCH_SIZE)
+
+    for chunk in chunked(sorted(settled), ALLOCATION_BATCH_SIZE):
+        GSTInvoice.objects.filter(pk__in=chunk, status="unpaid").update(status="paid")
+
+    receivables.post([
+        receivables.allocation_entry(row, client_id)
+        for row, (_, client_id, _, _) in zip(rows, allocations)
+    ])
+
+
+def run_allocation(clients_id=None, until=None, dry_run=False):
+    """
+    Month end: allocate every receipt with money left, PARTITION_SIZE
+    clients per transaction. until limits the run to receipts paid on or
+    before a date. Returns stats summed over the partitions.
+    """
+    clock = time.perf_counter()
+
+    receipts = open_receipts()
+    if clients_id:
+        receipts = receipts.filter(clients_id=clients_id)
+    if until:
+        receipts = receipts.filter(payment_date__lte=until)
+
+    by_client = {}
+    for receipt_id, client_id in receipts.order_by("clients_id", "id").values_list("id", "clients_id"):
+        by_client.setdefault(client_id, []).append(receipt_id)
+
+    totals = {
+        "clients": len(by_client),
+        "receipts": 0,
+        "allocations": 0,
+        "allocated": ZERO,
+        "invoices_paid": 0,
+        "left_unallocated": ZERO,
+    }
+    for client_ids in chunked(list(by_client), PARTITION_SIZE):
+        _, stats = allocate_receipts(
+            [receipt_id for client_id in client_ids for receipt_id in by_client[client_id]],
+            dry_run=dry_run,
+        )
+        for name, value in stats.items():
+            totals[name] += value
+
+    elapsed = time.perf_counter() - clock
+    totals["total_ms"] = round(elapsed * 1000, 1)
+    totals["receipts_per_s"] = round(totals["receipts"] / elapsed, 1) if elapsed else None
+    return totals
@@ -0,0 +1,379 @@
+# dashboards/super_admin/services/receivables.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from dashboards.super_admin.models.base import month_bounds
+from dashboards.super_admin.models.gst import (
+    ClientAdvanceLedger,
+    ClientBalance,
+    ClientBalanceCheckpoint,
+    ClientLedgerEntry,
+    GSTInvoice,
+    Receipt,
+    ReceiptAllocation,
+)
+
+
+LEDGER_BATCH_SIZE = 500
+
+ZERO = Decimal("0.00")
+
+BALANCE_FIELDS = ("balance", "outstanding", "advance")
+
+# (checkpoint field, first day overdue, last day overdue); not yet due counts as 0-30
+AGEING_BUCKETS = (
+    ("due_0_30", None, 30),
+    ("due_31_60", 31, 60),
+    ("due_61_90", 61, 90),
+    ("due_90_plus", 91, None),
+)
+
+CHECKPOINT_FIELDS = (*BALANCE_FIELDS, *(bucket for bucket, _, _ in AGEING_BUCKETS))
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+# =====================================================
+# ENTRIES
+# =====================================================
+def invoice_amount(invoice):
+    """
+    What an invoice adds to its client: the grand total, nothing once cancelled or deleted
+    """
+    if invoice.status == "cancelled" or invoice.is_deleted:
+        return ZERO
+    return invoice.grand_total
+
+
+def advance_amount(row):
+    return row.amount if row.entry_type == "credit" else -row.amount
+
+
+def invoice_entry(invoice, previous=ZERO):
+    change = invoice_amount(invoice) - previous
+    return ClientLedgerEntry(
+        clients_id=invoice.clients_id,
+        entry_date=invoice.invoice_date or timezone.localdate(),
+        kind="invoice",
+        invoice_id=invoice.pk,
+        balance_change=change,
+        outstanding_change=change,
+        narration=f"Invoice {invoice.invoice_no}",
+    )
+
+
+def receipt_entry(receipt, previous=ZERO, removed=False):
+    # allocations draw on net_amount, TDS is not settled against invoices
+    change = (ZERO if removed else receipt.net_amount) - previous
+    return ClientLedgerEntry(
+        clients_id=receipt.clients_id,
+        entry_date=receipt.payment_date,
+        kind="receipt",
+        receipt_id=None if removed else receipt.pk,
+        balance_change=-change,
+        narration=f"Receipt {receipt.receipt_no}" + (" deleted" if removed else ""),
+    )
+
+
+def allocation_entry(allocation, clients_id, previous=ZERO, removed=False):
+    change = (ZERO if removed else allocation.applied_amount) - previous
+    return ClientLedgerEntry(
+        clients_id=clients_id,
+        entry_date=timezone.localdate(),
+        kind="allocation",
+        invoice_id=allocation.invoice_id,
+        allocation_id=None if removed else allocation.pk,
+        outstanding_change=-change,
+        narration=f"Allocation to invoice {allocation.invoice_id}" + (" deleted" if removed else ""),
+    )
+
+
+def advance_entry(row, previous=ZERO, removed=False):
+    change = (ZERO if removed else advance_amount(row)) - previous
+    return ClientLedgerEntry(
+        clients_id=row.clients_id,
+        entry_date=timezone.localdate(),
+        kind="advance",
+        advance_entry_id=None if removed else row.pk,
+        advance_change=change,
+        narration=row.narration[:255],
+    )
+
+
+def post(entries):
+    """
+    Write ledger entries and move the balances they touch, atomically:
+    the ClientBalance rows are locked in clients_id order (no deadlock
+    between two posts), each entry gets the running figures after it,
+    then one bulk insert of the entries and one bulk update of the
+    balances. Entries that change nothing are dropped.
+    """
+    entries = [
+        entry for entry in entries
+        if entry.balance_change or entry.outstanding_change or entry.advance_change
+    ]
+    if not entries:
+        return []
+
+    client_ids = sorted({entry.clients_id for entry in entries})
+    now = timezone.now()
+
+    with transaction.atomic():
+        ClientBalance.objects.bulk_create(
+            [ClientBalance(clients_id=client_id) for client_id in client_ids],
+            ignore_conflicts=True,
+        )
+        balances = {
+            balance.clients_id: balance
+            for balance in ClientBalance.objects.select_for_update().filter(
+                clients_id__in=client_ids
+            ).order_by("clients_id")
+        }
+
+        for entry in entries:
+            current = balances[entry.clients_id]
+            current.balance += entry.balance_change
+            current.outstanding += entry.outstanding_change
+            current.advance += entry.advance_change
+            entry.balance = current.balance
+            entry.outstanding = current.outstanding
+            entry.advance = current.advance
+
+        for balance in balances.values():
+            balance.updated_at = now
+
+        ClientLedgerEntry.objects.bulk_create(entries, batch_size=LEDGER_BATCH_SIZE)
+        ClientBalance.objects.bulk_update(
+            balances.values(), [*BALANCE_FIELDS, "updated_at"], batch_size=LEDGER_BATCH_SIZE
+        )
+
+    return entries
+
+
+def post_invoices(invoices):
+    """
+    Ledger entries for invoices written with bulk_create (no save())
+    """
+    return post([invoice_entry(invoice) for invoice in invoices])
+
+
+def balances_for(client_ids):
+    """
+    {clients_id: {balance, outstanding, advance}}, one primary key lookup
+    """
+    figures = {client_id: dict.fromkeys(BALANCE_FIELDS, ZERO) for client_id in client_ids}
+    for row in ClientBalance.objects.filter(clients_id__in=client_ids).values("clients_id", *BALANCE_FIELDS):
+        figures[row.pop("clients_id")] = row
+    return figures
+
+
+# =====================================================
+# FROM THE RAW ROWS
+# =====================================================
+def raw_balances(as_of=None, client_ids=None):
+    """
+    {clients_id: {balance, outstanding, advance}} summed from the invoices,
+    receipts, allocations and advance rows (up to as_of when given).
+    This is what the running balances and checkpoints must agree with.
+    """
+    invoices = GSTInvoice.objects.exclude(status="cancelled")
+    receipts = Receipt.objects.all()
+    allocations = ReceiptAllocation.objects.all()
+    advances = ClientAdvanceLedger.objects.all()
+
+    if as_of is not None:
+        invoices = invoices.filter(invoice_date__lte=as_of)
+        receipts = receipts.filter(payment_date__lte=as_of)
+        allocations = allocations.filter(created_at__date__lte=as_of)
+        advances = advances.filter(created_at__date__lte=as_of)
+    if client_ids is not None:
+        invoices = invoices.filter(clients_id__in=client_ids)
+        receipts = receipts.filter(clients_id__in=client_ids)
+        allocations = allocations.filter(receipt__clients_id__in=client_ids)
+        advances = advances.filter(clients_id__in=client_ids)
+
+    totals = {}
+
+    def add(rows, changes):
+        for client_id, amount in rows:
+            figures = totals.setdefault(client_id, dict.fromkeys(BALANCE_FIELDS, ZERO))
+            for name, sign in changes:
+                figures[name] += sign * amount
+
+    add(
+        invoices.values("clients_id").annotate(total=Sum("grand_total")).values_list("clients_id", "total"),
+        [("balance", 1), ("outstanding", 1)],
+    )
+    add(
+        receipts.values("clients_id").annotate(total=Sum("net_amount")).values_list("clients_id", "total"),
+        [("balance", -1)],
+    )
+    add(
+        allocations.values("receipt__clients_id").annotate(total=Sum("applied_amount"))
+        .values_list("receipt__clients_id", "total"),
+        [("outstanding", -1)],
+    )
+    add(
+        advances.values("clients_id").annotate(
+            total=Sum(Case(When(entry_type="credit", then=F("amount")), default=-F("amount"), output_field=MONEY))
+        ).values_list("clients_id", "total"),
+        [("advance", 1)],
+    )
+    return totals
+
+
+def ageing(as_of, client_ids=None):
+    """
+    {clients_id: {due_0_30, due_31_60, due_61_90, due_90_plus}} of the
+    invoice amounts still open at as_of, in one grouped query
+    """
+    paid = ReceiptAllocation.objects.filter(
+        invoice=OuterRef("pk"), created_at__date__lte=as_of
+    ).order_by().values("invoice").annotate(total=Sum("applied_amount")).values("total")
+
+    invoices = GSTInvoice.objects.exclude(status="cancelled").filter(invoice_date__lte=as_of)
+    if client_ids is not None:
+        invoices = invoices.filter(clients_id__in=client_ids)
+
+    def overdue_between(first, last):
+        condition = Q()
+        if first is not None:
+            condition &= Q(aged_from__lte=as_of - timedelta(days=first))
+        if last is not None:
+            condition &= Q(aged_from__gte=as_of - timedelta(days=last))
+        return Sum(Case(When(condition, then=F("open_amount")), default=Value(ZERO), output_field=MONEY))
+
+    rows = invoices.annotate(
+        open_amount=ExpressionWrapper(
+            F("grand_total") - Coalesce(Subquery(paid, output_field=MONEY), Value(ZERO)),
+            output_field=MONEY,
+        ),
+        aged_from=Coalesce("due_date", "invoice_date"),
+    ).filter(open_amount__gt=0).values("clients_id").annotate(**{
+        bucket: overdue_between(first, last) for bucket, first, last in AGEING_BUCKETS
+    })
+
+    return {
+        row.pop("clients_id"): row
+        for row in rows
+    }
+
+
+# =====================================================
+# CHECKPOINTS
+# =====================================================
+def checkpoint_figures(as_of, client_ids=None):
+    """
+    {clients_id: checkpoint values} at as_of, clients with nothing open left out
+    """
+    figures = {}
+    for client_id, values in raw_balances(as_of, client_ids).items():
+        figures.setdefault(client_id, dict.fromkeys(CHECKPOINT_FIELDS, ZERO)).update(values)
+    for client_id, values in ageing(as_of, client_ids).items():
+        figures.setdefault(client_id, dict.fromkeys(CHECKPOINT_FIELDS, ZERO)).update(values)
+    return {
+        client_id: values
+        for client_id, values in figures.items()
+        if any(values.values())
+    }
+
+
+def close_month(month, client_ids=None):
+    """
+    (Re)write the checkpoints of the month from the raw rows: an upsert
+    of every client with an open figure and one DELETE of the checkpoints
+    of clients that no longer have one. Returns the number written.
+    """
+    _, as_of = month_bounds(month)
+    figures = checkpoint_figures(as_of, client_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        stale = ClientBalanceCheckpoint.objects.filter(month=as_of).exclude(clients_id__in=list(figures))
+        if client_ids is not None:
+            stale = stale.filter(clients_id__in=client_ids)
+        stale.delete()
+
+        ClientBalanceCheckpoint.objects.bulk_create(
+            [
+                ClientBalanceCheckpoint(clients_id=client_id, month=as_of, updated_at=now, **values)
+                for client_id, values in figures.items()
+            ],
+            batch_size=LEDGER_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["month", "clients"],
+            update_fields=[*CHECKPOINT_FIELDS, "updated_at"],
+        )
+    return len(figures)
+
+
+def checkpoint_drift(month):
+    """
+    [(clients_id, field, stored, expected)] where the stored checkpoints
+    of the month disagree with the raw rows
+    """
+    _, as_of = month_bounds(month)
+    expected = checkpoint_figures(as_of)
+    stored = {
+        row.pop("clients_id"): row
+        for row in ClientBalanceCheckpoint.objects.filter(month=as_of).values("clients_id", *CHECKPOINT_FIELDS)
+    }
+
+    drift = []
+    for client_id in sorted(set(expected) | set(stored)):
+        have = stored.get(client_id, {})
+        want = expected.get(client_id, {})
+        for name in CHECKPOINT_FIELDS:
+            if have.get(name, ZERO) != want.get(name, ZERO):
+                drift.append((client_id, name, have.get(name), want.get(name, ZERO)))
+    return drift
+
+
+def balance_drift():
+    """
+    {clients_id: {field: (running, expected)}} where ClientBalance disagrees with the raw rows
+    """
+    expected = raw_balances()
+    running = {
+        row.pop("clients_id"): row
+        for row in ClientBalance.objects.values("clients_id", *BALANCE_FIELDS)
+    }
+
+    drift = {}
+    for client_id in set(expected) | set(running):
+        have = running.get(client_id, {})
+        want = expected.get(client_id, {})
+        fields = {
+            name: (have.get(name, ZERO), want.get(name, ZERO))
+            for name in BALANCE_FIELDS
+            if have.get(name, ZERO) != want.get(name, ZERO)
+        }
+        if fields:
+            drift[client_id] = fields
+    return drift
+
+
+def post_adjustments(drift):
+    """
+    Bring drifted balances back to the raw rows with one adjustment entry
+    per client, so the entry chain keeps adding up to the balance
+    """
+    today = timezone.localdate()
+    return post([
+        ClientLedgerEntry(
+            clients_id=client_id,
+            entry_date=today,
+            kind="adjustment",
+            narration="Rebuild from invoices, receipts and allocations",
+            **{
+                f"{name}_change": expected - running
+                for name, (running, expected) in fields.items()
+            },
+        )
+        for client_id, fields in sorted(drift.items())
+    ])
@@ -0,0 +1,166 @@
+# dashboards/super_admin/services/slab_index.py
+import threading
+import time
+from bisect import bisect_right
+
+from django.db.models import Count, Max, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboards.super_admin.models.clients import SlabRate
+
+
+# seconds between two fingerprint checks against the database
+SLAB_INDEX_TTL = 30
+
+
+def slab_amount(slab, quantity):
+    """
+    per_unit -> rate x quantity, fixed and flat -> the slab amount
+    """
+    if slab.price_type == "per_unit":
+        return slab.amount * quantity
+    return slab.amount
+
+
+# =====================================================
+# INDEX
+# =====================================================
+class SlabIndex:
+    """
+    Active slabs per billing_mode. Modes with quantity tiers keep their
+    tiers sorted by min_qty next to a list of the min_qty boundaries, a
+    lookup is one bisect. Modes without tiers have a single price.
+    """
+
+    def __init__(self, slabs):
+        tiers = {}
+        self.single = {}
+        for slab in slabs:
+            if slab.min_qty is None:
+                self.single.setdefault(slab.billing_mode, slab)
+            else:
+                tiers.setdefault(slab.billing_mode, []).append(slab)
+
+        self.tiers = {}
+        for billing_mode, rows in tiers.items():
+            rows.sort(key=lambda slab: (slab.min_qty, slab.pk or 0))
+            self.tiers[billing_mode] = ([slab.min_qty for slab in rows], rows)
+
+    @classmethod
+    def load(cls):
+        return cls(SlabRate.objects.filter(is_active=True).order_by("id"))
+
+    def tier_for(self, billing_mode, quantity):
+        entry = self.tiers.get(billing_mode)
+        if entry is None:
+            return self.single.get(billing_mode)
+
+        starts, rows = entry
+        position = bisect_right(starts, quantity) - 1
+        if position < 0:
+            return None
+        slab = rows[position]
+        if slab.max_qty is not None and quantity > slab.max_qty:
+            return None
+        return slab
+
+    def price_for(self, billing_mode, quantity):
+        slab = self.tier_for(billing_mode, quantity)
+        return None if slab is None else slab_amount(slab, quantity)
+
+
+class SlabIndexCache:
+    """
+    Per-process SlabIndex. Saves and deletes in this process drop it at
+    once (signals); edits made elsewhere, including queryset soft deletes
+    that send no signal, are picked up by comparing a cheap fingerprint
+    of the active slabs at most every SLAB_INDEX_TTL seconds.
+    """
+
+    def __init__(self, ttl=SLAB_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def fingerprint():
+        return tuple(
+            SlabRate.objects.filter(is_active=True).aggregate(
+                count=Count("id"), ids=Sum("id"), updated=Max("updated_at")
+            ).values()
+        )
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now - self._checked_at < self.ttl:
+                return self._index
+
+            fingerprint = self.fingerprint()
+            if self._index is None or fingerprint != self._fingerprint:
+                self._index = SlabIndex.load()
+                self._fingerprint = fingerprint
+            self._checked_at = now
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+
+slab_index = SlabIndexCache()
+
+
+@receiver(post_save, sender=SlabRate)
+@receiver(post_delete, sender=SlabRate)
+def _drop_slab_index(**kwargs):
+    slab_index.invalidate()
+
+
+def tier_for(billing_mode, quantity):
+    return slab_index.get().tier_for(billing_mode, quantity)
+
+
+def price_for(billing_mode, quantity):
+    """
+    Price of quantity units of billing_mode at the matching tier, None when no tier holds it
+    """
+    return slab_index.get().price_for(billing_mode, quantity)
+
+
+# =====================================================
+# WRITE TIME VALIDATION
+# =====================================================
+def tier_conflict(billing_mode, min_qty, max_qty, exclude_pk=None):
+    """
+    Message when [min_qty, max_qty] overlaps another active tier of the
+    billing_mode or leaves a gap next to its neighbours, else None.
+    """
+    if min_qty is None:
+        return None
+    if max_qty is not None and min_qty > max_qty:
+        return "Min qty cannot be greater than max qty"
+
+    others = SlabRate.objects.filter(
+        billing_mode=billing_mode, is_active=True, min_qty__isnull=False
+    ).exclude(pk=exclude_pk).values_list("slab_name", "min_qty", "max_qty")
+
+    upper = float("inf") if max_qty is None else max_qty
+    below = above = None
+    for name, other_min, other_max in others:
+        other_upper = float("inf") if other_max is None else other_max
+        if other_min <= upper and min_qty <= other_upper:
+            return f"Overlaps {name} ({other_min} - {other_max if other_max is not None else 'up'})"
+        if other_upper < min_qty and (below is None or other_upper > below[1]):
+            below = (name, other_upper)
+        if other_min > upper and (above is None or other_min < above[1]):
+            above = (name, other_min)
+
+    if below and below[1] + 1 != min_qty:
+        return f"Gap after {below[0]}, the next tier must start at {below[1] + 1}"
+    if above and upper + 1 != above[1]:
+        return f"Gap before {above[0]}, this tier must end at {above[1] - 1}"
+    return None
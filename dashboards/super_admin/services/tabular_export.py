@@ -0,0 +1,101 @@
+# dashboards/super_admin/services/tabular_export.py
+import csv
+import json
+import tempfile
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+
+# rows fetched per round trip by .iterator()
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ("csv", "xlsx", "jsonl")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class _Echo:
+    """
+    csv.writer target that hands each line back instead of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    """
+    Streamed, one line at a time, nothing is held in memory
+    """
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def jsonl_response(filename, header, rows):
+    """
+    One JSON object per line, streamed like the CSV
+    """
+    def lines():
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+    response = StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.jsonl"'
+    return response
+
+
+def _xlsx_value(value):
+    # Excel has no timezones
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    if isinstance(value, (dict, list)):
+        return str(value)
+    return value
+
+
+def xlsx_response(filename, header, rows, title="Sheet1"):
+    """
+    openpyxl write-only mode spills rows to a temp file as they are appended,
+    the finished workbook is streamed from disk
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append([_xlsx_value(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def export_response(export_format, filename, header, rows, title="Sheet1", labels=None):
+    """
+    header holds the field names (JSONL keys), labels the CSV / XLSX column titles
+    """
+    if export_format == "jsonl":
+        return jsonl_response(filename, header, rows)
+
+    titles = [(labels or {}).get(name, name) for name in header]
+    if export_format == "xlsx":
+        return xlsx_response(filename, titles, rows, title=title)
+    return csv_response(filename, titles, rows)
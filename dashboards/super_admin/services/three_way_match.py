@@ -0,0 +1,337 @@
+# dashboards/super_admin/services/three_way_match.py
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dashboards.super_admin.models.finance import (
+    BillDetails,
+    BillDetailsItem,
+    GoodsReceiptNoteItem,
+    PurchaseOrderItem,
+)
+
+
+MATCH_BATCH_SIZE = 500
+
+# PO statuses whose lines can still be received / billed ("received" is set by GRNAPI)
+OPEN_PO_STATUSES = ("accepted", "received")
+
+# percentages: billed quantity over received, unit price against the PO rate
+DEFAULT_TOLERANCES = {
+    "quantity_pct": Decimal("0"),
+    "price_pct": Decimal("2"),
+}
+
+
+class ThreeWayMatchError(Exception):
+    pass
+
+
+def tolerances():
+    """
+    settings.THREE_WAY_MATCH_TOLERANCES = {"price_pct": 5} overrides the defaults
+    """
+    overrides = getattr(settings, "THREE_WAY_MATCH_TOLERANCES", {})
+    return {
+        name: Decimal(str(overrides.get(name, default)))
+        for name, default in DEFAULT_TOLERANCES.items()
+    }
+
+
+def match_key(description, sku=""):
+    """
+    SKU when the line has one, else the description with case and spacing folded
+    """
+    if sku and sku.strip():
+        return "sku:" + sku.strip().upper()
+    return " ".join((description or "").lower().split())
+
+
+def with_tolerance(quantity, pct):
+    return int(quantity * (1 + pct / 100))
+
+
+# =====================================================
+# OPEN PO LINE INDEX
+# =====================================================
+class OpenLineIndex:
+    """
+    Open PO lines of a set of parties keyed by (party, match key), oldest
+    order first. Built from one query, every lookup is a dict hit.
+    A line with a SKU is reachable through its SKU and its description.
+    """
+
+    def __init__(self, lines):
+        self.lines = {}
+        for line in lines:
+            party_id = line.purchase_order.party_master_id
+            keys = {match_key(line.description)}
+            if line.sku:
+                keys.add(match_key(line.description, line.sku))
+            for key in keys:
+                self.lines.setdefault((party_id, key), []).append(line)
+
+    @classmethod
+    def load(cls, party_ids):
+        """
+        Locks the loaded lines (PostgreSQL) until the caller's transaction ends
+        """
+        lines = (
+            PurchaseOrderItem.objects
+            .select_related("purchase_order")
+            .select_for_update(of=("self",))
+            .filter(
+                purchase_order__party_master_id__in=party_ids,
+                purchase_order__status__in=OPEN_PO_STATUSES,
+                purchase_order__is_deleted=False,
+                billed_quantity__lt=F("quantity"),
+            )
+            .order_by("purchase_order__po_date", "purchase_order_id", "id")
+        )
+        return cls(lines)
+
+    def candidates(self, party_id, description, sku=""):
+        return self.lines.get((party_id, match_key(description, sku)), [])
+
+
+def match_bill_line(item, candidates, limits):
+    """
+    Match one bill line against its candidate PO lines, first fit wins.
+    On a match the PO line's billed_quantity moves in memory.
+    Returns the matched PO line or None, item carries the outcome.
+    """
+    bill = item.bill
+    short = None
+    off_price = None
+
+    for line in candidates:
+        if bill.purchase_order_id and line.purchase_order_id != bill.purchase_order_id:
+            continue
+
+        if abs(item.unit_price - line.rate) > line.rate * limits["price_pct"] / 100:
+            off_price = off_price or line
+            continue
+
+        billable = with_tolerance(line.received_quantity, limits["quantity_pct"]) - line.billed_quantity
+        if item.quantity > billable:
+            short = short or line
+            continue
+
+        line.billed_quantity += item.quantity
+        item.po_item = line
+        item.match_status = "matched"
+        item.match_note = ""
+        return line
+
+    item.po_item = None
+    if short:
+        item.match_status = "quantity_mismatch"
+        item.match_note = (
+            f"Billed {item.quantity}, received {short.received_quantity}, "
+            f"already billed {short.billed_quantity} on {short.purchase_order.po_number}"
+        )
+    elif off_price:
+        item.match_status = "price_mismatch"
+        item.match_note = (
+            f"Unit price {item.unit_price} against PO rate {off_price.rate} "
+            f"on {off_price.purchase_order.po_number}"
+        )
+    else:
+        item.match_status = "no_po_line"
+        item.match_note = "No open PO line for this party and item"
+    return None
+
+
+# =====================================================
+# BILLS (daily batch)
+# =====================================================
+def run_bill_matching(bill_date=None, bill_ids=None):
+    """
+    Match the lines of every draft / exception bill of a day (or the given
+    bills) against open PO lines. Lines already matched are left alone.
+    Queries: the bill lines, the open PO line index, then bulk_update of
+    the touched PO lines and bill lines and one UPDATE per bill outcome.
+    Returns stats.
+    """
+    clock = time.perf_counter()
+    stats = {}
+
+    bills = BillDetails.objects.filter(status__in=("draft", "exception"))
+    if bill_date:
+        bills = bills.filter(bill_date=bill_date)
+    if bill_ids:
+        bills = bills.filter(pk__in=bill_ids)
+
+    limits = tolerances()
+
+    with transaction.atomic():
+        items = list(
+            BillDetailsItem.objects
+            .filter(bill__in=bills)
+            .exclude(match_status="matched")
+            .select_related("bill")
+            .order_by("bill__bill_date", "bill_id", "id")
+        )
+        index = OpenLineIndex.load({item.bill.party_master_id for item in items})
+        stats["load_ms"] = round((time.perf_counter() - clock) * 1000, 1)
+
+        step = time.perf_counter()
+        touched = {}
+        failed_bills = set()
+        outcomes = {}
+        for item in items:
+            line = match_bill_line(
+                item,
+                index.candidates(item.bill.party_master_id, item.description, item.sku),
+                limits,
+            )
+            if line:
+                touched[line.pk] = line
+            else:
+                failed_bills.add(item.bill_id)
+            outcomes[item.match_status] = outcomes.get(item.match_status, 0) + 1
+        stats["match_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+        step = time.perf_counter()
+        PurchaseOrderItem.objects.bulk_update(
+            touched.values(), ["billed_quantity"], batch_size=MATCH_BATCH_SIZE
+        )
+        BillDetailsItem.objects.bulk_update(
+            items, ["po_item", "match_status", "match_note"], batch_size=MATCH_BATCH_SIZE
+        )
+
+        processed = {item.bill_id for item in items}
+        BillDetails.objects.filter(pk__in=processed - failed_bills).update(
+            status="matched", matched_at=timezone.now()
+        )
+        BillDetails.objects.filter(pk__in=failed_bills).update(status="exception")
+        stats["write_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    stats.update({
+        "bills": len(processed),
+        "bills_matched": len(processed - failed_bills),
+        "bills_exception": len(failed_bills),
+        "lines": len(items),
+        "outcomes": outcomes,
+        "po_lines_updated": len(touched),
+        "total_ms": round((time.perf_counter() - clock) * 1000, 1),
+    })
+    return stats
+
+
+# =====================================================
+# GRN RECEIPTS
+# =====================================================
+def receive_grn(grn, items_data):
+    """
+    Book the GRN lines against the lines of its purchase order and move
+    received_quantity. Items name a PO line by "po_item_id" or by
+    description / sku. Without items a "fully" received GRN receives the
+    outstanding quantity of every line. Call inside a transaction.
+    Returns the created GoodsReceiptNoteItem rows.
+    """
+    lines = list(
+        PurchaseOrderItem.objects
+        .select_for_update()
+        .filter(purchase_order_id=grn.purchase_order_id)
+        .order_by("id")
+    )
+    by_id = {line.pk: line for line in lines}
+    by_key = {}
+    for line in lines:
+        by_key.setdefault(match_key(line.description), []).append(line)
+        if line.sku:
+            by_key.setdefault(match_key(line.description, line.sku), []).append(line)
+
+    if not items_data and grn.status == "fully":
+        items_data = [
+            {"po_item_id": line.pk, "quantity": line.quantity - line.received_quantity}
+            for line in lines
+            if line.quantity > line.received_quantity
+        ]
+
+    limits = tolerances()
+    receipts = []
+    for item in items_data:
+        try:
+            quantity = int(item.get("quantity"))
+        except (TypeError, ValueError):
+            raise ThreeWayMatchError("Every GRN item needs a quantity")
+        if quantity <= 0:
+            raise ThreeWayMatchError("GRN item quantity must be positive")
+
+        if item.get("po_item_id"):
+            try:
+                line = by_id.get(int(item["po_item_id"]))
+            except (TypeError, ValueError):
+                line = None
+        else:
+            candidates = by_key.get(match_key(item.get("description"), item.get("sku", "")), [])
+            line = next(
+                (c for c in candidates if c.received_quantity < c.quantity),
+                candidates[0] if candidates else None,
+            )
+        if line is None:
+            raise ThreeWayMatchError(f"No line on this purchase order for {item}")
+
+        allowed = with_tolerance(line.quantity, limits["quantity_pct"]) - line.received_quantity
+        if quantity > allowed:
+            raise ThreeWayMatchError(
+                f"Receiving {quantity} of '{line.description}', only {max(allowed, 0)} outstanding"
+            )
+
+        line.received_quantity += quantity
+        receipts.append(GoodsReceiptNoteItem(
+            grn=grn,
+            po_item=line,
+            description=line.description,
+            sku=line.sku,
+            quantity=quantity,
+        ))
+
+    GoodsReceiptNoteItem.objects.bulk_create(receipts, batch_size=MATCH_BATCH_SIZE)
+    PurchaseOrderItem.objects.bulk_update(
+        {receipt.po_item_id: receipt.po_item for receipt in receipts}.values(),
+        ["received_quantity"],
+        batch_size=MATCH_BATCH_SIZE,
+    )
+    return receipts
+
+
+def parse_bill_items(items_data):
+    """
+    Payload bill items -> unsaved BillDetailsItem rows (amount = quantity * unit_price)
+    """
+    items = []
+    for item in items_data:
+        try:
+            quantity = int(item.get("quantity", 1))
+            unit_price = Decimal(str(item.get("unit_price", 0)))
+        except (TypeError, ValueError, InvalidOperation):
+            raise ThreeWayMatchError(f"Invalid quantity or unit price on item {item.get('description')!r}")
+        items.append(BillDetailsItem(
+            description=item.get("description"),
+            sku=item.get("sku") or "",
+            quantity=quantity,
+            unit_price=unit_price,
+            amount=quantity * unit_price,
+        ))
+    return items
+
+
+def parse_bill_ids(values):
+    """
+    Payload bill_ids -> list of ints, None when not given
+    """
+    if not values:
+        return None
+    if not isinstance(values, (list, tuple)):
+        raise ThreeWayMatchError("bill_ids must be a list of bill ids")
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise ThreeWayMatchError("bill_ids must be a list of bill ids")
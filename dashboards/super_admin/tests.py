@@ -1,3 +1,1527 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from dashboards.branch.models.branch import Branch
+from dashboards.super_admin.api.advance_api import AdvanceAPI
+from dashboards.super_admin.api.asset_api import DepreciationSchedulerAPI
+from dashboards.super_admin.api.attendance_api import AttendanceAPI, AttendanceMatrixAPI
+from dashboards.super_admin.api.bank_statement_api import BankStatementAPI, BankStatementLineAPI
+from dashboards.super_admin.api.deals_api import DealBulkStatusAPI
+from dashboards.super_admin.api.employee_api import EmployeePhotoAPI
+from dashboards.super_admin.api.list_query import ListSpec
+from dashboards.super_admin.api.quotation_api import QuotationInvoiceBatchAPI
+from dashboards.super_admin.api.salary_api import SalaryAPI, with_attendance_days
+from dashboards.super_admin.models.agent import Agent, Deal, DealStatusEvent
+from dashboards.super_admin.models.base import ArchivedDeletedRecord, DeletedRecord, Location, PartyMaster
+from dashboards.super_admin.models.clients import Clients, SlabRate
+from dashboards.super_admin.models.controll_no import DocumentControl, NumberCounter
+from dashboards.super_admin.models.finance import (
+    BankStatement,
+    BankStatementLine,
+    BillDetails,
+    PurchaseOrder,
+    PurchaseOrderItem,
+)
+from dashboards.super_admin.models.gst import (
+    ClientBalance,
+    ClientBalanceCheckpoint,
+    ClientLedgerEntry,
+    GSTInvoice,
+    Quotation,
+    Receipt,
+)
+from dashboards.super_admin.models.hr import (
+    AdvanceInstallment,
+    AdvanceRequest,
+    Attendance,
+    AttendanceMonthlySummary,
+    Department,
+    Designation,
+    Employee,
+    SalarySlip,
+)
+from dashboards.super_admin.models.inventory import Asset, AssetValuationSnapshot, DepreciationScheduler, Expense
+from dashboards.super_admin.services import billing_run, deal_transitions, receivables
+from dashboards.super_admin.services.attendance_marking import (
+    BulkAttendanceError,
+    build_rows,
+    bulk_mark_attendance,
+)
+from dashboards.super_admin.services.counters import next_vendor_bill_number, take, yearly_numbers
+from dashboards.super_admin.services.deal_transitions import DealTransitionError, transition_deals
+from dashboards.super_admin.services.deleted_record_archive import ArchiveLock, archive_deleted_records
+from dashboards.super_admin.services.depreciation import (
+    book_values_as_of,
+    charge_from,
+    compute_depreciation,
+    to_columns,
+)
+from dashboards.super_admin.services.document_sequence import DocumentSequenceAllocator
+from dashboards.super_admin.services.employee_photos import derivative_name
+from dashboards.super_admin.services.payroll import PayrollError, run_payroll
+from dashboards.super_admin.services.purchase_orders import PurchaseOrderError, line_amount, write_items
+from dashboards.super_admin.services.slab_index import SlabIndex, price_for, slab_index, tier_conflict
+from dashboards.super_admin.services.receipt_allocation import OpenInvoices, allocate, allocate_receipts
+from dashboards.super_admin.services.three_way_match import ThreeWayMatchError, parse_bill_ids
+
+
+# =====================================================
+# QUERY PLAN REGRESSION (soft delete partial indexes)
+# =====================================================
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class SoftDeleteQueryPlanTests(TestCase):
+    """
+    Hot list queries must be answered from an index, a plain
+    "SCAN <table>" means the partial index is no longer used.
+    """
+
+    def query_plan(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, qs, index_name):
+        table = qs.model._meta.db_table
+        plan = self.query_plan(qs)
+
+        full_scans = [
+            line for line in plan
+            if line.split(" ")[:2] == ["SCAN", table] and "INDEX" not in line
+        ]
+        self.assertFalse(full_scans, f"Full table scan on {table}: {plan}")
+        self.assertTrue(
+            any(index_name in line for line in plan),
+            f"{index_name} not used: {plan}",
+        )
+
+    def test_attendance_by_date(self):
+        qs = Attendance.objects.filter(date=date(2026, 1, 8)).select_related(
+            "employee", "employee__department"
+        )
+        self.assertUsesIndex(qs, "attendance_live_date_emp_idx")
+
+    def test_attendance_by_employee_month(self):
+        qs = Attendance.objects.filter(
+            employee_id=1, date__range=(date(2026, 1, 1), date(2026, 1, 31))
+        )
+        self.assertUsesIndex(qs, "attendance_live_emp_date_idx")
+
+    def test_attendance_matrix(self):
+        qs = AttendanceMonthlySummary.objects.filter(
+            month=date(2026, 1, 1), branch_id=1, employee__is_deleted=False
+        )
+        self.assertUsesIndex(qs, "attendance_summary_month_idx")
+
+    def test_salary_register_attendance_days(self):
+        qs = with_attendance_days(SalarySlip.objects.all()).values("id", "attendance_days")
+        self.assertUsesIndex(qs, "attendance_live_emp_date_idx")
+
+    def test_salary_slips_by_month(self):
+        qs = SalarySlip.objects.filter(
+            salary_date__range=(date(2026, 1, 1), date(2026, 1, 31))
+        ).select_related("employee")
+        self.assertUsesIndex(qs, "salaryslip_live_date_idx")
+
+    def test_employees_by_branch(self):
+        qs = Employee.objects.filter(branch_id=1).select_related("department", "designation")
+        self.assertUsesIndex(qs, "employee_live_branch_idx")
+
+    def test_advances_by_employee(self):
+        # the list filters by employee and status, employee alone is served by the FK index
+        qs = AdvanceRequest.objects.filter(employee_id=1, status__in=["active"])
+        self.assertUsesIndex(qs, "advance_live_employee_idx")
+
+    def test_quotations_by_client(self):
+        qs = Quotation.objects.filter(clients_id=1)
+        self.assertUsesIndex(qs, "quotation_live_client_idx")
+
+    def test_expenses_by_branch(self):
+        qs = Expense.objects.filter(branch_id=1).select_related("category")
+        self.assertUsesIndex(qs, "expense_live_branch_idx")
+
+    def test_asset_list(self):
+        qs = Asset.objects.select_related("category").filter(
+            status__in=["active", "maintenance"]
+        )
+        self.assertUsesIndex(qs, "asset_live_status_idx")
+
+    def test_bills_to_match(self):
+        qs = BillDetails.objects.filter(
+            bill_date=date(2026, 1, 8), status__in=["draft", "exception"]
+        )
+        self.assertUsesIndex(qs, "bill_live_date_status_idx")
+
+    def test_ageing_by_month(self):
+        # the unique (month, clients) constraint is created inline, SQLite names it sqlite_autoindex_*
+        qs = ClientBalanceCheckpoint.objects.filter(month=date(2026, 1, 31))
+        self.assertUsesIndex(qs, "(month=?)")
+
+    def test_client_ledger_statement(self):
+        # the clients FK index holds the rowid, so it serves the id order too
+        qs = ClientLedgerEntry.objects.filter(clients_id=1).order_by("-id")
+        self.assertUsesIndex(qs, "(clients_id=?)")
+        self.assertFalse(
+            [line for line in self.query_plan(qs) if "TEMP B-TREE" in line],
+            "Ledger statement sorted outside the index",
+        )
+
+    def test_unreconciled_receipts(self):
+        qs = Receipt.objects.filter(
+            reconciled_at__isnull=True, payment_date__range=(date(2026, 1, 1), date(2026, 1, 31))
+        )
+        self.assertUsesIndex(qs, "receipt_unreconciled_idx")
+
+    def test_unreconciled_expenses(self):
+        qs = Expense.objects.filter(
+            reconciled_at__isnull=True, expense_date__range=(date(2026, 1, 1), date(2026, 1, 31))
+        )
+        self.assertUsesIndex(qs, "expense_unreconciled_idx")
+
+    def test_pending_deal_events(self):
+        qs = DealStatusEvent.objects.filter(processed_at__isnull=True, to_status="converted")
+        self.assertUsesIndex(qs, "deal_event_pending_idx")
+
+
+# =====================================================
+# SET BASED SOFT DELETE
+# =====================================================
+class SoftDeleteQuerySetTests(TestCase):
+
+    def party(self, name, city="Pune"):
+        party = PartyMaster.objects.create(name=name, phone="9000000000")
+        Location.objects.create(parent=party, country="India", state="Maharashtra", city=city)
+        return party
+
+    def location(self, party):
+        return Location.all_objects.get(object_id=party.pk)
+
+    def test_delete_backs_up_and_cascades(self):
+        first, second, kept = self.party("First"), self.party("Second"), self.party("Kept")
+
+        result = PartyMaster.objects.filter(pk__in=[first.pk, second.pk]).delete()
+
+        self.assertEqual(result, (4, {"super_admin.PartyMaster": 2, "super_admin.Location": 2}))
+        self.assertEqual(list(PartyMaster.objects.values_list("pk", flat=True)), [kept.pk])
+        self.assertEqual(list(Location.objects.values_list("object_id", flat=True)), [kept.pk])
+        # parent and children share one deleted_at, restore uses it to find the cascade
+        self.assertEqual(
+            set(PartyMaster.all_objects.filter(is_deleted=True).values_list("deleted_at", flat=True))
+            | set(Location.all_objects.filter(is_deleted=True).values_list("deleted_at", flat=True)),
+            {PartyMaster.all_objects.get(pk=first.pk).deleted_at},
+        )
+
+        backups = {
+            (record.model_name, record.object_id): record.data for record in DeletedRecord.objects.all()
+        }
+        self.assertEqual(
+            sorted(backups), sorted([
+                ("PartyMaster", first.pk), ("PartyMaster", second.pk),
+                ("Location", self.location(first).pk), ("Location", self.location(second).pk),
+            ]),
+        )
+        self.assertEqual(backups[("PartyMaster", first.pk)]["name"], "First")
+        self.assertEqual(backups[("Location", self.location(first).pk)]["object_id"], first.pk)
+
+    def test_deleted_rows_are_not_deleted_again(self):
+        party = self.party("First")
+        party.delete()
+
+        self.assertEqual(PartyMaster.all_objects.filter(pk=party.pk).delete(), (0, {}))
+        self.assertEqual(DeletedRecord.objects.count(), 2)
+
+    def test_sliced_delete_is_refused(self):
+        self.party("First")
+        with self.assertRaises(TypeError):
+            PartyMaster.objects.all()[:1].delete()
+
+    def test_restore_from_backup(self):
+        first, second = self.party("First"), self.party("Second", city="Nagpur")
+        PartyMaster.objects.filter(pk__in=[first.pk, second.pk]).delete()
+        PartyMaster.all_objects.update(phone=None)
+
+        self.assertEqual(PartyMaster.all_objects.filter(pk__in=[first.pk, second.pk]).restore(), 2)
+
+        self.assertEqual(
+            sorted(PartyMaster.objects.values_list("name", "phone")),
+            [("First", "9000000000"), ("Second", "9000000000")],
+        )
+        self.assertEqual(sorted(Location.objects.values_list("city", flat=True)), ["Nagpur", "Pune"])
+        self.assertFalse(DeletedRecord.objects.exists())
+        self.assertEqual(PartyMaster.all_objects.filter(pk=first.pk).restore(), 0)
+
+    def test_restore_leaves_children_deleted_on_their_own(self):
+        party = self.party("First")
+        self.location(party).delete()
+        party.delete()
+
+        party.restore()
+
+        self.assertFalse(party.is_deleted)
+        self.assertTrue(self.location(party).is_deleted)
+
+    def test_hard_delete(self):
+        first, kept = self.party("First"), self.party("Kept")
+        first.delete()
+
+        self.assertEqual(PartyMaster.all_objects.filter(pk=first.pk).hard_delete(), 1)
+
+        self.assertEqual(list(PartyMaster.all_objects.values_list("pk", flat=True)), [kept.pk])
+        self.assertEqual(list(Location.all_objects.values_list("object_id", flat=True)), [kept.pk])
+        self.assertFalse(DeletedRecord.objects.exists())
+
+
+# =====================================================
+# DELETED RECORD ARCHIVE
+# =====================================================
+class DeletedRecordArchiveTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name, DELETED_RECORD_ARCHIVE_CODEC="gzip")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.root = Path(media.name) / "archive" / "deleted_records"
+
+    def test_archive_then_restore(self):
+        party = PartyMaster.objects.create(name="Vendor", phone="9000000000")
+        party.delete()
+        # the backup is what a restore reads, the live row keeps only the flags
+        PartyMaster.all_objects.filter(pk=party.pk).update(phone=None)
+        DeletedRecord.objects.update(deleted_at=timezone.now() - timedelta(days=100))
+
+        stats = archive_deleted_records(retention_days=90)
+
+        self.assertEqual((stats["records"], stats["blocks"]), (1, 1))
+        self.assertFalse(DeletedRecord.objects.exists())
+        self.assertEqual(ArchivedDeletedRecord.objects.get().object_id, party.pk)
+
+        self.assertEqual(PartyMaster.all_objects.filter(pk=party.pk).restore(), 1)
+        party = PartyMaster.objects.get(pk=party.pk)
+        self.assertEqual(party.phone, "9000000000")
+        self.assertFalse(ArchivedDeletedRecord.objects.exists())
+
+    def test_recent_records_stay(self):
+        PartyMaster.objects.create(name="Vendor").delete()
+        self.assertEqual(archive_deleted_records(retention_days=90)["records"], 0)
+        self.assertTrue(DeletedRecord.objects.exists())
+
+    def test_lock_is_exclusive_and_survives_a_crash(self):
+        with ArchiveLock(self.root):
+            with self.assertRaises(RuntimeError):
+                with ArchiveLock(self.root):
+                    pass
+
+        # a run killed mid archive leaves the file, nobody holds the lock
+        (self.root / ".archive.lock").write_text("999999")
+        with ArchiveLock(self.root):
+            pass
+
+
+# =====================================================
+# DEPRECIATION ENGINE
+# =====================================================
+FY_START = date(2025, 4, 1)
+FY_END = date(2026, 3, 31)
+
+
+class DepreciationTests(SimpleTestCase):
+
+    def charge(self, *assets, period_from=FY_START, period_to=FY_END):
+        """
+        assets -> (cost, residual, life, start, method, opening)
+        """
+        columns = to_columns([(pk, *asset) for pk, asset in enumerate(assets, 1)])
+        days, charge, closing = compute_depreciation(columns, period_from, period_to)
+        return days.tolist(), charge.tolist(), closing.tolist()
+
+    def test_slm_full_year(self):
+        days, charge, closing = self.charge((1200, 200, 5, FY_START, "slm", None))
+        self.assertEqual((days, charge, closing), ([365], [200.0], [1000.0]))
+
+    def test_slm_partial_first_year(self):
+        # started on 1 Oct, 182 of 365 days
+        days, charge, closing = self.charge((1200, 200, 5, date(2025, 10, 1), "slm", None))
+        self.assertEqual((days, charge, closing), ([182], [99.73], [1100.27]))
+
+    def test_wdv_full_year(self):
+        # rate = 1 - (1000 / 10000) ** (1 / 5) = 36.90%
+        _, charge, closing = self.charge((10000, 1000, 5, FY_START, "wdv", None))
+        self.assertEqual((charge, closing), ([3690.43], [6309.57]))
+
+    def test_wdv_on_opening_book_value(self):
+        _, charge, _ = self.charge((10000, 1000, 5, FY_START, "wdv", 6309.57))
+        self.assertEqual(charge, [2328.5])
+
+    def test_charge_stops_at_residual_value(self):
+        _, charge, closing = self.charge((1200, 200, 5, FY_START, "slm", 250))
+        self.assertEqual((charge, closing), ([50.0], [200.0]))
+
+    def test_start_after_period_is_not_charged(self):
+        days, charge, _ = self.charge((1200, 200, 5, date(2026, 4, 1), "slm", None))
+        self.assertEqual((days, charge), ([0], [0.0]))
+
+    def test_no_start_date_is_not_charged(self):
+        days, charge, closing = self.charge(
+            (1200, 200, 5, None, "slm", None),
+            (1200, 200, 5, FY_START, "slm", None),
+        )
+        self.assertEqual((days, charge, closing), ([0, 365], [0.0, 200.0], [1200.0, 1000.0]))
+
+    def test_charge_from(self):
+        self.assertEqual(charge_from(FY_START, None), FY_START)
+        self.assertEqual(charge_from(FY_START, date(2025, 9, 30)), date(2025, 10, 1))
+        self.assertEqual(charge_from(date(2025, 10, 1), date(2025, 4, 30)), date(2025, 10, 1))
+        self.assertIsNone(charge_from(None, date(2025, 9, 30)))
+
+
+class BookValueAsOfTests(TestCase):
+
+    def asset(self, code, **fields):
+        return Asset.objects.create(
+            code=code, name=code, useful_life_years=5, purchase_date=FY_START,
+            purchase_value=Decimal("1200"), residual_value=Decimal("200"),
+            current_value=Decimal("1200"), depreciation_start_date=FY_START,
+            location="HQ", **fields
+        )
+
+    def test_from_latest_snapshot(self):
+        asset = self.asset("A-1")
+        AssetValuationSnapshot.objects.create(
+            asset=asset, as_of=date(2025, 6, 30), book_value=Decimal("1150.00"),
+            accumulated_depreciation=Decimal("50.00"),
+        )
+        AssetValuationSnapshot.objects.create(
+            asset=asset, as_of=date(2025, 9, 30), book_value=Decimal("1100.00"),
+            accumulated_depreciation=Decimal("100.00"),
+        )
+        # 182 days after the September snapshot
+        self.assertEqual(book_values_as_of([asset.pk], FY_END), {asset.pk: Decimal("1000.27")})
+
+    def test_without_snapshot_from_purchase_value(self):
+        asset = self.asset("A-2")
+        self.assertEqual(
+            book_values_as_of([asset.pk], date(2025, 4, 30)), {asset.pk: Decimal("1183.56")}
+        )
+
+
+class DepreciationSchedulerAPITests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="accounts@example.com", full_name="Accounts", user_type="super_admin"
+        )
+        Asset.objects.create(
+            code="A-1", name="A-1", useful_life_years=5, purchase_date=FY_START,
+            purchase_value=Decimal("1200"), residual_value=Decimal("200"),
+            current_value=Decimal("1200"), depreciation_start_date=FY_START, location="HQ",
+        )
+
+    def post(self, **data):
+        request = APIRequestFactory().post(
+            "/", {"period_from": "2025-04-01", "period_to": "2025-04-30", **data}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        return DepreciationSchedulerAPI.as_view()(request)
+
+    def test_post_records_the_user_and_refuses_an_overlap(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200, response.data)
+        scheduler = DepreciationScheduler.objects.get(pk=response.data["data"]["scheduler_id"])
+        self.assertEqual(scheduler.posted_by, "accounts@example.com")
+
+        response = self.post(period_from="2025-04-15", period_to="2025-05-15")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(DepreciationScheduler.objects.count(), 1)
+
+    def test_dry_run_posts_nothing(self):
+        response = self.post(dry_run=True)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(DepreciationScheduler.objects.exists())
+
+
+# =====================================================
+# RECEIPT ALLOCATION (FIFO core)
+# =====================================================
+class ReceiptAllocationTests(SimpleTestCase):
+
+    def book(self, *invoices):
+        """
+        invoices -> (invoice_id, invoice_no, open amount), oldest due first, all of client 1
+        """
+        return {1: OpenInvoices([[pk, number, Decimal(amount)] for pk, number, amount in invoices])}
+
+    def test_oldest_invoice_first(self):
+        book = self.book((10, "INV-1", "100"), (11, "INV-2", "100"))
+        allocations, left_over = allocate([(1, 1, Decimal("150"), [])], book)
+        self.assertEqual(allocations, [(1, 1, 10, Decimal("100")), (1, 1, 11, Decimal("50"))])
+        self.assertEqual(left_over, {1: Decimal("0")})
+
+    def test_partial_settlement_carries_to_next_receipt(self):
+        book = self.book((10, "INV-1", "100"), (11, "INV-2", "100"))
+        allocations, _ = allocate(
+            [(1, 1, Decimal("60"), []), (2, 1, Decimal("60"), [])], book
+        )
+        self.assertEqual(allocations, [
+            (1, 1, 10, Decimal("60")),
+            (2, 1, 10, Decimal("40")),
+            (2, 1, 11, Decimal("20")),
+        ])
+        self.assertEqual([row[2] for row in book[1].rows], [Decimal("0"), Decimal("80")])
+
+    def test_over_payment_is_left_unallocated(self):
+        book = self.book((10, "INV-1", "100"))
+        allocations, left_over = allocate([(1, 1, Decimal("250"), [])], book)
+        self.assertEqual(allocations, [(1, 1, 10, Decimal("100"))])
+        self.assertEqual(left_over, {1: Decimal("150")})
+
+    def test_referenced_invoice_paid_first(self):
+        book = self.book((10, "INV-1", "100"), (11, "INV-2", "100"))
+        allocations, _ = allocate([(1, 1, Decimal("120"), ["INV-2"])], book)
+        self.assertEqual(allocations, [(1, 1, 11, Decimal("100")), (1, 1, 10, Decimal("20"))])
+
+    def test_client_without_open_invoices(self):
+        allocations, left_over = allocate([(1, 2, Decimal("50"), [])], self.book((10, "INV-1", "100")))
+        self.assertEqual((allocations, left_over), ([], {1: Decimal("50")}))
+
+
+# =====================================================
+# RECEIVABLES LEDGER
+# =====================================================
+class ReceivablesLedgerTests(TestCase):
+    """
+    The running ClientBalance must always agree with the figures summed from the documents
+    """
+
+    def setUp(self):
+        slab = SlabRate.objects.create(slab_name="Flat", billing_mode="flat", months=1, amount=Decimal("100"))
+        self.client_row = Clients.objects.create(display_name="Acme", client_code="ACME", slab_rate=slab)
+        self.branch = Branch.objects.create(
+            branch_name="Head Office", branch_code="BR-GEN-0001", primary_contact_name="Ops",
+            primary_contact_email="ops@example.com", primary_contact_phone="9000000000",
+        )
+        for document_type, prefix in (("invoice", "INV"), ("receipt", "RCT")):
+            DocumentControl.objects.create(clients=self.client_row, document_type=document_type, prefix=prefix)
+
+    def invoice(self, sub_total):
+        invoice = GSTInvoice(clients=self.client_row, branch=self.branch, sub_total=Decimal(sub_total))
+        invoice.save()
+        return invoice
+
+    def assertBalanceMatchesDocuments(self):
+        balance = ClientBalance.objects.get(clients=self.client_row)
+        self.assertEqual(
+            {name: getattr(balance, name) for name in receivables.BALANCE_FIELDS},
+            receivables.raw_balances().get(self.client_row.pk, dict.fromkeys(receivables.BALANCE_FIELDS, receivables.ZERO)),
+        )
+
+    def test_invoice_receipt_allocation(self):
+        invoice = self.invoice("1000")
+        self.assertBalanceMatchesDocuments()
+
+        receipt = Receipt.objects.create(
+            clients=self.client_row, branch=self.branch, receipt_type="invoice",
+            amount_received=Decimal("400"), payment_mode="bank",
+        )
+        self.assertBalanceMatchesDocuments()
+
+        allocations, _ = allocate_receipts([receipt.pk])
+        self.assertEqual([row[2] for row in allocations], [invoice.pk])
+        self.assertBalanceMatchesDocuments()
+        self.assertEqual(ClientBalance.objects.get(clients=self.client_row).outstanding, invoice.grand_total - 400)
+
+    def test_queryset_delete_and_restore_post_to_the_ledger(self):
+        kept, first, second = self.invoice("100"), self.invoice("200"), self.invoice("300")
+
+        count, per_model = GSTInvoice.objects.filter(pk__in=[first.pk, second.pk]).delete()
+
+        self.assertEqual(per_model["super_admin.GSTInvoice"], 2)
+        self.assertBalanceMatchesDocuments()
+        self.assertEqual(ClientBalance.objects.get(clients=self.client_row).balance, kept.grand_total)
+
+        self.assertEqual(GSTInvoice.all_objects.filter(pk=first.pk).restore(), 1)
+        self.assertBalanceMatchesDocuments()
+
+        # hard deleting a live invoice takes it out too, the deleted one counts nothing already
+        GSTInvoice.all_objects.filter(pk__in=[first.pk, second.pk]).hard_delete()
+        self.assertBalanceMatchesDocuments()
+        self.assertEqual(ClientBalance.objects.get(clients=self.client_row).balance, kept.grand_total)
+
+    def test_instance_delete_returns_the_result(self):
+        invoice = self.invoice("100")
+
+        self.assertEqual(invoice.delete(), (1, {"super_admin.GSTInvoice": 1}))
+        self.assertEqual(invoice.delete(), (0, {}))
+        self.assertBalanceMatchesDocuments()
+
+
+# =====================================================
+# BULK DEAL STATUS TRANSITIONS
+# =====================================================
+class DealTransitionTests(TestCase):
+
+    def setUp(self):
+        slab = SlabRate.objects.create(slab_name="Flat", billing_mode="flat", months=1, amount=Decimal("100"))
+        self.client_row = Clients.objects.create(display_name="Acme", client_code="ACME", slab_rate=slab)
+        self.agent = Agent.objects.create(
+            agent_name="Agent", agent_email="agent@example.com", agent_phone_number="9000000000",
+            agent_type="company", commission_type="percentage", commission_value=Decimal("10"),
+            commission_trigger="deal_closure",
+        )
+
+    def deal(self, status="lead", value="1000"):
+        return Deal.objects.create(
+            client=self.client_row, agent=self.agent, deal_value=Decimal(value), deal_status=status
+        ).pk
+
+    def moved_events(self, to_status):
+        return list(
+            DealStatusEvent.objects.filter(to_status=to_status).exclude(from_status="")
+            .order_by("deal_id").values_list("deal_id", "from_status")
+        )
+
+    def test_applies_valid_and_reports_rejected(self):
+        first, second, invoiced = self.deal(), self.deal(value="2000"), self.deal("invoiced")
+
+        result = transition_deals([first, second, invoiced, 999, first], "converted")
+
+        self.assertEqual(result["requested"], 4)
+        self.assertEqual(result["applied"], [first, second])
+        self.assertEqual(
+            [(row["deal_id"], row["reason"]) for row in result["rejected"]],
+            [(invoiced, "Cannot change status from Invoiced to Converted"), (999, "Deal not found")],
+        )
+        self.assertEqual(
+            dict(Deal.objects.values_list("id", "deal_status")),
+            {first: "converted", second: "converted", invoiced: "invoiced"},
+        )
+        self.assertEqual(self.moved_events("converted"), [(first, "lead"), (second, "lead")])
+
+    def test_already_at_status(self):
+        deal = self.deal("converted")
+        result = transition_deals([deal], "converted")
+        self.assertEqual(result["applied"], [])
+        self.assertEqual(result["rejected"][0]["reason"], "Already Converted")
+
+    def test_unknown_status(self):
+        with self.assertRaises(DealTransitionError):
+            transition_deals([self.deal()], "won")
+
+    def test_commissions_fire_for_moved_deals(self):
+        first, second = self.deal(), self.deal(value="2000")
+        untouched = self.deal("converted")
+
+        result = transition_deals([first, second], "converted")
+
+        run = result["commission_run"]
+        self.assertIsNotNone(run)
+        self.assertEqual((run.event_count, run.deals_commissioned), (2, 2))
+        self.assertEqual(run.total_commission, Decimal("300.00"))
+        self.assertEqual(
+            dict(Deal.objects.filter(commission_calculated=True).values_list("id", "commission_amount")),
+            {first: Decimal("100.00"), second: Decimal("200.00")},
+        )
+        # its pending event belongs to the next batch run, not to this hand-off
+        self.assertFalse(Deal.objects.get(pk=untouched).commission_calculated)
+
+    def test_no_commission_run_for_other_statuses(self):
+        deal = self.deal("converted")
+        result = transition_deals([deal], "invoiced")
+        self.assertEqual(result["applied"], [deal])
+        self.assertIsNone(result["commission_run"])
+
+    def changed_while_planning(self, deal_id, status):
+        """
+        plan_transitions that lets another writer move deal_id after the statuses were read
+        """
+        plan = deal_transitions.plan_transitions
+
+        def planned(current, to_status):
+            Deal.objects.filter(pk=deal_id).update(deal_status=status)
+            return plan(current, to_status)
+
+        return mock.patch.object(deal_transitions, "plan_transitions", planned)
+
+    def test_concurrent_change_is_not_overwritten(self):
+        first, second = self.deal(), self.deal()
+
+        with self.changed_while_planning(second, "cancelled"):
+            result = transition_deals([first, second], "converted")
+
+        self.assertEqual(result["applied"], [first])
+        self.assertEqual(result["rejected"][0]["deal_id"], second)
+        self.assertEqual(Deal.objects.get(pk=second).deal_status, "cancelled")
+
+    def test_concurrent_move_to_same_status_is_not_counted(self):
+        first, second = self.deal(), self.deal()
+
+        with self.changed_while_planning(second, "converted"):
+            result = transition_deals([first, second], "converted")
+
+        self.assertEqual(result["applied"], [first])
+        self.assertEqual([row["deal_id"] for row in result["rejected"]], [second])
+        self.assertEqual(self.moved_events("converted"), [(first, "lead")])
+
+    def bulk_status(self, payload, user=None):
+        request = APIRequestFactory().post("/deals/bulk-status", payload, format="json")
+        force_authenticate(request, user=user or get_user_model().objects.create_user(
+            email="ops@example.com", full_name="Ops", user_type="super_admin"
+        ))
+        return DealBulkStatusAPI.as_view()(request)
+
+    def test_bulk_status_api(self):
+        deal = self.deal()
+
+        response = self.bulk_status({"deal_ids": [deal], "deal_status": "converted"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["applied"], [deal])
+
+    def test_bulk_status_api_rejects_non_string_status(self):
+        deal = self.deal()
+        user = get_user_model().objects.create_user(
+            email="ops@example.com", full_name="Ops", user_type="super_admin"
+        )
+
+        for status in (["converted"], {"status": "converted"}, 1, None):
+            response = self.bulk_status({"deal_ids": [deal], "deal_status": status}, user)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Deal.objects.get(pk=deal).deal_status, "lead")
+
+
+# =====================================================
+# DOCUMENT NUMBER SEQUENCES
+# =====================================================
+class DocumentSequenceTests(TransactionTestCase):
+    """
+    Transactions are real here: blocks are only cached outside an atomic block
+    """
+
+    def setUp(self):
+        slab = SlabRate.objects.create(slab_name="Flat", billing_mode="flat", months=1, amount=Decimal("100"))
+        self.client_row = Clients.objects.create(display_name="Acme", client_code="ACME", slab_rate=slab)
+        for document_type in ("quotation", "invoice"):
+            DocumentControl.objects.create(
+                clients=self.client_row, document_type=document_type,
+                prefix="{DOC}", suffix="{FY}", financial_year="2025-26",
+            )
+
+    def current_number(self, document_type):
+        return DocumentControl.objects.get(document_type=document_type).current_number
+
+    def take(self, allocator, document_type, times=1):
+        return [
+            allocator.next_number(self.client_row.pk, document_type, "2025-26")
+            for _ in range(times)
+        ]
+
+    def test_gapped_numbers_come_from_a_reserved_block(self):
+        allocator = DocumentSequenceAllocator(block_size=5)
+
+        self.assertEqual(
+            self.take(allocator, "quotation", 3),
+            ["QUOTATION/0001/2025-26", "QUOTATION/0002/2025-26", "QUOTATION/0003/2025-26"],
+        )
+        # one reservation for the whole block
+        self.assertEqual(self.current_number("quotation"), 5)
+
+        self.take(allocator, "quotation", 3)
+        self.assertEqual(self.current_number("quotation"), 10)
+
+    def test_gapped_block_of_another_process_leaves_a_gap(self):
+        first, second = DocumentSequenceAllocator(block_size=5), DocumentSequenceAllocator(block_size=5)
+
+        self.assertEqual(self.take(first, "quotation"), ["QUOTATION/0001/2025-26"])
+        self.assertEqual(self.take(second, "quotation"), ["QUOTATION/0006/2025-26"])
+        self.assertEqual(self.take(first, "quotation"), ["QUOTATION/0002/2025-26"])
+
+    def test_gapless_number_returns_on_rollback(self):
+        allocator = DocumentSequenceAllocator(block_size=5)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(self.take(allocator, "invoice"), ["INVOICE/0001/2025-26"])
+                raise RuntimeError
+
+        self.assertEqual(self.current_number("invoice"), 0)
+        self.assertEqual(self.take(allocator, "invoice", 2), ["INVOICE/0001/2025-26", "INVOICE/0002/2025-26"])
+        self.assertEqual(self.current_number("invoice"), 2)
+
+    def test_no_block_cached_inside_a_transaction(self):
+        allocator = DocumentSequenceAllocator(block_size=5)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.take(allocator, "quotation")
+                raise RuntimeError
+
+        self.assertEqual(self.take(allocator, "quotation"), ["QUOTATION/0001/2025-26"])
+
+    def test_locked_series_stops_a_cached_block(self):
+        allocator = DocumentSequenceAllocator(block_size=5)
+        self.take(allocator, "quotation")
+
+        DocumentControl.objects.filter(document_type="quotation").update(is_locked=True)
+        with self.assertRaises(ValidationError):
+            self.take(allocator, "quotation")
+
+    def test_reset_in_another_process_drops_the_block(self):
+        allocator = DocumentSequenceAllocator(block_size=5)
+        self.assertEqual(self.take(allocator, "quotation", 2)[-1], "QUOTATION/0002/2025-26")
+
+        # reset_series only discards the module level allocator's blocks
+        DocumentControl.objects.get(document_type="quotation").reset_series()
+        self.assertEqual(self.take(allocator, "quotation"), ["QUOTATION/0001/2025-26"])
+
+    def test_failed_invoice_insert_returns_the_number(self):
+        control = DocumentControl.objects.create(clients=self.client_row, document_type="invoice", prefix="INV")
+        branch = Branch.objects.create(
+            branch_name="Head Office", branch_code="BR-GEN-0001", primary_contact_name="Ops",
+            primary_contact_email="ops@example.com", primary_contact_phone="9000000000",
+        )
+
+        with mock.patch("dashboards.super_admin.services.receivables.post", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                GSTInvoice(clients=self.client_row, branch=branch, sub_total=Decimal("100")).save()
+
+        control.refresh_from_db()
+        self.assertEqual(control.current_number, 0)
+        self.assertFalse(GSTInvoice.all_objects.exists())
+
+
+# =====================================================
+# QUOTATION INVOICING
+# =====================================================
+class QuotationInvoiceBatchAPITests(TestCase):
+
+    def test_bad_ids_are_a_400(self):
+        user = get_user_model().objects.create_user(
+            email="accounts@example.com", full_name="Accounts", user_type="super_admin"
+        )
+        for data in ({"branch_id": "x"}, {"clients_id": [1]}, {"quotation_ids": ["a"]}, {"quotation_ids": "1,2"}):
+            with self.subTest(data=data):
+                request = APIRequestFactory().post("/", data, format="json")
+                force_authenticate(request, user=user)
+                response = QuotationInvoiceBatchAPI.as_view()(request)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data["status"])
+
+
+# =====================================================
+# SLAB INDEX
+# =====================================================
+class SlabIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = SlabIndex([
+            self.slab(3, 501, None, "6"),
+            self.slab(1, 1, 100, "10"),
+            self.slab(2, 101, 500, "8", price_type="fixed"),
+            self.slab(4, None, None, "0.25", billing_mode="local_sms"),
+        ])
+
+    def slab(self, pk, min_qty, max_qty, amount="10", billing_mode="per_duty_slip", price_type="per_unit"):
+        """
+        Unsaved SlabRate, the index only reads its attributes
+        """
+        return SlabRate(
+            pk=pk, slab_name=f"Tier {pk}", billing_mode=billing_mode, price_type=price_type,
+            min_qty=min_qty, max_qty=max_qty, amount=Decimal(amount),
+        )
+
+    def tier(self, quantity, billing_mode="per_duty_slip"):
+        found = self.index.tier_for(billing_mode, quantity)
+        return found and found.pk
+
+    def test_tier_bounds(self):
+        self.assertEqual(
+            [self.tier(quantity) for quantity in (1, 100, 101, 500, 501, 100000)],
+            [1, 1, 2, 2, 3, 3],
+        )
+
+    def test_outside_the_tiers(self):
+        self.assertIsNone(self.tier(0))
+        index = SlabIndex([self.slab(1, 10, 20), self.slab(2, 31, 40)])
+        self.assertIsNone(index.tier_for("per_duty_slip", 25))
+        self.assertIsNone(index.tier_for("per_duty_slip", 41))
+
+    def test_modes_without_tiers(self):
+        self.assertEqual(self.tier(7, "local_sms"), 4)
+        self.assertIsNone(self.tier(7, "email"))
+
+    def test_price_for(self):
+        self.assertEqual(self.index.price_for("per_duty_slip", 50), Decimal("500"))
+        self.assertEqual(self.index.price_for("per_duty_slip", 200), Decimal("8"))
+        self.assertEqual(self.index.price_for("local_sms", 1000), Decimal("250.00"))
+        self.assertIsNone(self.index.price_for("per_duty_slip", 0))
+
+
+class SlabTierConflictTests(TestCase):
+
+    def setUp(self):
+        slab_index.invalidate()
+        self.addCleanup(slab_index.invalidate)
+        for min_qty, max_qty, amount in ((101, 500, "8"), (501, 1000, "6")):
+            SlabRate.objects.create(
+                slab_name=f"{min_qty}-{max_qty}", billing_mode="per_duty_slip", price_type="per_unit",
+                min_qty=min_qty, max_qty=max_qty, amount=Decimal(amount),
+            )
+
+    def test_adjacent_tiers(self):
+        self.assertIsNone(tier_conflict("per_duty_slip", 1, 100))
+        self.assertIsNone(tier_conflict("per_duty_slip", 1001, None))
+
+    def test_overlap(self):
+        self.assertEqual(tier_conflict("per_duty_slip", 400, 600), "Overlaps 101-500 (101 - 500)")
+        self.assertEqual(tier_conflict("per_duty_slip", 900, None), "Overlaps 501-1000 (501 - 1000)")
+
+    def test_gaps(self):
+        self.assertEqual(
+            tier_conflict("per_duty_slip", 1002, None),
+            "Gap after 501-1000, the next tier must start at 1001",
+        )
+        self.assertEqual(
+            tier_conflict("per_duty_slip", 1, 99),
+            "Gap before 101-500, this tier must end at 100",
+        )
+
+    def test_min_above_max(self):
+        self.assertEqual(tier_conflict("per_duty_slip", 10, 5), "Min qty cannot be greater than max qty")
+
+    def test_own_row_inactive_rows_and_other_modes_are_ignored(self):
+        own = SlabRate.objects.get(min_qty=101)
+        self.assertIsNone(tier_conflict("per_duty_slip", 101, 500, exclude_pk=own.pk))
+        self.assertIsNone(tier_conflict("local_sms", 400, 600))
+
+        SlabRate.objects.filter(min_qty=501).update(is_active=False)
+        self.assertIsNone(tier_conflict("per_duty_slip", 501, None))
+
+    def test_clean_rejects_a_conflicting_tier(self):
+        row = SlabRate(
+            slab_name="Bad", billing_mode="per_duty_slip", price_type="per_unit",
+            min_qty=450, max_qty=550, amount=Decimal("7"),
+        )
+        with self.assertRaises(ValidationError) as raised:
+            row.clean()
+        self.assertIn("min_qty", raised.exception.message_dict)
+
+    def test_price_for_follows_saves(self):
+        self.assertEqual(price_for("per_duty_slip", 200), Decimal("1600.00"))
+
+        row = SlabRate.objects.get(min_qty=101)
+        row.amount = Decimal("5")
+        row.save()
+
+        self.assertEqual(price_for("per_duty_slip", 200), Decimal("1000.00"))
+
+
+# =====================================================
+# BILLING RUN
+# =====================================================
+class BillingRunTests(TransactionTestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(
+            branch_name="Head Office", branch_code="BR-GEN-0001", primary_contact_name="Ops",
+            primary_contact_email="ops@example.com", primary_contact_phone="9000000000",
+        )
+        slab = SlabRate.objects.create(slab_name="Flat", billing_mode="flat", months=1, amount=Decimal("100"))
+        for n in range(3):
+            client = Clients.objects.create(
+                display_name=f"Client {n}", client_code=f"C{n}", slab_rate=slab,
+                billing_branch=self.branch, billing_cycle="monthly",
+            )
+            DocumentControl.objects.create(clients=client, document_type="invoice", prefix=f"C{n}")
+
+    def test_partitions_through_the_pool(self):
+        # threads stand in for the spawned processes, they share the in-memory test database
+        def pool(workers, mp_context=None, initializer=None):
+            return ThreadPoolExecutor(1)
+
+        with mock.patch.object(billing_run, "PARTITION_SIZE", 1), \
+                mock.patch.object(billing_run, "ProcessPoolExecutor", pool):
+            run, invoices = billing_run.run_billing(self.branch.pk, date(2026, 1, 1), workers=2)
+
+        self.assertEqual(run.status, "completed")
+        self.assertEqual((run.metrics["workers"], run.metrics["partitions"]), (2, 3))
+        self.assertEqual(len(invoices), 3)
+        self.assertEqual(len({row["invoice_no"] for row in invoices}), 3)
+        self.assertEqual(GSTInvoice.objects.filter(billing_run=run).count(), 3)
+
+        rerun, invoices = billing_run.run_billing(self.branch.pk, date(2026, 1, 1))
+        self.assertEqual(invoices, [])
+        self.assertEqual({skip["reason"] for skip in rerun.skipped}, {"Already billed for this period"})
+
+
+# =====================================================
+# NAMED COUNTERS
+# =====================================================
+class NumberCounterTests(TestCase):
+
+    def test_series_seeds_from_the_last_legacy_number(self):
+        party = PartyMaster.objects.create(name="Vendor")
+        for number in ("VB-2026-00007", "VB-2026-00003", "VB-2025-00042"):
+            BillDetails.objects.create(
+                party_master=party, bill_number=number, voucher_number=number, bill_date=date(2026, 1, 5)
+            )
+
+        self.assertEqual(
+            yearly_numbers("VB", BillDetails, "voucher_number", year=2026),
+            ["VB-2026-00008"],
+        )
+        self.assertEqual(
+            yearly_numbers("VB", BillDetails, "voucher_number", count=3, year=2026),
+            ["VB-2026-00009", "VB-2026-00010", "VB-2026-00011"],
+        )
+        # the seed is only read once, the counter owns the series from here
+        self.assertEqual(NumberCounter.objects.get(name="VB-2026").value, 11)
+
+    def test_consecutive_ranges(self):
+        self.assertEqual(list(take("X", 2)), [1, 2])
+        self.assertEqual(list(take("X", 3)), [3, 4, 5])
+        self.assertEqual(list(take("Y", seed=lambda: 40)), [41])
+        self.assertEqual(list(take("Y", seed=lambda: 90)), [42])
+
+    def test_next_vendor_bill_number_uses_the_current_year(self):
+        year = timezone.now().year
+        self.assertEqual(next_vendor_bill_number(), f"VB-{year}-00001")
+
+
+# =====================================================
+# BULK ATTENDANCE
+# =====================================================
+class BulkAttendanceTests(TestCase):
+
+    def setUp(self):
+        department = Department.objects.create(name="Ops")
+        self.employee = Employee.objects.create(
+            department=department,
+            designation=Designation.objects.create(designation_name="Clerk", department=department),
+            name="Asha", dob=date(1990, 1, 1), joining_date=date(2024, 1, 1),
+            basic_salary=Decimal("20000"), email="asha@example.com", gender="female",
+        )
+
+    def payload(self, **extra):
+        return {"date": "2026-01-05", "defaults": {"status": "present"}, "employee_ids": [self.employee.pk], **extra}
+
+    def test_invalid_skip_weekdays_is_rejected(self):
+        for skip in (["sunday"], [7], "6", [None]):
+            with self.subTest(skip=skip), self.assertRaises(BulkAttendanceError):
+                build_rows(self.payload(date=None, date_from="2026-01-01", date_to="2026-01-07", skip_weekdays=skip))
+
+    def test_skip_weekdays_drops_those_days(self):
+        rows = build_rows(self.payload(date=None, date_from="2026-01-01", date_to="2026-01-07", skip_weekdays=["6", 5]))
+        self.assertEqual([row["date"].weekday() for row in rows], [3, 4, 0, 1, 2])
+
+    def test_created_updated_and_restored(self):
+        [created] = bulk_mark_attendance(build_rows(self.payload()))
+        self.assertEqual((created["created"], created["restored"]), (True, False))
+
+        [updated] = bulk_mark_attendance(build_rows(self.payload()))
+        self.assertEqual((updated["created"], updated["restored"]), (False, False))
+
+        Attendance.objects.filter(pk=created["attendance_id"]).delete()
+        [restored] = bulk_mark_attendance(build_rows(self.payload()))
+        self.assertEqual((restored["created"], restored["restored"]), (False, True))
+        self.assertEqual(restored["attendance_id"], created["attendance_id"])
+        self.assertTrue(Attendance.objects.filter(pk=created["attendance_id"]).exists())
+
+
+class SalaryRegisterTests(TestCase):
+
+    def test_attendance_days_of_the_slip_month(self):
+        department = Department.objects.create(name="Ops")
+        employee = Employee.objects.create(
+            department=department,
+            designation=Designation.objects.create(designation_name="Clerk", department=department),
+            name="Asha", dob=date(1990, 1, 1), joining_date=date(2024, 1, 1),
+            basic_salary=Decimal("20000"), email="asha@example.com", gender="female",
+        )
+        for day, status in (
+            (date(2025, 12, 31), "absent"),
+            (date(2026, 1, 1), "present"),
+            (date(2026, 1, 2), "halfday"),
+            (date(2026, 1, 31), "present"),
+            (date(2026, 2, 1), "leave"),
+        ):
+            Attendance.objects.create(employee=employee, date=day, status=status)
+        Attendance.objects.filter(date=date(2026, 1, 2)).delete()
+
+        amounts = dict.fromkeys(
+            ("gross_salary", "basic", "hra", "total_earnings", "pf", "esi",
+             "professional_tax", "total_deductions", "net_salary"),
+            Decimal("0"),
+        )
+        SalarySlip.objects.create(employee=employee, salary_date=date(2026, 1, 15), **amounts)
+        SalarySlip.objects.create(employee=employee, salary_date=date(2026, 3, 1), **amounts)
+
+        request = APIRequestFactory().get("/", {"ordering": "salary_date", "fields": "salary_date,present_days,halfdays,absent_days,leave_days"})
+        force_authenticate(request, user=get_user_model().objects.create_user(
+            email="hr@example.com", full_name="HR", user_type="super_admin"
+        ))
+        response = SalaryAPI.as_view()(request)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [tuple(row.values())[1:] for row in response.data["data"]],
+            [(2, 0, 0, 0), (0, 0, 0, 0)],
+        )
+
+
+class AttendanceMatrixAPITests(SimpleTestCase):
+
+    def test_bad_query_is_a_400(self):
+        view = AttendanceMatrixAPI.as_view()
+        for query in ({"month": "2026-01", "branch_id": "abc"}, {"month": "2026-01"}, {"month": "jan", "branch_id": "1"}):
+            with self.subTest(query=query):
+                response = view(APIRequestFactory().get("/", query))
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data["status"])
+
+
+# =====================================================
+# PAYROLL RUN
+# =====================================================
+class PayrollRunTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(
+            branch_name="Head Office", branch_code="BR-GEN-0001", primary_contact_name="Ops",
+            primary_contact_email="ops@example.com", primary_contact_phone="9000000000",
+        )
+        department = Department.objects.create(name="Ops")
+        self.employee = Employee.objects.create(
+            department=department, branch=self.branch,
+            designation=Designation.objects.create(designation_name="Clerk", department=department),
+            name="Asha", dob=date(1990, 1, 1), joining_date=date(2024, 1, 1),
+            basic_salary=Decimal("31000"), email="asha@example.com", gender="female",
+        )
+        self.advance = AdvanceRequest.objects.create(
+            employee=self.employee, branch=self.branch, date=date(2025, 12, 15),
+            amount=Decimal("3000"), purpose="Medical", repayment_terms="3",
+        )
+        AdvanceInstallment.objects.bulk_create([
+            AdvanceInstallment(advance=self.advance, installment_no=number, due_date=due, amount=Decimal("1000"))
+            for number, due in enumerate((date(2026, 1, 10), date(2026, 2, 10), date(2026, 3, 10)), start=1)
+        ])
+
+    def run_month(self, month, **kwargs):
+        return run_payroll(self.branch.pk, month, **kwargs)
+
+    def slip(self, month):
+        return SalarySlip.objects.get(employee=self.employee, salary_date=month)
+
+    def balances(self):
+        self.advance.refresh_from_db()
+        return self.advance.scheduled_amount, self.advance.deducted_amount, self.advance.outstanding_amount
+
+    def deducted_on(self):
+        return dict(
+            AdvanceInstallment.objects.order_by("installment_no").values_list("installment_no", "salary_slip_id")
+        )
+
+    def test_slip_deducts_the_due_installment(self):
+        for day, status in ((5, "absent"), (6, "absent"), (7, "halfday"), (8, "leave")):
+            Attendance.objects.create(employee=self.employee, date=date(2026, 1, day), status=status)
+
+        run, rows = self.run_month(date(2026, 1, 1))
+
+        slip = self.slip(date(2026, 1, 1))
+        self.assertEqual((run.slips_created, run.slips_updated), (1, 0))
+        self.assertEqual(slip.advance_deduction, Decimal("1000.00"))
+        # 2.5 unpaid days of a 31 day month
+        self.assertEqual(slip.leave_deduction, Decimal("2500.00"))
+        self.assertEqual(slip.net_salary, rows[0]["net_salary"])
+        self.assertEqual(self.deducted_on(), {1: slip.pk, 2: None, 3: None})
+        self.assertEqual(self.balances(), (Decimal("3000.00"), Decimal("1000.00"), Decimal("2000.00")))
+
+    def test_rerun_takes_the_same_installment_once(self):
+        self.run_month(date(2026, 1, 1))
+        run, _ = self.run_month(date(2026, 1, 1))
+
+        self.assertEqual((run.slips_created, run.slips_updated), (0, 1))
+        self.assertEqual(SalarySlip.objects.count(), 1)
+        self.assertEqual(self.slip(date(2026, 1, 1)).advance_deduction, Decimal("1000.00"))
+        self.assertEqual(self.balances()[1:], (Decimal("1000.00"), Decimal("2000.00")))
+
+    def test_next_month_takes_only_its_installment(self):
+        self.run_month(date(2026, 1, 1))
+        self.run_month(date(2026, 2, 1))
+
+        self.assertEqual(self.slip(date(2026, 2, 1)).advance_deduction, Decimal("1000.00"))
+        self.assertEqual(self.deducted_on(), {
+            1: self.slip(date(2026, 1, 1)).pk, 2: self.slip(date(2026, 2, 1)).pk, 3: None,
+        })
+        self.assertEqual(self.balances()[1:], (Decimal("2000.00"), Decimal("1000.00")))
+
+    def test_rerun_releases_an_installment_no_longer_deducted(self):
+        self.run_month(date(2026, 1, 1))
+        AdvanceInstallment.objects.filter(installment_no=1).update(payslip_deduction=False)
+
+        self.run_month(date(2026, 1, 1))
+
+        self.assertEqual(self.slip(date(2026, 1, 1)).advance_deduction, Decimal("0.00"))
+        self.assertEqual(self.deducted_on()[1], None)
+        self.assertEqual(self.balances()[1:], (Decimal("0.00"), Decimal("3000.00")))
+
+    def test_dry_run_writes_nothing(self):
+        run, rows = self.run_month(date(2026, 1, 1), dry_run=True)
+
+        self.assertIsNone(run.pk)
+        self.assertEqual(rows[0]["advance_deduction"], Decimal("1000.00"))
+        self.assertFalse(SalarySlip.objects.exists())
+        self.assertEqual(self.deducted_on()[1], None)
+        self.assertEqual(self.balances()[1], Decimal("0.00"))
+
+    def test_failed_write_keeps_installments_due(self):
+        with mock.patch("dashboards.super_admin.services.payroll.AdvanceRequest.sync_balances", side_effect=RuntimeError):
+            with self.assertRaises(PayrollError):
+                self.run_month(date(2026, 1, 1))
+
+        self.assertFalse(SalarySlip.objects.exists())
+        self.assertEqual(self.deducted_on()[1], None)
+
+    def test_deducted_schedule_is_not_replaced(self):
+        self.run_month(date(2026, 1, 1))
+
+        request = APIRequestFactory().put("/", {"installments": []}, format="json")
+        response = AdvanceAPI.as_view()(request, pk=self.advance.pk)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AdvanceInstallment.objects.count(), 3)
+
+
+# =====================================================
+# EMPLOYEE PHOTOS
+# =====================================================
+class EmployeePhotoTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        department = Department.objects.create(name="Ops")
+        self.employee = Employee.objects.create(
+            department=department,
+            designation=Designation.objects.create(designation_name="Clerk", department=department),
+            name="Asha", dob=date(1990, 1, 1), joining_date=date(2024, 1, 1),
+            basic_salary=Decimal("20000"), email="asha@example.com", gender="female",
+            upload_photo=self.photo("asha.png"),
+        )
+
+    def photo(self, name, color="red"):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 300), color).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def derivatives(self, original_name):
+        return [
+            default_storage.exists(derivative_name(original_name, size, fmt))
+            for size in ("thumb", "medium") for fmt in ("webp", "jpeg")
+        ]
+
+    def test_new_photo_drops_the_old_derivatives(self):
+        employee = Employee.objects.get(pk=self.employee.pk)
+        old_name, old_etag = employee.upload_photo.name, employee.photo_etag
+        self.assertEqual(self.derivatives(old_name), [True] * 4)
+
+        employee.upload_photo = self.photo("asha-new.png", "blue")
+        employee.save()
+
+        self.assertEqual(self.derivatives(old_name), [False] * 4)
+        self.assertEqual(self.derivatives(employee.upload_photo.name), [True] * 4)
+        self.assertNotEqual(Employee.objects.get(pk=employee.pk).photo_etag, old_etag)
+
+    def test_cleared_photo_drops_the_derivatives(self):
+        employee = Employee.objects.get(pk=self.employee.pk)
+        old_name = employee.upload_photo.name
+
+        employee.upload_photo = None
+        employee.save()
+
+        self.assertEqual(self.derivatives(old_name), [False] * 4)
+        self.assertIsNone(Employee.objects.get(pk=employee.pk).photo_etag)
+
+    def test_saving_other_fields_keeps_the_derivatives(self):
+        employee = Employee.objects.get(pk=self.employee.pk)
+        employee.name = "Asha K"
+        employee.save()
+        self.assertEqual(self.derivatives(employee.upload_photo.name), [True] * 4)
+
+    def test_only_a_versioned_url_is_immutable(self):
+        etag = Employee.objects.get(pk=self.employee.pk).photo_etag
+        for query, cache_control in (
+            ({"v": etag[:12]}, "public, max-age=31536000, immutable"),
+            ({}, "public, no-cache"),
+            ({"v": "0" * 12}, "public, no-cache"),
+        ):
+            with self.subTest(query=query):
+                request = APIRequestFactory().get("/", {"size": "thumb", **query})
+                response = EmployeePhotoAPI.as_view()(request, pk=self.employee.pk)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Cache-Control"], cache_control)
+                response.close()
+
+
+# =====================================================
+# LIST QUERY
+# =====================================================
+class ListQueryTests(TestCase):
+
+    def test_bad_filter_value_is_a_400(self):
+        view = AttendanceAPI.as_view()
+        for query in (
+            {"employee_id": "abc"},
+            {"date": "2026-13-45"},
+            {"date_from": "xx"},
+            {"branch_id": "x"},
+            {"branch_id": "x", "export": "csv"},
+        ):
+            with self.subTest(query=query):
+                response = view(APIRequestFactory().get("/", query))
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data["status"])
+
+    def test_cursor_walks_through_null_values(self):
+        warranty = [datetime(2026, 1, day, tzinfo=dt_timezone.utc) for day in (3, 1)] + [None, None, None]
+        ids = [
+            Asset.objects.create(
+                code=f"A-{n}", name="A", useful_life_years=5, purchase_date=FY_START,
+                purchase_value=Decimal("100"), current_value=Decimal("100"),
+                depreciation_start_date=FY_START, location="HQ", warranty_expiry_date=expiry,
+            ).pk
+            for n, expiry in enumerate(warranty)
+        ]
+        spec = ListSpec(fields={"id": "id"}, ordering=("warranty_expiry_date",))
+
+        for ordering, expected in (
+            ("warranty_expiry_date", [ids[1], ids[0], *ids[2:]]),
+            ("-warranty_expiry_date", [ids[0], ids[1], *reversed(ids[2:])]),
+        ):
+            seen, cursor = [], None
+            while True:
+                params = {"ordering": ordering, "page_size": 2, **({"cursor": cursor} if cursor else {})}
+                rows, cursor = spec.run(Request(APIRequestFactory().get("/", params)), Asset.objects.all())
+                seen += [row["id"] for row in rows]
+                if not cursor:
+                    break
+            self.assertEqual(seen, expected, ordering)
+
+
+# =====================================================
+# BANK STATEMENTS
+# =====================================================
+class BankStatementAPITests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="accounts@example.com", full_name="Accounts", user_type="super_admin"
+        )
+        branch = Branch.objects.create(
+            branch_name="Head Office", branch_code="BR-GEN-0001", primary_contact_name="Ops",
+            primary_contact_email="ops@example.com", primary_contact_phone="9000000000",
+        )
+        self.statement = BankStatement.objects.create(
+            branch=branch, file_name="statement.csv", file_format="csv", started_at=timezone.now()
+        )
+        self.expense = Expense.objects.create(
+            branch=branch, expense_date=date(2026, 1, 5), payment_mode="bank", amount=Decimal("500.00")
+        )
+
+    def line(self, line_no, txn_date=None, **fields):
+        return BankStatementLine.objects.create(
+            statement=self.statement, line_no=line_no, txn_date=txn_date,
+            status="error" if txn_date is None else "unmatched", **fields
+        )
+
+    def request(self, method, data=None, **query):
+        factory = APIRequestFactory()
+        if method == "get":
+            request = factory.get("/", query)
+        else:
+            request = getattr(factory, method)("/", data, format="multipart" if method == "post" else "json")
+        force_authenticate(request, user=self.user)
+        return request
+
+    def resolve(self, line, **data):
+        return BankStatementLineAPI.as_view()(self.request("put", data), pk=line.pk)
+
+    def test_non_numeric_ids_are_a_400(self):
+        upload = SimpleUploadedFile("statement.csv", b"date,credit\n2026-01-05,100\n")
+        response = BankStatementAPI.as_view()(self.request("post", {"file": upload, "branch_id": "abc"}))
+        self.assertEqual(response.status_code, 400)
+
+        line = self.line(1, date(2026, 1, 5), credit=Decimal("100.00"))
+        self.assertEqual(self.resolve(line, receipt_id="abc").status_code, 400)
+        self.assertEqual(self.resolve(line, expense_id=[1]).status_code, 400)
+
+    def test_expense_must_match_the_debit_and_a_line_resolves_once(self):
+        wrong = self.line(1, date(2026, 1, 5), debit=Decimal("450.00"))
+        self.assertEqual(self.resolve(wrong, expense_id=self.expense.pk).status_code, 400)
+        credit = self.line(2, date(2026, 1, 5), credit=Decimal("500.00"))
+        self.assertEqual(self.resolve(credit, expense_id=self.expense.pk).status_code, 400)
+        self.expense.refresh_from_db()
+        self.assertIsNone(self.expense.reconciled_at)
+
+        line = self.line(3, date(2026, 1, 5), debit=Decimal("500.00"))
+        response = self.resolve(line, expense_id=self.expense.pk)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.expense.refresh_from_db()
+        self.assertEqual(self.expense.bank_statement_id, self.statement.pk)
+
+        response = self.resolve(line, note="again")
+        self.assertEqual(response.status_code, 400)
+        line.refresh_from_db()
+        self.assertEqual(line.note, f"Expense {self.expense.pk}")
+
+    def test_lines_page_past_unreadable_lines(self):
+        ids = [self.line(1, date(2026, 1, 5)).pk, self.line(2).pk, self.line(3).pk]
+        seen, cursor = [], None
+        while True:
+            query = {"ordering": "txn_date", "page_size": 1, **({"cursor": cursor} if cursor else {})}
+            response = BankStatementLineAPI.as_view()(self.request("get", **query))
+            self.assertEqual(response.status_code, 200, response.data)
+            seen += [row["id"] for row in response.data["data"]]
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, ids)
+
+
+# =====================================================
+# PURCHASE ORDER LINES
+# =====================================================
+class PurchaseOrderItemWriterTests(TestCase):
+
+    def setUp(self):
+        self.party = PartyMaster.objects.create(name="Vendor")
+        self.order = self.purchase_order("PO-1")
+
+    def purchase_order(self, number):
+        return PurchaseOrder.objects.create(
+            party_master=self.party, po_number=number, po_date=date(2026, 1, 5),
+            delivery_date=date(2026, 1, 20), amount=Decimal("0"),
+        )
+
+    def lines(self, order=None):
+        return list(
+            PurchaseOrderItem.objects.filter(purchase_order=order or self.order)
+            .order_by("id").values_list("description", "quantity", "rate", "tax", "amount")
+        )
+
+    def stored_total(self):
+        return sum(row[-1] for row in self.lines())
+
+    def test_create(self):
+        total = write_items(self.order, [
+            {"description": "Brake pads", "sku": "BP-1", "quantity": 4, "rate": "250", "tax": "18"},
+            {"description": "Wiper", "rate": "120.50"},
+        ])
+
+        self.assertEqual(self.lines(), [
+            ("Brake pads", 4, Decimal("250.00"), Decimal("18.00"), Decimal("1180.00")),
+            ("Wiper", 1, Decimal("120.50"), Decimal("0.00"), Decimal("120.50")),
+        ])
+        self.assertEqual(total, Decimal("1300.50"))
+
+    def test_update_add_and_delete(self):
+        write_items(self.order, [
+            {"description": "Brake pads", "quantity": 4, "rate": "250", "tax": "18"},
+            {"description": "Wiper", "rate": "120"},
+            {"description": "Filter", "rate": "80"},
+        ])
+        pads, wiper, _ = PurchaseOrderItem.objects.filter(purchase_order=self.order).order_by("id")
+
+        total = write_items(self.order, [
+            {"id": pads.pk, "quantity": 2},
+            {"id": str(wiper.pk)},
+            {"description": "Coolant", "quantity": 3, "rate": "50"},
+        ])
+
+        self.assertEqual(self.lines(), [
+            ("Brake pads", 2, Decimal("250.00"), Decimal("18.00"), Decimal("590.00")),
+            ("Wiper", 1, Decimal("120.00"), Decimal("0.00"), Decimal("120.00")),
+            ("Coolant", 3, Decimal("50.00"), Decimal("0.00"), Decimal("150.00")),
+        ])
+        self.assertEqual(total, Decimal("860.00"))
+
+    def test_total_is_the_sum_of_the_stored_amounts(self):
+        # 3 x 10.01 at 18% is 35.4354 in memory, the column keeps 2 places
+        total = write_items(self.order, [
+            {"description": "Bolt", "quantity": 3, "rate": "10.01", "tax": "18"},
+            {"description": "Nut", "quantity": 7, "rate": "3.33", "tax": "12.5"},
+        ])
+
+        self.assertEqual(line_amount(3, Decimal("10.01"), Decimal("18")), Decimal("35.4354"))
+        self.assertEqual(total, self.stored_total())
+        self.assertEqual(total, Decimal("61.66"))
+        self.assertEqual([row[-1] for row in self.lines()], [Decimal("35.44"), Decimal("26.22")])
+
+    def test_id_of_another_orders_line_adds_a_line(self):
+        other = self.purchase_order("PO-2")
+        write_items(other, [{"description": "Tyre", "rate": "4000"}])
+        foreign = PurchaseOrderItem.objects.get(purchase_order=other)
+
+        write_items(self.order, [{"id": foreign.pk, "description": "Tyre", "rate": "3900"}])
+
+        self.assertEqual(self.lines(other), [("Tyre", 1, Decimal("4000.00"), Decimal("0.00"), Decimal("4000.00"))])
+        self.assertEqual(self.lines(), [("Tyre", 1, Decimal("3900.00"), Decimal("0.00"), Decimal("3900.00"))])
+
+    def test_queries_do_not_grow_with_lines(self):
+        def queries(count):
+            order = self.purchase_order(f"PO-{count}")
+            write_items(order, [{"description": f"Part {n}", "rate": "10"} for n in range(count)])
+            kept = PurchaseOrderItem.objects.filter(purchase_order=order).order_by("id")
+            payload = [{"id": item.pk, "quantity": 2} for item in kept[: count // 2]]
+            payload += [{"description": f"New {n}", "rate": "5"} for n in range(count)]
+            with CaptureQueriesContext(connection) as captured:
+                write_items(order, payload)
+            return len(captured)
+
+        self.assertEqual(queries(4), queries(40))
+
+    def test_invalid_items(self):
+        for item in (
+            {"description": "Part", "rate": "abc"},
+            {"description": "Part"},
+            {"description": "Part", "rate": "10", "quantity": -1},
+        ):
+            with self.subTest(item=item), self.assertRaises(PurchaseOrderError):
+                write_items(self.order, [item])
+
+
+# =====================================================
+# THREE WAY MATCH
+# =====================================================
+class ParseBillIdsTests(SimpleTestCase):
+
+    def test_ids(self):
+        self.assertEqual(parse_bill_ids(["3", 4]), [3, 4])
+        self.assertIsNone(parse_bill_ids(None))
+        self.assertIsNone(parse_bill_ids([]))
+
+    def test_invalid_ids_are_rejected(self):
+        for values in (["abc"], [None], "1,2", 7):
+            with self.subTest(values=values), self.assertRaises(ThreeWayMatchError):
+                parse_bill_ids(values)